@@ -0,0 +1,292 @@
+"""
+Headless batch map generation for the Montana County Distribution Map Generator.
+
+Writes one map per taxon in a workbook, using the same filtering, coloring
+and legend logic as the Single and Dual Year Analysis windows.
+
+Examples:
+    python Batch_Map_Generator.py records.xlsx --genus Bombus --year 2000
+    python Batch_Map_Generator.py records.xlsx --genus Bombus --years 1990 2010 --format svg
+    python Batch_Map_Generator.py records.xlsx --genus Bombus --breaks 1950 1980 2000 2010
+    python Batch_Map_Generator.py records.xlsx --genus Bombus --decades 1900 2020
+    python Batch_Map_Generator.py records.xlsx --genus Bombus --mode richness --grid
+    python Batch_Map_Generator.py records.xlsx --family Apidae --level genus
+    python Batch_Map_Generator.py records.xlsx --genus Bombus --year 2000 --workers 8
+    python Batch_Map_Generator.py records.xlsx --genus Bombus --year 2000 --grid
+    python Batch_Map_Generator.py records.xlsx --genus Bombus --sweep gif --sweep-range 1980 2020
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")  # No display needed for batch rendering
+from matplotlib.colors import is_color_like
+
+import map_engine
+
+
+def get_base_dir():
+    """Directory holding the bundled data files"""
+    if getattr(sys, 'frozen', False):
+        return sys._MEIPASS
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Generate one Montana county distribution map per taxon in a workbook."
+    )
+    parser.add_argument("workbook", help="Excel workbook, CSV/TSV or Parquet file with county, family, genus, species and year columns")
+    years = parser.add_mutually_exclusive_group()
+    years.add_argument("--year", type=int, help="Split year (Single Year Analysis)")
+    years.add_argument("--years", type=int, nargs=2, metavar=("FIRST", "SECOND"),
+                       help="Two split years (Dual Year Analysis)")
+    years.add_argument("--breaks", type=int, nargs="+", metavar="YEAR",
+                       help="Any number of increasing split years, one period per gap")
+    years.add_argument("--decades", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                       help="Split at the end of every decade from FIRST to LAST")
+    parser.add_argument("--mode", choices=list(map_engine.MAP_MODES), default=map_engine.PERIODS_MODE,
+                        help="Color counties by record period (default), or by records per county, "
+                             "species richness or years since the last record")
+    parser.add_argument("--family", default="All", help="Family to map (default: All)")
+    parser.add_argument("--genus", default="All", help="Genus to map (default: All)")
+    parser.add_argument("--level", choices=["species", "genus"], default="species",
+                        help="Write one map per species (default) or per genus of the selection")
+    parser.add_argument("--include-all", action="store_true",
+                        help="Also write the combined map for the whole selection")
+    parser.add_argument("--colors", nargs="+", metavar="COLOR",
+                        help="Period colors, highest priority first (one per period)")
+    parser.add_argument("--format", dest="export_format", choices=["tiff", "svg", "jpg", "png"], default="tiff",
+                        help="Export format (default: tiff)")
+    parser.add_argument("--dpi", type=int, default=300, help="Export resolution (default: 300)")
+    parser.add_argument("--out", default="maps", help="Output directory (default: ./maps)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Render in this many worker processes (default: 1, 0 = one per CPU)")
+    parser.add_argument("--grid", action="store_true",
+                        help="Write a single small-multiples figure with one panel per taxon")
+    parser.add_argument("--grid-cols", type=int, metavar="N",
+                        help="Panels per grid row (default: about the square root of the taxon count)")
+    parser.add_argument("--sweep", choices=map_engine.SWEEP_FORMATS,
+                        help="Write one animation (or PNG frame folder) per taxon with a frame per split year")
+    parser.add_argument("--sweep-range", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                        help="Split years to sweep (default: the taxon's first to last record year)")
+    parser.add_argument("--fps", type=int, default=2, help="Year sweep frames per second (default: 2)")
+    return parser
+
+
+def select_taxa(taxonomy, family, genus, level, include_all=False):
+    """(family, genus, species) selections to map, one per taxon at the requested level"""
+    if level == "genus":
+        taxa = [(family, g, "all") for g in taxonomy.genera(family)]
+        combined = (family, "All", "all")
+    else:
+        taxa = [(family, genus, sp) for sp in taxonomy.species(family, genus)]
+        combined = (family, genus, "all")
+    if include_all:
+        taxa.insert(0, combined)
+    return taxa
+
+
+def validate_args(parser, args):
+    """Check year order and colors; returns the split years"""
+    if args.year is not None:
+        split_years = [args.year]
+    elif args.decades:
+        if args.decades[0] > args.decades[1]:
+            parser.error("First decade year must not be after the last decade year.")
+        split_years = map_engine.decade_breaks(*args.decades)
+    else:
+        split_years = list(args.years or args.breaks or [])
+    if any(earlier >= later for earlier, later in zip(split_years, split_years[1:])):
+        parser.error("Split years must be strictly increasing.")
+
+    if args.mode != map_engine.PERIODS_MODE:
+        if split_years or args.colors or args.sweep:
+            parser.error(f"--mode {args.mode} uses classed colors; it cannot be combined with split years, "
+                         "--colors or --sweep.")
+
+    if args.sweep:
+        if split_years or args.grid:
+            parser.error("--sweep varies the split year; it cannot be combined with fixed split years or --grid.")
+        if args.sweep_range and args.sweep_range[0] > args.sweep_range[1]:
+            parser.error("First sweep year must not be after the last sweep year.")
+    elif args.sweep_range:
+        parser.error("--sweep-range requires --sweep.")
+
+    if args.colors:
+        n_years = 1 if args.sweep else len(split_years)
+        if len(args.colors) != n_years + 1:
+            parser.error(f"Expected {n_years + 1} colors for {n_years} split year(s).")
+        invalid = [color for color in args.colors if not is_color_like(color)]
+        if invalid:
+            parser.error(f"Invalid colors: {', '.join(invalid)}")
+    return split_years
+
+
+# Per-process render state, set once by init_worker (or main for serial runs)
+_worker = {}
+
+
+def init_worker(shapefile_path, summary, split_years, colors, mode, export_format, dpi, out_dir):
+    """Load the county geometry once per process and keep the shared job settings"""
+    counties, _ = map_engine.load_county_geometry(shapefile_path)
+    map_engine.configure_export_fonts(export_format)
+    _worker.update(
+        counties=map_engine.prepare_counties(counties),
+        summary=summary,
+        split_years=split_years,
+        colors=colors,
+        mode=mode,
+        export_format=export_format,
+        dpi=dpi,
+        out_dir=out_dir,
+        view=None,
+    )
+
+
+def render_job(taxon):
+    """Render and save one taxon's map; returns (file path, unmatched counties, seconds)"""
+    start = time.perf_counter()
+    family, genus, species = taxon
+
+    # Each process keeps one map view and only recolors it for later jobs
+    spec = map_engine.MapSpec(family, genus, species, _worker["split_years"], _worker["colors"], mode=_worker["mode"])
+    _worker["view"], unmatched = map_engine.render(
+        _worker["counties"], _worker["summary"], spec, view=_worker["view"]
+    )
+
+    filename = spec.filename(_worker["export_format"])
+    file_path = os.path.join(_worker["out_dir"], filename)
+    _worker["view"].figure.savefig(file_path, format=_worker["export_format"],
+                                   bbox_inches='tight', dpi=_worker["dpi"])
+    return file_path, unmatched, time.perf_counter() - start
+
+
+def report_job(file_path, unmatched, seconds):
+    if unmatched:
+        print(f"Warning: unmatched counties for {os.path.basename(file_path)}: {', '.join(sorted(unmatched))}")
+    print(f"✅ Map saved: {file_path} ({seconds:.2f}s)")
+
+
+def write_grid(counties, summary, taxa, split_years, args):
+    """Render all taxa as small multiples in one figure and save it"""
+    start = time.perf_counter()
+    map_engine.configure_export_fonts(args.export_format)
+    grid, unmatched = map_engine.render_grid(counties, summary, taxa, split_years,
+                                             colors=args.colors, ncols=args.grid_cols, mode=args.mode)
+
+    filename = map_engine.map_filename(args.family, args.genus, f"{args.level}-grid", split_years, args.export_format,
+                                       mode=args.mode)
+    file_path = os.path.join(args.out, filename)
+    grid.figure.savefig(file_path, format=args.export_format, bbox_inches='tight', dpi=args.dpi)
+    report_job(file_path, unmatched, time.perf_counter() - start)
+    print(f"Grid of {len(taxa)} maps written in one figure")
+    return 0
+
+
+def write_sweeps(counties, summary, taxa, args):
+    """Export a year sweep per taxon, reusing one classification per taxon for all frames"""
+    start = time.perf_counter()
+    map_engine.configure_export_fonts("png")
+    written = 0
+    for family, genus, species in taxa:
+        if args.sweep_range:
+            years = list(range(args.sweep_range[0], args.sweep_range[1] + 1))
+        else:
+            span = summary.year_range(family, genus, species)
+            years = list(range(span[0], span[1] + 1)) if span else []
+        if not years:
+            print(f"Skipped {family}-{genus}-{species}: no dated records")
+            continue
+
+        filename = map_engine.map_filename(family, genus, species, [years[0], years[-1]],
+                                           "png" if args.sweep == "frames" else args.sweep)
+        file_path = os.path.join(args.out, filename)
+        if args.sweep == "frames":
+            file_path = os.path.splitext(file_path)[0]
+
+        job_start = time.perf_counter()
+        frames, unmatched = map_engine.export_year_sweep(
+            counties, summary, family, genus, species, file_path, args.sweep,
+            years=years, colors=args.colors, fps=args.fps, dpi=args.dpi
+        )
+        report_job(file_path, unmatched, time.perf_counter() - job_start)
+        written += 1
+
+    elapsed = time.perf_counter() - start
+    print(f"Generated {written} year sweeps in {elapsed:.1f}s")
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    split_years = validate_args(parser, args)
+
+    shapefile_path = os.path.join(get_base_dir(), "MontanaCounties_shp", "County.shp")
+    counties, _ = map_engine.load_county_geometry(shapefile_path)
+    counties = map_engine.prepare_counties(counties)
+
+    try:
+        timings = {}
+        records = map_engine.load_records(args.workbook, set(counties["county_key"]), timings)
+    except (map_engine.MissingColumnsError, map_engine.NoMontanaRecordsError) as e:
+        print(f"Error loading {args.workbook}: {str(e)}", file=sys.stderr)
+        return 1
+    print(f"Loaded {len(records):,} Montana records: parsed in {timings['parse_seconds']:.2f}s "
+          f"with {timings['engine']}, normalized in {timings['normalize_seconds']:.2f}s, "
+          f"{map_engine.memory_footprint_mb(records):.1f} MB in memory")
+
+    taxonomy = map_engine.TaxonomyIndex(records)
+    # Every map is colored from the per-taxon, per-county summary; workers get it instead of the records
+    summary = map_engine.TaxonCountySummary(records)
+    taxa = select_taxa(taxonomy, args.family, args.genus, args.level, args.include_all)
+    if not taxa:
+        print(f"No taxa found for family '{args.family}' and genus '{args.genus}'.", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.grid:
+        return write_grid(counties, summary, taxa, split_years, args)
+    if args.sweep:
+        try:
+            return write_sweeps(counties, summary, taxa, args)
+        except RuntimeError as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            return 1
+
+    workers = min(args.workers or os.cpu_count() or 1, len(taxa))
+    init_args = (shapefile_path, summary, split_years, args.colors, args.mode, args.export_format, args.dpi, args.out)
+
+    start = time.perf_counter()
+    job_seconds = 0.0
+    if workers <= 1:
+        init_worker(*init_args)
+        for taxon in taxa:
+            file_path, unmatched, seconds = render_job(taxon)
+            job_seconds += seconds
+            report_job(file_path, unmatched, seconds)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=init_args) as pool:
+            futures = [pool.submit(render_job, taxon) for taxon in taxa]
+            for future in as_completed(futures):
+                file_path, unmatched, seconds = future.result()
+                job_seconds += seconds
+                report_job(file_path, unmatched, seconds)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"Generated {len(taxa)} maps in {elapsed:.1f}s with {workers} worker(s): "
+        f"{len(taxa) / elapsed:.2f} maps/s, {job_seconds / len(taxa):.2f}s per map, "
+        f"{job_seconds / elapsed:.1f}x effective parallelism"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Required for worker processes in a frozen executable
+    sys.exit(main())
@@ -4,8 +4,25 @@ import os
 from pathlib import Path
 import datetime
 import sys
-import pandas as pd
-import matplotlib as mpl
+import time
+import queue
+import threading
+
+# Reference point for the startup phase log; pandas, matplotlib, geopandas and
+# map_engine are imported later on a worker thread (see MainApplication)
+STARTUP_START = time.perf_counter()
+
+# Show the figure/memory debug panel with --debug or MAP_GENERATOR_DEBUG=1
+DEBUG_MODE = "--debug" in sys.argv or os.environ.get("MAP_GENERATOR_DEBUG") == "1"
+
+# --profile-startup[=PATH] writes a JSON report of the startup phase and import
+# times once loading has finished (default: startup_profile.json in the cache dir)
+PROFILE_STARTUP = None
+for _arg in sys.argv[1:]:
+    if _arg == "--profile-startup":
+        PROFILE_STARTUP = ""
+    elif _arg.startswith("--profile-startup="):
+        PROFILE_STARTUP = _arg.split("=", 1)[1]
 
 def get_screen_geometry():
     """Get the geometry of all available screens"""
@@ -145,6 +162,271 @@ class ToastNotification:
         # Destroy after duration
         toast.after(duration, toast.destroy)
 
+class FigureManager:
+    """
+    Owns the live map figures and their Tk canvases.
+
+    At most max_figures figures are kept open; creating another one closes
+    the oldest. Closing a figure destroys its canvas widget and removes it
+    from pyplot so its memory can be reclaimed.
+    """
+    def __init__(self, plt, map_engine, max_figures=2):
+        self.plt = plt
+        self.map_engine = map_engine
+        self.max_figures = max_figures
+        self.entries = []  # dicts with figure, canvas and on_release, oldest first
+    
+    def create(self, figsize, on_release=None):
+        """Create a new figure, closing the oldest ones beyond the limit"""
+        while len(self.entries) >= self.max_figures:
+            self.release(self.entries[0]["figure"])
+        
+        figure = self.plt.figure(figsize=figsize)
+        self.entries.append({"figure": figure, "canvas": None, "on_release": on_release})
+        return figure
+    
+    def attach_canvas(self, figure, canvas):
+        """Record the Tk canvas that displays figure so it is destroyed with it"""
+        for entry in self.entries:
+            if entry["figure"] is figure:
+                entry["canvas"] = canvas
+    
+    def release(self, figure):
+        """Close figure, destroy its canvas and notify its owner"""
+        for entry in list(self.entries):
+            if entry["figure"] is not figure:
+                continue
+            self.entries.remove(entry)
+            
+            if entry["canvas"] is not None:
+                try:
+                    entry["canvas"].get_tk_widget().destroy()
+                except tk.TclError:
+                    pass  # Widget already destroyed with its window
+            
+            figure.clear()
+            self.plt.close(figure)
+            
+            if entry["on_release"] is not None:
+                entry["on_release"]()
+    
+    def stats(self):
+        """Live figure count and process memory for the debug panel"""
+        return {
+            "figures": len(self.plt.get_fignums()),
+            "max_figures": self.max_figures,
+            "rss_mb": self.map_engine.process_rss_mb()
+        }
+    
+    def describe(self):
+        """One-line summary of the live figures and memory use"""
+        stats = self.stats()
+        rss = f"{stats['rss_mb']:.1f} MB" if stats['rss_mb'] is not None else "n/a"
+        return f"Live figures: {stats['figures']} (max {stats['max_figures']})\nMemory (RSS): {rss}"
+
+class BackgroundTask:
+    """
+    Runs target(progress, cancel) on a worker thread.
+
+    The worker never touches Tk: progress reports and the result are passed
+    through a queue that the Tk thread polls with after(), so the mainloop
+    keeps running while the work is in progress.
+    """
+    POLL_MS = 50
+
+    def __init__(self, widget, target, on_progress=None, on_success=None, on_error=None):
+        self.widget = widget
+        self.target = target
+        self.on_progress = on_progress
+        self.on_success = on_success
+        self.on_error = on_error
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.widget.after(self.POLL_MS, self._poll)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _run(self):
+        try:
+            result = self.target(self._report, self.cancel_event)
+            self.queue.put(("success", result))
+        except Exception as e:
+            self.queue.put(("error", e))
+
+    def _report(self, message, fraction):
+        self.queue.put(("progress", (message, fraction)))
+
+    def _poll(self):
+        # Stop quietly if the owning window was closed mid-task
+        try:
+            if not self.widget.winfo_exists():
+                self.cancel()
+                return
+        except tk.TclError:
+            self.cancel()
+            return
+
+        while True:
+            try:
+                kind, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "progress":
+                if self.on_progress:
+                    self.on_progress(*payload)
+            elif kind == "success":
+                if self.on_success:
+                    self.on_success(payload)
+                return
+            else:
+                if self.on_error:
+                    self.on_error(payload)
+                return
+
+        self.widget.after(self.POLL_MS, self._poll)
+
+class LoadingDialog:
+    """Modal progress dialog with a Cancel button for a BackgroundTask"""
+    def __init__(self, parent, message, on_cancel=None, title="Loading"):
+        self.on_cancel = on_cancel
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.transient(parent)
+        self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        frame = ttk.Frame(self.window, padding="20", relief="raised")
+        frame.pack(fill='both', expand=True)
+
+        ttk.Label(frame, text=message, font=('Helvetica', 10)).pack(pady=(0, 10))
+
+        self.progress = ttk.Progressbar(frame, mode='indeterminate', length=300, maximum=100)
+        self.progress.pack(fill='x', pady=5)
+        self.progress.start(10)
+
+        self.status_var = StringVar(value="Starting...")
+        ttk.Label(frame, textvariable=self.status_var, font=('Helvetica', 9)).pack(pady=5)
+
+        self.cancel_button = ttk.Button(frame, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=(5, 0))
+
+        # Center over the parent window
+        self.window.update_idletasks()
+        x = parent.winfo_rootx() + (parent.winfo_width() - self.window.winfo_width()) // 2
+        y = parent.winfo_rooty() + (parent.winfo_height() - self.window.winfo_height()) // 2
+        self.window.geometry(f"+{max(x, 0)}+{max(y, 0)}")
+
+        # Keep the rest of the window inactive (but responsive) while loading
+        self.window.grab_set()
+
+    def set_progress(self, message, fraction=None):
+        """Show a status line; fraction None keeps the bar indeterminate"""
+        if self.window is None:
+            return
+        self.status_var.set(message)
+        if fraction is None:
+            if str(self.progress["mode"]) != "indeterminate":
+                self.progress.configure(mode='indeterminate')
+                self.progress.start(10)
+        else:
+            if str(self.progress["mode"]) != "determinate":
+                self.progress.stop()
+                self.progress.configure(mode='determinate')
+            self.progress["value"] = fraction * 100
+
+    def cancel(self):
+        self.status_var.set("Cancelling...")
+        self.cancel_button.state(['disabled'])
+        if self.on_cancel:
+            self.on_cancel()
+
+    def close(self):
+        if self.window is None:
+            return
+        self.progress.stop()
+        self.window.grab_release()
+        self.window.destroy()
+        self.window = None
+
+class CanvasResizeDebouncer:
+    """
+    Coalesces the <Configure> events of a FigureCanvasTkAgg.
+
+    Matplotlib re-renders the figure for every size the canvas passes through
+    while a window is dragged. Instead, the last rendered frame is shown
+    scaled to fit in the meantime, and the figure is resized and redrawn once
+    SETTLE_MS after the last event.
+    """
+    SETTLE_MS = 150
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.widget = canvas.get_tk_widget()
+        self.pending = None
+        self.last_event = None
+        self.snapshot = None
+        self.preview_image = None
+        self.preview_items = []
+        # Replaces matplotlib's own handler, which redraws at every new size
+        self.widget.bind("<Configure>", self.on_configure)
+
+    def rendered_size(self):
+        bbox = self.canvas.figure.bbox
+        return int(bbox.width), int(bbox.height)
+
+    def on_configure(self, event):
+        if self.pending is None and (event.width, event.height) == self.rendered_size():
+            return  # Moved or re-laid out without changing size
+
+        self.last_event = event
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+        self.pending = self.widget.after(self.SETTLE_MS, self.settle)
+        self.show_preview(event.width, event.height)
+
+    def show_preview(self, width, height):
+        """Show the last rendered frame scaled to fit width x height"""
+        try:
+            from PIL import Image, ImageTk
+
+            if self.snapshot is None:
+                frame_width, frame_height = self.canvas.get_width_height(physical=True)
+                self.snapshot = Image.frombuffer("RGBA", (frame_width, frame_height),
+                                                 self.canvas.buffer_rgba(), "raw", "RGBA", 0, 1).convert("RGB")
+            scale = min(width / self.snapshot.width, height / self.snapshot.height)
+            size = (max(1, int(self.snapshot.width * scale)), max(1, int(self.snapshot.height * scale)))
+            self.preview_image = ImageTk.PhotoImage(self.snapshot.resize(size, Image.BILINEAR),
+                                                    master=self.widget)
+        except Exception:
+            return  # Keep showing the unscaled frame
+
+        self.clear_preview()
+        self.preview_items = [
+            self.widget.create_rectangle(0, 0, width, height, fill="white", outline=""),
+            self.widget.create_image(width // 2, height // 2, image=self.preview_image),
+        ]
+
+    def clear_preview(self):
+        for item in self.preview_items:
+            self.widget.delete(item)
+        self.preview_items = []
+
+    def settle(self):
+        """Resize the figure to the final canvas size and redraw it once"""
+        self.pending = None
+        self.snapshot = None
+        try:
+            self.clear_preview()
+            self.preview_image = None
+            self.canvas.resize(self.last_event)
+        except tk.TclError:
+            pass  # Canvas destroyed while the resize was pending
+
 class SelectionScreen:
     def __init__(self, parent, main_app, from_analysis=False):
         self.root = tk.Toplevel(parent)
@@ -304,8 +586,35 @@ class SelectionScreen:
             foreground='gray'
         )
         copyright_label.pack(side='right')
+        
+        # Shows what is still loading in the background at startup
+        loading_label = ttk.Label(
+            footer_frame,
+            textvariable=main_app.loading_status,
+            font=('Helvetica', 8),
+            foreground='gray'
+        )
+        loading_label.pack(side='left')
     
     def start_single_year_analysis(self):
+        self.open_when_ready(self.open_single_year_analysis)
+    
+    def start_dual_year_analysis(self):
+        self.open_when_ready(self.open_dual_year_analysis)
+    
+    def open_when_ready(self, open_analysis):
+        """Open an analysis window now, or once the startup imports have finished"""
+        if not self.main_app.ready:
+            self.root.config(cursor="watch")
+        
+        def open_if_still_shown():
+            # Ignore repeated clicks queued while loading
+            if self.root.winfo_exists():
+                open_analysis()
+        
+        self.main_app.when_ready(open_if_still_shown)
+    
+    def open_single_year_analysis(self):
         # Store current position and state
         x = self.root.winfo_x()
         y = self.root.winfo_y()
@@ -319,7 +628,7 @@ class SelectionScreen:
         if current_state == 'zoomed':
             analysis.root.state('zoomed')
     
-    def start_dual_year_analysis(self):
+    def open_dual_year_analysis(self):
         # Store current position and state
         x = self.root.winfo_x()
         y = self.root.winfo_y()
@@ -354,8 +663,14 @@ class MainApplication:
         if os.path.exists(icon_path):
             self.root.iconbitmap(icon_path)
         
+        # Startup phase durations and milestones (time since launch), logged as they complete
+        self.startup_phases = []
+        self.startup_milestones = []
+        
         # Get screen information
+        start = time.perf_counter()
         self.primary_width, self.primary_height, self.all_screens_width, self.all_screens_height = get_screen_geometry()
+        self.record_phase("get_screen_geometry", start)
         
         # Allow the window to be moved to any screen
         self.root.attributes('-alpha', 1.0)  # Ensure window is visible
@@ -366,65 +681,196 @@ class MainApplication:
         
         # Initialize variables
         self.gdf = None
+        self.state_outline = None
         self.pd = None
         self.gpd = None
         self.plt = None
         self.FigureCanvasTkAgg = None
+        self.figure_manager = None
+        self.map_engine = None
+        
+        self.geometry_timings = {}
+        self.ready = False
+        self.ready_callbacks = []
+        self.loading_status = StringVar(self.root)
+        self.record_milestone("tk window")
         
         # Show splash screen
+        start = time.perf_counter()
         self.splash = SplashScreen(self.root)
-        
-        # Start loading sequence
-        self.root.after(100, self.load_step_1)
+        self.splash.root.update()
+        self.record_phase("splash screen", start)
+        self.record_milestone("splash shown")
+        
+        # Import the heavy modules and load the shapefile on a worker thread
+        # while the selection screen is already usable
+        BackgroundTask(
+            self.root,
+            self.load_dependencies,
+            on_progress=lambda message, fraction: self.loading_status.set(message),
+            on_success=self.on_dependencies_loaded,
+            on_error=lambda e: self.show_error(str(e))
+        ).start()
+        self.root.after_idle(self.show_selection_screen)
         
         # Start the event loop
         self.root.mainloop()
     
-    def load_step_1(self):
-        """Load pandas"""
+    def record_phase(self, name, start):
+        """Log how long a startup phase took since start (a perf_counter value)"""
+        seconds = time.perf_counter() - start
+        self.startup_phases.append((name, seconds))
+        print(f"⏱ {name}: {seconds:.2f}s")
+    
+    def record_milestone(self, name):
+        """Log the time from launch until name was reached"""
+        seconds = time.perf_counter() - STARTUP_START
+        self.startup_milestones.append((name, seconds))
+        print(f"⏱ {name} after {seconds:.2f}s")
+    
+    def load_dependencies(self, progress, cancel):
+        """Run the load steps; called on a worker thread, so none of them touch Tk"""
+        for step in (self.load_step_1, self.load_step_2, self.load_step_3, self.load_step_4):
+            step(progress)
+    
+    def load_step_1(self, progress):
+        """Load pandas and the map engine"""
         try:
-            self.splash.update_status("From Billings to Bozeman...")
+            progress("From Billings to Bozeman...", None)
+            start = time.perf_counter()
             import pandas as pd
             self.pd = pd
-            self.root.after(100, self.load_step_2)
+            self.record_phase("import pandas", start)
+            
+            start = time.perf_counter()
+            import map_engine
+            self.map_engine = map_engine
+            self.record_phase("import map_engine", start)
         except Exception as e:
-            self.show_error(f"Error loading pandas: {str(e)}")
+            raise Exception(f"Error loading pandas: {str(e)}")
     
-    def load_step_2(self):
+    def load_step_2(self, progress):
         """Load geopandas"""
         try:
-            self.splash.update_status("Spanning the Big Sky Country...")
+            progress("Spanning the Big Sky Country...", None)
+            
+            # Import geopandas' heavy dependencies first so each is timed on its own
+            start = time.perf_counter()
+            import shapely  # noqa: F401
+            self.record_phase("import shapely", start)
+            
+            start = time.perf_counter()
+            import pyproj  # noqa: F401
+            self.record_phase("import pyproj", start)
+            
+            start = time.perf_counter()
             import geopandas as gpd
             self.gpd = gpd
-            self.root.after(100, self.load_step_3)
+            self.record_phase("import geopandas", start)
         except Exception as e:
-            self.show_error(f"Error loading geopandas: {str(e)}")
+            raise Exception(f"Error loading geopandas: {str(e)}")
     
-    def load_step_3(self):
+    def load_step_3(self, progress):
         """Load matplotlib"""
         try:
-            self.splash.update_status("Mapping Montana's vast landscapes...")
+            progress("Mapping Montana's vast landscapes...", None)
+            start = time.perf_counter()
             import matplotlib.pyplot as plt
             from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
             self.plt = plt
             self.FigureCanvasTkAgg = FigureCanvasTkAgg
-            self.root.after(100, self.load_step_4)
+            self.figure_manager = FigureManager(plt, self.map_engine)
+            self.record_phase("import matplotlib", start)
         except Exception as e:
-            self.show_error(f"Error loading matplotlib: {str(e)}")
+            raise Exception(f"Error loading matplotlib: {str(e)}")
     
-    def load_step_4(self):
+    def load_step_4(self, progress):
         """Load shapefile"""
         try:
-            self.splash.update_status("Connecting all 56 counties...")
+            progress("Connecting all 56 counties...", None)
+            start = time.perf_counter()
             self.load_shapefile()
-            self.root.after(100, self.show_selection_screen)
+            self.record_phase("load shapefile", start)
         except Exception as e:
-            self.show_error(f"Error loading shapefile: {str(e)}")
+            raise Exception(f"Error loading shapefile: {str(e)}")
+    
+    def on_dependencies_loaded(self, result):
+        """Mark the application ready and open any analysis requested meanwhile"""
+        self.ready = True
+        self.loading_status.set("")
+        self.record_milestone("ready")
+        if PROFILE_STARTUP is not None:
+            self.write_startup_profile(PROFILE_STARTUP)
+        
+        callbacks, self.ready_callbacks = self.ready_callbacks, []
+        for callback in callbacks:
+            callback()
+    
+    def when_ready(self, callback):
+        """Call callback now if loading has finished, otherwise once it has"""
+        if self.ready:
+            callback()
+        else:
+            self.ready_callbacks.append(callback)
     
     def show_selection_screen(self):
         """Show the selection screen after splash"""
         self.splash.destroy()
         SelectionScreen(self.root, self)
+        self.record_milestone("selection screen shown")
+    
+    def write_startup_profile(self, path=""):
+        """Write the startup phase and import times as JSON and print a summary"""
+        import json
+        import platform
+        
+        # Time an uncached shapefile read for comparison with the geometry cache
+        start = time.perf_counter()
+        self.gpd.read_file(self.shapefile_path)
+        shapefile_read_seconds = time.perf_counter() - start
+        
+        phases = dict(self.startup_phases)
+        report = {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "frozen": bool(getattr(sys, 'frozen', False)),
+            # Wall-clock time this module started running; launchers subtract their own
+            # start time to measure one-file extraction and interpreter start-up
+            "startup_epoch": time.time() - (time.perf_counter() - STARTUP_START),
+            "versions": {
+                name: getattr(sys.modules.get(name), "__version__", None)
+                for name in ("pandas", "geopandas", "pyproj", "shapely", "matplotlib")
+            },
+            "milestones": dict(self.startup_milestones),
+            "phases": phases,
+            "imports": {name[len("import "):]: seconds for name, seconds in self.startup_phases
+                        if name.startswith("import ")},
+            "shapefile": {
+                "geometry_cache_hit": self.geometry_timings.get("cache_hit"),
+                "load_seconds": self.geometry_timings.get("load_seconds"),
+                "uncached_read_seconds": shapefile_read_seconds,
+            },
+        }
+        
+        if not path:
+            path = str(self.map_engine.get_cache_dir() / "startup_profile.json")
+        try:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+        except OSError as e:
+            print(f"Warning: Could not write startup profile: {str(e)}")
+            path = None
+        
+        print("Startup profile:")
+        for name, seconds in self.startup_milestones:
+            print(f"  {name:<28}{seconds:7.2f}s after launch")
+        for name, seconds in sorted(phases.items(), key=lambda item: -item[1]):
+            print(f"  {name:<28}{seconds:7.2f}s")
+        cache_state = "hit" if self.geometry_timings.get("cache_hit") else "miss"
+        print(f"  {'uncached shapefile read':<28}{shapefile_read_seconds:7.2f}s (geometry cache {cache_state})")
+        if path:
+            print(f"Startup profile written to {path}")
     
     def show_error(self, message):
         """Show error message and exit"""
@@ -450,141 +896,185 @@ class MainApplication:
                     "Please ensure the MontanaCounties_shp folder is in the correct location."
                 )
                 
-            self.gdf = self.gpd.read_file(shapefile_path)
-            self.gdf.columns = self.gdf.columns.str.strip()
-            self.gdf["County"] = self.gdf["NAME"].str.strip().str.lower()
-            self.gdf["Color"] = "white"
+            # Simplified county geometry and state outline, cached after the first launch
+            self.shapefile_path = shapefile_path
+            self.gdf, self.state_outline = self.map_engine.load_county_geometry(
+                shapefile_path, timings=self.geometry_timings)
+            self.gdf = self.map_engine.prepare_counties(self.gdf)
             
         except Exception as e:
             raise Exception(f"Error loading shapefile:\n{str(e)}\n\nPlease ensure the shapefile is not corrupted and try again.")
-    
-    def load_excel(self):
-        path = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx")])
-        if not path:
-            return
+
+class AnalysisWindow:
+    """
+    Window shared by the Single and Dual Year analyses.
+
+    File loading, taxon dropdowns, color validation, map rendering and the
+    exports live here and go through map_engine. Subclasses only provide
+    their split year inputs: init_period_variables(), reset_period_fields(),
+    period_color_fields(), split_years_and_colors() and initialize_gui().
+    """
+    ANALYSIS_NAME = ""
+    TITLE_PAD = 25
+    TITLE_WRAP = True
+
+    def __init__(self, parent, main_app):
+        self.root = tk.Toplevel(parent)
+        self.root.title(f"{self.ANALYSIS_NAME} - Montana County Distribution Map Generator")
         
-        # Show loading dialog
-        loading_window = tk.Tk()
-        loading_window.title("Loading")
-        screen_width = loading_window.winfo_screenwidth()
-        screen_height = loading_window.winfo_screenheight()
-        window_width = 300
-        window_height = 100
-        x = (screen_width - window_width) // 2
-        y = (screen_height - window_height) // 2
-        loading_window.geometry(f"{window_width}x{window_height}+{x}+{y}")
-        loading_window.overrideredirect(True)
-        
-        frame = ttk.Frame(loading_window, padding="20", relief="raised")
-        frame.pack(fill='both', expand=True)
+        # Allow the window to be moved to any screen
+        self.root.attributes('-alpha', 1.0)
+        self.root.attributes('-topmost', False)
+        
+        # Store main_app reference
+        self.main_app = main_app
+        
+        # Get dependencies from main_app
+        self.pd = main_app.pd
+        self.plt = main_app.plt
+        self.FigureCanvasTkAgg = main_app.FigureCanvasTkAgg
+        self.figure_manager = main_app.figure_manager
+        self.map_engine = main_app.map_engine
+        
+        # Set window icon
+        if getattr(sys, 'frozen', False):
+            base_dir = sys._MEIPASS
+        else:
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+        icon_path = os.path.join(base_dir, "app_icon.ico")
+        if os.path.exists(icon_path):
+            self.root.iconbitmap(icon_path)
+        
+        # Get screen dimensions
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
         
-        loading_label = ttk.Label(frame, text="Loading file...\nPlease wait", font=('Helvetica', 10))
-        loading_label.pack(pady=10)
+        # Set initial size but don't maximize yet - that will be done by the calling method
+        self.root.geometry(f"{screen_width}x{screen_height}")
+        
+        # Ensure window can be moved and resized
+        self.root.resizable(True, True)
+        self.root.minsize(800, 600)
+        
+        # Initialize variables
+        self.map_canvas = None
+        self.map_view = None
+        self.current_fig = None
+        self.map_spec = None
+        
+        # Initialize StringVar variables
+        self.selected_family = StringVar(self.root)
+        self.selected_genus = StringVar(self.root)
+        self.selected_species = StringVar(self.root)
+        self.selected_file_var = StringVar(self.root)
+        self.export_format_var = StringVar(self.root)
+        self.map_mode_var = StringVar(self.root)
+        self.debug_var = StringVar(self.root)
+        
+        # Split years and period colors of this analysis
+        self.init_period_variables()
+        
+        # Set default values
+        self.selected_file_var.set("No file selected")
+        self.export_format_var.set("tiff")  # Default to tiff
+        self.map_mode_var.set(self.map_engine.MAP_MODES[self.map_engine.PERIODS_MODE])
+        
+        # Create toast notification instance
+        self.toast = ToastNotification(self.root)
+        
+        # Initialize pandas DataFrame and its taxonomy index
+        self.df = self.pd.DataFrame()
+        self.taxonomy = None
+        self.summary = None
+        
+        # Get the shapefile data from parent
+        self.gdf = main_app.gdf.copy()
+        
+        # Initialize GUI
+        self.initialize_gui()
         
-        progress = ttk.Progressbar(frame, mode='indeterminate')
-        progress.pack(fill='x', pady=5)
-        progress.start(10)
+        # Bind window state change
+        self.root.bind("<Configure>", self.on_window_resize)
+
+    def load_excel(self):
+        path = filedialog.askopenfilename(filetypes=self.map_engine.INPUT_FILETYPES)
+        if not path:
+            return
         
-        loading_window.update()
+        # Parse and normalize on a worker thread so the window stays responsive;
+        # the dialog shows row progress and can cancel the load
+        valid_counties = set(self.gdf["county_key"])
+        timings = {}
+        self.loading_dialog = LoadingDialog(self.root, "Loading file...\nPlease wait",
+                                            on_cancel=lambda: self.load_task.cancel())
+        self.load_task = BackgroundTask(
+            self.root,
+            lambda progress, cancel: self.load_record_file(path, valid_counties, timings, progress, cancel),
+            on_progress=self.loading_dialog.set_progress,
+            on_success=lambda result: self.on_excel_loaded(path, *result, timings),
+            on_error=self.on_excel_load_failed
+        )
+        self.load_task.start()
+
+    def load_record_file(self, path, valid_counties, timings, progress, cancel):
+        """
+        Load a record file and build its taxonomy index and county summary.
+
+        Runs on the load worker thread, so the Tk thread only swaps in the
+        results. Returns (records, taxonomy, summary).
+        """
+        records = self.map_engine.load_records(path, valid_counties, timings, progress=progress, cancel=cancel)
+        progress("Indexing records...", None)
+        taxonomy = self.map_engine.TaxonomyIndex(records)
+        summary = self.map_engine.TaxonCountySummary(records)
+        return records, taxonomy, summary
+    
+    def on_excel_loaded(self, path, montana_records, taxonomy, summary, timings):
+        self.loading_dialog.close()
         
         try:
-            # Load the Excel file
-            self.df = self.pd.read_excel(path, sheet_name=0)
-            
-            # # Print all column names immediately after loading
-            # print("\nAvailable columns in Excel file:")
-            # print("--------------------------------")
-            # for i, col in enumerate(self.df.columns, 1):
-            #     print(f"{i}. {col}")
-            # print("--------------------------------\n")
-            
-            # Now continue with column processing
-            self.df.columns = self.df.columns.str.strip()
-            
             # Get just the filename from the path
             filename = path.split('/')[-1]
             
-            # Validate required columns
-            required_columns = ["county", "family", "genus", "species", "year"]
-            missing_columns = [col for col in required_columns if col not in self.df.columns]
-            
-            if missing_columns:
-                progress.stop()
-                loading_window.destroy()
-                self.selected_file_var.set("No file selected")
-                messagebox.showerror("Error", 
-                    f"Missing required columns: {', '.join(missing_columns)}\n\n"
-                    "The following columns are required:\n"
-                    "- county: for mapping locations\n"
-                    "- family: for taxonomic classification\n"
-                    "- genus: for taxonomic classification\n"
-                    "- species: for taxonomic classification\n"
-                    "- year: for temporal analysis\n\n"
-                    "Please check your Excel file and try again."
-                )
-                return
-            
-            # Process the data
-            # First standardize county names
-            self.df["county"] = self.standardize_county_names(self.df["county"])
-            
-            # Process other columns
-            for col in ["family", "genus", "species"]:
-                self.df[col] = self.df[col].astype(str).str.strip().str.lower()
-            self.df["year"] = self.df["year"].astype(str).str.extract(r'(\d{4})').astype(float)
-            
-            # Get valid Montana counties from shapefile
-            valid_counties = set(self.standardize_county_names(self.gdf["County"]))
-            
-            # Filter DataFrame to only include valid Montana counties
-            montana_records = self.df[self.df["county"].isin(valid_counties)]
-            
-            if len(montana_records) == 0:
-                progress.stop()
-                loading_window.destroy()
-                self.selected_file_var.set("No file selected")
-                messagebox.showerror("Error", 
-                    "No valid Montana county records found in the Excel file.\n\n"
-                    "Please check that your data contains Montana county records."
-                )
-                return
-            
-            # Replace the main DataFrame with only Montana records
+            # Replace the main DataFrame with only Montana records, stored as
+            # categoricals and Int16 years, with a prebuilt taxonomy index for the dropdowns
+            # and a per-taxon, per-county year summary for coloring
             self.df = montana_records
+            self.taxonomy = taxonomy
+            self.summary = summary
             
             # Calculate statistics using Montana records
-            num_records = len(montana_records)
-            num_families = len(montana_records["family"].unique())
-            num_genera = len(montana_records["genus"].unique())
-            num_species = len(montana_records["species"].unique())
-            year_range = f"{int(montana_records['year'].min())} - {int(montana_records['year'].max())}"
-            num_counties = len(montana_records["county"].unique())
-            
-            # Get valid families (non-empty/non-null values)
-            valid_families = sorted(montana_records["family"].dropna().unique())
-            valid_families = [f for f in valid_families if str(f).strip() and str(f).lower() != 'nan']  # Remove empty strings and 'nan'
+            summary = self.map_engine.record_summary(montana_records)
+            num_records = summary["records"]
+            num_families = summary["families"]
+            num_genera = summary["genera"]
+            num_species = summary["species"]
+            year_range = summary["year_range"]
+            num_counties = summary["counties"]
             
             # Capitalize family names
-            family_values = ["All"] + [f.title() for f in valid_families]
+            family_values = ["All"] + [f.title() for f in self.taxonomy.families]
             
             # Update Family dropdown
             self.family_dropdown["values"] = family_values
-            self.family_dropdown.set("Select Family")
+            self.family_dropdown.set("All")
             
-            # Reset other dropdowns and fields
-            self.genus_dropdown.set("Select Genus")
-            self.genus_dropdown["values"] = []
-            self.species_dropdown.set("Select Species")
-            self.species_dropdown["values"] = []
-            self.year_var.set("")
+            # Trigger genus dropdown update
+            self.update_genus_dropdown()
+            
+            # Set genus to "All" and trigger species update
+            self.genus_dropdown.set("All")
+            self.update_species_dropdown()
+            
+            # Set species to "all"
+            self.species_dropdown.set("all")
+            
+            # Reset the split year fields
+            self.reset_period_fields()
             
             # Update file info display
             self.selected_file_var.set(f"✓ {filename}\n{num_records:,} Montana records loaded")
             
-            # Stop progress bar and close loading window
-            progress.stop()
-            loading_window.destroy()
-            
             # Show success message with detailed statistics
             messagebox.showinfo("Success", 
                 f"File loaded successfully!\n\n"
@@ -594,26 +1084,56 @@ class MainApplication:
                 f"• Unique Genera: {num_genera}\n"
                 f"• Unique Species: {num_species}\n"
                 f"• Counties Covered: {num_counties}\n"
-                f"• Year Range: {year_range}\n\n"
+                f"• Year Range: {year_range}\n"
+                f"• Memory: {summary['memory_mb']:.1f} MB\n"
+                f"• Parse Time: {timings['parse_seconds']:.1f}s ({timings['engine']})\n\n"
                 "Please select a Family to continue."
             )
             
-            print("✅ Excel file loaded successfully!")
+            print(f"✅ Excel file loaded successfully! Parsed in {timings['parse_seconds']:.2f}s "
+                  f"with {timings['engine']}, normalized in {timings['normalize_seconds']:.2f}s, "
+                  f"{summary['memory_mb']:.1f} MB in memory")
             
         except Exception as e:
-            progress.stop()
-            loading_window.destroy()
-            self.selected_file_var.set("No file selected")
-            error_message = str(e)
-            if "No sheet named" in error_message:
-                error_message = "Invalid Excel file format. Please ensure your data is in the first sheet."
-            elif "Invalid file" in error_message:
-                error_message = "Invalid file format. Please ensure you're uploading a valid Excel (.xlsx) file."
-            
+            self.on_excel_load_failed(e)
+    
+    def on_excel_load_failed(self, error):
+        self.loading_dialog.close()
+        
+        if isinstance(error, self.map_engine.LoadCancelled):
+            print("Excel file loading cancelled")
+            return
+        
+        self.selected_file_var.set("No file selected")
+        if isinstance(error, self.map_engine.MissingColumnsError):
+            messagebox.showerror("Error", 
+                f"Missing required columns: {', '.join(error.missing)}\n\n"
+                "The following columns are required:\n"
+                "- county: for mapping locations\n"
+                "- family: for taxonomic classification\n"
+                "- genus: for taxonomic classification\n"
+                "- species: for taxonomic classification\n"
+                "- year: for temporal analysis\n\n"
+                "Please check your Excel file and try again."
+            )
+            return
+        if isinstance(error, self.map_engine.NoMontanaRecordsError):
             messagebox.showerror("Error", 
-                f"Error loading file:\n{error_message}\n\n"
-                "Please check your Excel file format and try again."
+                "No valid Montana county records found in the Excel file.\n\n"
+                "Please check that your data contains Montana county records."
             )
+            return
+        
+        error_message = str(error)
+        if "No sheet named" in error_message:
+            error_message = "Invalid Excel file format. Please ensure your data is in the first sheet."
+        elif "Invalid file" in error_message:
+            error_message = "Invalid file format. Please ensure you're uploading a valid Excel (.xlsx) file."
+        
+        messagebox.showerror("Error", 
+            f"Error loading file:\n{error_message}\n\n"
+            "Please check your Excel file format and try again."
+        )
     
     def update_genus_dropdown(self, event=None):
         family = self.selected_family.get().strip()
@@ -623,17 +1143,8 @@ class MainApplication:
             self.genus_dropdown.set("Select Genus")
             return
         
-        # Filter based on family selection
-        if family == "All":
-            # Get all non-empty genus values
-            filtered = self.df[self.df["genus"].notna() & (self.df["genus"].str.strip() != "")]
-        else:
-            # Get genus for specific family (case-insensitive)
-            filtered = self.df[self.df["family"].str.lower() == family.lower()]
-        
-        # Get valid genera (non-empty/non-null values)
-        valid_genera = sorted(filtered["genus"].dropna().unique())
-        valid_genera = [g for g in valid_genera if str(g).strip() and str(g).lower() != 'nan']  # Remove empty strings and 'nan'
+        # Look up genera in the prebuilt taxonomy index ("All" covers every family)
+        valid_genera = self.taxonomy.genera(family) if self.taxonomy else []
         
         # Create genus list with special options
         genus_values = ["All"] + [g.title() for g in valid_genera]
@@ -655,24 +1166,8 @@ class MainApplication:
             self.species_dropdown.set("Select Species")
             return
         
-        # Start with base DataFrame
-        filtered = self.df
-        
-        # Apply family filter
-        if family == "All":
-            filtered = filtered[filtered["family"].notna() & (filtered["family"].str.strip() != "")]
-        else:
-            filtered = filtered[filtered["family"].str.lower() == family.lower()]
-        
-        # Apply genus filter
-        if genus == "All":
-            filtered = filtered[filtered["genus"].notna() & (filtered["genus"].str.strip() != "")]
-        else:
-            filtered = filtered[filtered["genus"].str.lower() == genus.lower()]
-        
-        # Get valid species (non-empty/non-null values)
-        valid_species = sorted(filtered["species"].dropna().unique())
-        valid_species = [s for s in valid_species if str(s).strip() and str(s).lower() != 'nan']  # Remove empty strings and 'nan'
+        # Look up species in the prebuilt taxonomy index
+        valid_species = self.taxonomy.species(family, genus) if self.taxonomy else []
         
         # Create species list with special options - note lowercase for species
         species_values = ["all"] + valid_species
@@ -680,7 +1175,7 @@ class MainApplication:
         # Update Species dropdown
         self.species_dropdown["values"] = species_values
         self.species_dropdown.set("Select Species")
-    
+
     def is_valid_color(self, color):
         """Validate if a color string is a valid matplotlib color"""
         try:
@@ -692,11 +1187,7 @@ class MainApplication:
 
     def validate_colors(self):
         """Validate all selected colors"""
-        colors = {
-            'Pre-Year': self.pre_color.get(),
-            'Post-Year': self.post_color.get(),
-            'All Records': self.all_color.get()
-        }
+        colors = self.period_color_fields()
         
         invalid_colors = []
         for name, color in colors.items():
@@ -713,91 +1204,93 @@ class MainApplication:
         """Validate colors when they change"""
         self.validate_colors()
 
-    def generate_map(self):
-        if self.map_canvas:
-            self.map_canvas.get_tk_widget().destroy()
+    def title_fontsize(self):
+        """Title font size of the on-screen map"""
+        return 15
+
+    def add_map_mode_selector(self, parent):
+        """Map Mode section: record periods or one of the choropleth modes"""
+        mode_frame = ttk.LabelFrame(parent, text="Map Mode", padding="10")
+        mode_frame.pack(fill='x', pady=(0, 20))
+        
+        mode_dropdown = ttk.Combobox(
+            mode_frame, 
+            textvariable=self.map_mode_var, 
+            values=list(self.map_engine.MAP_MODES.values()),
+            state="readonly"
+        )
+        mode_dropdown.pack(fill='x')
+        mode_dropdown.bind('<<ComboboxSelected>>', self.on_map_mode_change)
         
-        # Validate colors first
+        ttk.Label(
+            mode_frame, 
+            text="Choropleth modes ignore the years and colors above.",
+            style='TLabel',
+            wraplength=250
+        ).pack(fill='x', pady=(5, 0))
+
+    def selected_map_mode(self):
+        """Map mode key of the Map Mode dropdown"""
+        label = self.map_mode_var.get()
+        for mode, mode_label in self.map_engine.MAP_MODES.items():
+            if mode_label == label:
+                return mode
+        return self.map_engine.PERIODS_MODE
+
+    def on_map_mode_change(self, event=None):
+        """Redraw the map on screen in the new mode; only the fills, title and legend change"""
+        if self.map_spec is not None and self.map_view is not None:
+            self.generate_map()
+
+    def mode_split_years_and_colors(self, mode):
+        """
+        Validated split years and period colors for a period map; choropleth
+        modes use neither. Returns None after reporting invalid input.
+        """
+        if mode != self.map_engine.PERIODS_MODE:
+            return [], None
         if not self.validate_colors():
+            return None
+        return self.split_years_and_colors()
+
+    def generate_map(self):
+        # Split years and their period colors, highest priority first
+        mode = self.selected_map_mode()
+        periods = self.mode_split_years_and_colors(mode)
+        if periods is None:
             self.download_button.config(state="disabled")
             return
-        
-        gdf_copy = self.gdf.copy()
-        # Initialize all counties as white
-        gdf_copy["Color"] = "white"
+        split_years, period_colors = periods
         
         fam = self.selected_family.get().strip()
         gen = self.selected_genus.get().strip()
         spec = self.selected_species.get().strip()
-        year = self.year_var.get().strip()
         
         if not fam or fam == "Select Family" or not gen or gen == "Select Genus" or not spec or spec == "Select Species":
             messagebox.showerror("Missing Input", "Please select Family, Genus, and Species.")
             self.download_button.config(state="disabled")
             return
         
-        # Start with base DataFrame
-        filtered = self.df
-        
-        # Apply family filter
-        if fam == "All":
-            filtered = filtered[filtered["family"].notna() & (filtered["family"].str.strip() != "")]
-        elif fam == "Not Specified":
-            filtered = filtered[filtered["family"].isna() | (filtered["family"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["family"].str.lower() == fam.lower()]
-        
-        # Apply genus filter
-        if gen == "All":
-            filtered = filtered[filtered["genus"].notna() & (filtered["genus"].str.strip() != "")]
-        elif gen == "Not Specified":
-            filtered = filtered[filtered["genus"].isna() | (filtered["genus"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["genus"].str.lower() == gen.lower()]
+        map_spec = self.map_engine.MapSpec(fam, gen, spec, split_years, period_colors, mode=mode)
         
-        # Apply species filter
-        if spec == "all":
-            filtered = filtered[filtered["species"].notna() & (filtered["species"].str.strip() != "")]
-        elif spec == "not specified":
-            filtered = filtered[filtered["species"].isna() | (filtered["species"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["species"].str.lower() == spec.lower()]
-        
-        # Create a set of valid county names from the shapefile for quick lookup
-        valid_counties = set(self.standardize_county_names(gdf_copy["County"]))
-        
-        # Track unmatched counties to report to user
-        unmatched_counties = set()
-        
-        if isinstance(year, str) and year.isdigit():
-            year = int(year)
-            # First pass: Mark counties with post-dividing year records with post_color (only if they're white)
-            for county in filtered[filtered["year"] > year]["county"].unique():
-                county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-                if county_lower in valid_counties:
-                    mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                    if gdf_copy.loc[mask, "Color"].iloc[0] == "white":
-                        gdf_copy.loc[mask, "Color"] = self.post_color.get()
-                else:
-                    unmatched_counties.add(county)
+        # Build the map view once per window; later renders only recolor it
+        if self.map_view is None:
+            fig = self.figure_manager.create(figsize=(12, 11), on_release=self.on_figure_released)
+            self.map_view = self.map_engine.MapFigure(fig, self.gdf, title_pad=self.TITLE_PAD, title_wrap=self.TITLE_WRAP)
+            self.map_canvas = self.FigureCanvasTkAgg(fig, master=self.right_panel)
+            self.figure_manager.attach_canvas(fig, self.map_canvas)
+            self.map_canvas.get_tk_widget().pack(fill='both', expand=True)
             
-            # Second pass: Mark counties with pre-dividing year records with pre_color (overriding any color)
-            for county in filtered[filtered["year"] <= year]["county"].unique():
-                county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-                if county_lower in valid_counties:
-                    mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                    gdf_copy.loc[mask, "Color"] = self.pre_color.get()
-                else:
-                    unmatched_counties.add(county)
-        else:
-            # If no year specified, mark all counties with records using all_color
-            for county in filtered["county"].unique():
-                county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-                if county_lower in valid_counties:
-                    mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                    gdf_copy.loc[mask, "Color"] = self.all_color.get()
-                else:
-                    unmatched_counties.add(county)
+            # Keep the county outlines as cached bitmaps; renders only blit the fills
+            self.map_view.enable_blitting(self.map_canvas)
+            
+            # Redraw once after a window resize settles, not for every intermediate size
+            self.resize_debouncer = CanvasResizeDebouncer(self.map_canvas)
+        
+        # Color from the per-taxon, per-county summary built at load
+        self.map_view, unmatched_counties = self.map_engine.render(
+            self.gdf, self.summary, map_spec, view=self.map_view, title_fontsize=self.title_fontsize()
+        )
         
         # Report any unmatched counties
         if unmatched_counties:
@@ -807,7 +1300,7 @@ class MainApplication:
                 print(f"• {county}")
             print("\nValid Montana county names:")
             print("--------------------------------")
-            for county in sorted(valid_counties):
+            for county in sorted(set(self.gdf["county_key"])):
                 print(f"• {county}")
             print("-------------------------------------------------------------------------\n")
             
@@ -817,119 +1310,296 @@ class MainApplication:
                 f"Please check the console output for details and ensure county names match exactly."
             )
         
-        # Create figure with calculated size
-        fig = self.plt.figure(figsize=(12, 11))
-        
-        # Create main map axis with sufficient space for title and legend
-        ax = fig.add_axes([0.1, 0.2, 0.8, 0.6])  # Adjusted to leave more space at top
-        gdf_copy.boundary.plot(ax=ax, linewidth=1, edgecolor="black")
-        gdf_copy.plot(ax=ax, color=gdf_copy["Color"], alpha=0.6)
-        
-        # Add title with dynamic font size
-        title = f"{fam.title()} > {gen.title()} > {spec.lower()}"
-        if isinstance(year, int):
-            subtitle = f"\nYear: {year}"
-            title += subtitle
+        self.map_view.redraw()
         
-        # Calculate dynamic font size based on figure width
-        title_fontsize = min(15, max(8, fig.get_figwidth() * 1.5))
-        ax.set_title(title, fontsize=title_fontsize, pad=25, wrap=True)  # Increased padding
-        ax.axis("off")
-        
-        # Create a separate axis for the legend
-        legend_ax = fig.add_axes([0.2, 0.02, 0.6, 0.12])
-        legend_ax.axis('off')
-        
-        # Add a box around the legend
-        legend_box = self.plt.Rectangle((0, 0), 1, 1, 
-                                      facecolor='white', edgecolor='black',
-                                      transform=legend_ax.transAxes)
-        legend_ax.add_patch(legend_box)
-        
-        if isinstance(year, int):
-            # Add horizontal bars with their descriptions for year analysis
-            bar_length = 0.15
-            bar_height = 0.1
+        self.map_spec = map_spec
+        self.current_fig = self.map_view.figure
+        self.download_button.config(state="normal")
+        self.update_debug_panel()
+        print("✅ Map generated successfully!")
+    
+    def on_figure_released(self):
+        """Forget the map view after the figure manager closed its figure"""
+        self.map_view = None
+        self.map_canvas = None
+        self.current_fig = None
+        try:
+            self.download_button.config(state="disabled")
+        except (AttributeError, tk.TclError):
+            pass  # Window already destroyed
+        self.update_debug_panel()
+    
+    def update_debug_panel(self):
+        """Refresh the figure count and memory shown in the debug panel"""
+        if DEBUG_MODE:
+            try:
+                self.debug_var.set(self.figure_manager.describe())
+            except (AttributeError, tk.TclError):
+                pass  # Window already destroyed
+    
+    def download_map(self):
+        """Download the current map in the selected format"""
+        if self.current_fig is None or self.map_spec is None:
+            messagebox.showerror("Error", "No map to download. Please generate a map first.")
+            return
+        
+        # Get export format
+        export_format = self.export_format_var.get()
+        
+        # Name the file after the map on screen, not inputs edited since
+        downloads_path = str(Path.home() / "Downloads")
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+        filename = self.map_spec.filename(export_format, timestamp)
+        file_path = os.path.join(downloads_path, filename)
+        
+        try:
+            # Configure matplotlib fonts for the export format
+            self.map_engine.configure_export_fonts(export_format)
             
-            # Pre-year color
-            legend_ax.add_patch(
-                self.plt.Rectangle((0.2, 0.5), bar_length, bar_height, 
-                                 facecolor=self.pre_color.get(), 
-                                 alpha=0.6,
-                                 edgecolor='black')
-            )
-            legend_ax.text(0.4, 0.55, f"Records ≤ {year}", fontsize=10, va='center')
+            # Save the figure
+            self.map_view.savefig(file_path, format=export_format, bbox_inches='tight', dpi=300)
             
-            # Post-year color
-            legend_ax.add_patch(
-                self.plt.Rectangle((0.2, 0.2), bar_length, bar_height, 
-                                 facecolor=self.post_color.get(), 
-                                 alpha=0.6,
-                                 edgecolor='black')
-            )
-            legend_ax.text(0.4, 0.25, f"Records > {year}", fontsize=10, va='center')
-        else:
-            # Add single bar for all records
-            bar_length = 0.15
-            bar_height = 0.1
-            legend_ax.add_patch(
-                self.plt.Rectangle((0.2, 0.35), bar_length, bar_height, 
-                                 facecolor=self.all_color.get(), 
-                                 alpha=0.6,
-                                 edgecolor='black')
-            )
-            legend_ax.text(0.4, 0.4, "All Records", fontsize=10, va='center')
+            # Show success message
+            self.toast.show_toast(f'Map saved as {filename} in Downloads!')
+            print(f"✅ Map saved as {export_format} file: {file_path}")
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Error saving map:\n{str(e)}\n\nPlease try again.")
+    
+    def download_grid(self):
+        """Download one image with a small map for every species of the selected genus"""
+        if self.taxonomy is None:
+            messagebox.showerror("Error", "Please load an Excel file first.")
+            return
+        
+        mode = self.selected_map_mode()
+        periods = self.mode_split_years_and_colors(mode)
+        if periods is None:
+            return
+        split_years, period_colors = periods
+        
+        fam = self.selected_family.get().strip()
+        gen = self.selected_genus.get().strip()
         
-        # Set the legend axis limits
-        legend_ax.set_xlim(0, 1)
-        legend_ax.set_ylim(0, 1)
+        if not fam or fam == "Select Family" or not gen or gen == "Select Genus":
+            messagebox.showerror("Missing Input", "Please select Family and Genus.")
+            return
         
-        # Adjust main plot to make room for legend
-        fig.subplots_adjust(bottom=0.2, top=0.9)
+        taxa = [(fam, gen, sp) for sp in self.taxonomy.species(fam, gen)]
+        if not taxa:
+            messagebox.showerror("Error", "No species found for the selected Family and Genus.")
+            return
         
-        self.map_canvas = self.FigureCanvasTkAgg(fig, master=self.right_panel)
-        self.map_canvas.draw()
-        self.map_canvas.get_tk_widget().pack(fill='both', expand=True)
+        export_format = self.export_format_var.get()
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+        filename = self.map_engine.map_filename(fam, gen, "species-grid", split_years, export_format, timestamp,
+                                                mode=mode)
+        file_path = os.path.join(str(Path.home() / "Downloads"), filename)
         
-        self.current_fig = fig
-        self.download_button.config(state="normal")
-        print("✅ Map generated successfully!")
+        try:
+            self.map_engine.configure_export_fonts(export_format)
+            
+            # One figure with a small map per species, sharing the county geometry
+            grid, _ = self.map_engine.render_grid(self.gdf, self.summary, taxa, split_years, colors=period_colors,
+                                                  mode=mode)
+            grid.figure.savefig(file_path, format=export_format, bbox_inches='tight', dpi=300)
+            
+            self.toast.show_toast(f'Grid of {len(taxa)} species saved as {filename} in Downloads!')
+            print(f"✅ Species grid saved as {export_format} file: {file_path}")
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Error saving species grid:\n{str(e)}\n\nPlease try again.")
     
-    def download_map(self):
-        if self.current_fig:
-            try:
-                # Get Downloads folder path
-                downloads_path = str(Path.home() / "Downloads")
-                
-                # Get taxonomic info and year
-                fam = self.selected_family.get().strip().title()
-                gen = self.selected_genus.get().strip().title()
-                spec = self.selected_species.get().strip().lower()
-                year = self.year_var.get().strip()
-                
-                # Create timestamp with current date (YYYYMMDD_HHMM)
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
-                
-                # Create filename with taxonomic info
-                year_info = f"_{year}" if year else ""
-                filename = f"{fam}-{gen}-{spec}{year_info}_{timestamp}.tiff"
-                
-                # Full path for the file
-                file_path = os.path.join(downloads_path, filename)
-                
-                # Save the figure
-                self.current_fig.savefig(file_path, format="tiff", dpi=300)
+    def on_window_resize(self, event=None):
+        # <Configure> bound on the window also fires for every child widget
+        if event is not None and event.widget is not self.root:
+            return
+        
+        try:
+            # Get current window dimensions
+            current_width = self.root.winfo_width()
+            current_height = self.root.winfo_height()
+            
+            # Only process if we have valid dimensions
+            if current_width <= 1 or current_height <= 1:
+                return
                 
-                # Show toast notification
-                self.toast.show_toast(f"Map saved as {filename}")
+            # Store current dimensions for restoring from maximize
+            if not hasattr(self, 'last_valid_size'):
+                self.last_valid_size = {
+                    'width': current_width,
+                    'height': current_height,
+                    'x': self.root.winfo_x(),
+                    'y': self.root.winfo_y()
+                }
+            
+            # Update panels if needed
+            self.update_panel_sizes()
                 
-                print(f"✅ TIFF map saved as '{file_path}'")
+        except Exception as e:
+            print(f"Warning: Resize handling error: {str(e)}")  # For debugging
+            pass  # Silently handle any errors during resize
+
+    def update_panel_sizes(self):
+        try:
+            current_width = self.root.winfo_width()
+            
+            # Panel widths only depend on the window width
+            if current_width == getattr(self, 'last_panel_width', None):
+                return
+            self.last_panel_width = current_width
+            
+            # Calculate new left panel width (20% of window width, max 300px)
+            new_left_width = min(300, max(200, int(current_width * 0.2)))
+            
+            # Update left panel container if it exists
+            if hasattr(self, 'left_panel_container'):
+                self.left_panel_container.configure(width=new_left_width)
+            
+            # Update scroll canvas if it exists and has content
+            if hasattr(self, 'scroll_canvas'):
+                try:
+                    # Only update if canvas exists and has content
+                    if self.scroll_canvas.find_all():
+                        self.scroll_canvas.configure(width=new_left_width-20)
+                        self.scroll_canvas.itemconfig(
+                            self.scroll_canvas.find_all()[0],
+                            width=new_left_width-20
+                        )
+                except tk.TclError:
+                    pass  # Handle case where canvas is being destroyed
+            
+            # The map canvas redraws itself once the resize settles (CanvasResizeDebouncer)
                 
-            except Exception as e:
-                messagebox.showerror("Error", 
-                    f"Error saving file:\n{str(e)}\n\n"
-                    "Please try again."
-                )
+        except Exception as e:
+            print(f"Warning: Panel update error: {str(e)}")  # For debugging
+            pass  # Silently handle any errors
+
+    def go_back(self):
+        """Return to the selection screen"""
+        # Store current position and state
+        x = self.root.winfo_x()
+        y = self.root.winfo_y()
+        current_state = self.root.state()
+        
+        # Close this window's figure so it does not outlive the window
+        if self.map_view is not None:
+            self.figure_manager.release(self.map_view.figure)
+        
+        self.root.destroy()
+        selection = SelectionScreen(self.root.master, self.main_app, from_analysis=True)
+        # Set position first
+        selection.root.geometry(f"{selection.root.winfo_screenwidth()}x{selection.root.winfo_screenheight()}+{x}+{y}")
+        selection.root.update()  # Force geometry update
+        # Restore the previous window state
+        if current_state == 'zoomed':
+            selection.root.state('zoomed')
+
+class SingleYearAnalysis(AnalysisWindow):
+    ANALYSIS_NAME = "Single Year Analysis"
+
+    def init_period_variables(self):
+        self.pre_color = StringVar(self.root)
+        self.post_color = StringVar(self.root)
+        self.all_color = StringVar(self.root)
+        self.year_var = StringVar(self.root)
+        
+        self.pre_color.set("grey")
+        self.post_color.set("red")
+        self.all_color.set("yellow")
+
+    def reset_period_fields(self):
+        self.year_var.set("")
+
+    def period_color_fields(self):
+        return {
+            'Pre-Year': self.pre_color.get(),
+            'Post-Year': self.post_color.get(),
+            'All Records': self.all_color.get()
+        }
+
+    def split_years_and_colors(self):
+        year = self.year_var.get().strip()
+        if year.isdigit():
+            # Pre-year records take priority over post-year records
+            return [int(year)], [self.pre_color.get(), self.post_color.get()]
+        # If no year specified, mark all counties with records using all_color
+        return [], [self.all_color.get()]
+
+    def title_fontsize(self):
+        # Calculate dynamic font size based on figure width
+        return min(15, max(8, self.map_view.figure.get_figwidth() * 1.5))
+
+    def export_year_sweep(self):
+        """Export the selected taxon as one Single Year map per split year (GIF, MP4 or PNG frames)"""
+        if self.taxonomy is None:
+            messagebox.showerror("Error", "Please load an Excel file first.")
+            return
+        
+        # Validate colors first
+        if not self.validate_colors():
+            return
+        
+        fam = self.selected_family.get().strip()
+        gen = self.selected_genus.get().strip()
+        spec = self.selected_species.get().strip()
+        
+        if not fam or fam == "Select Family" or not gen or gen == "Select Genus" or not spec or spec == "Select Species":
+            messagebox.showerror("Missing Input", "Please select Family, Genus, and Species.")
+            return
+        
+        path = filedialog.asksaveasfilename(
+            title="Export Year Sweep",
+            initialdir=str(Path.home() / "Downloads"),
+            initialfile=self.map_engine.map_filename(fam, gen, spec, [], "gif"),
+            defaultextension=".gif",
+            filetypes=[("Animated GIF", "*.gif"), ("MP4 Video (needs ffmpeg)", "*.mp4"),
+                       ("PNG Frames (one folder)", "*.png")]
+        )
+        if not path:
+            return
+        
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".mp4":
+            sweep_format = "mp4"
+        elif extension == ".png":
+            # Frames go to a folder named after the chosen file
+            sweep_format = "frames"
+            path = os.path.splitext(path)[0]
+        else:
+            sweep_format = "gif"
+        
+        colors = [self.pre_color.get(), self.post_color.get()]
+        self.map_engine.configure_export_fonts("png")
+        
+        # Render on a worker thread; every frame only recolors the counties
+        self.sweep_dialog = LoadingDialog(self.root, "Rendering year sweep...\nPlease wait",
+                                          on_cancel=lambda: self.sweep_task.cancel(), title="Exporting")
+        self.sweep_task = BackgroundTask(
+            self.root,
+            lambda progress, cancel: self.map_engine.export_year_sweep(
+                self.gdf, self.summary, fam, gen, spec, path, sweep_format,
+                colors=colors, progress=progress, cancel=cancel),
+            on_progress=self.sweep_dialog.set_progress,
+            on_success=lambda result: self.on_sweep_exported(path, result),
+            on_error=self.on_sweep_failed
+        )
+        self.sweep_task.start()
+    
+    def on_sweep_exported(self, path, result):
+        self.sweep_dialog.close()
+        frames, unmatched_counties = result
+        if unmatched_counties:
+            print(f"\nWarning: unmatched counties in the year sweep: {', '.join(sorted(unmatched_counties))}")
+        self.toast.show_toast(f'Year sweep of {frames} frames saved as {os.path.basename(path)}!')
+        print(f"✅ Year sweep saved: {path}")
+    
+    def on_sweep_failed(self, error):
+        self.sweep_dialog.close()
+        if isinstance(error, self.map_engine.LoadCancelled):
+            print("Year sweep export cancelled")
+            return
+        messagebox.showerror("Error", f"Error exporting year sweep:\n{str(error)}")
     
     def initialize_gui(self):
         # Configure style
@@ -963,13 +1633,13 @@ class MainApplication:
         left_panel_width = min(300, int(screen_width * 0.2))  # 20% of screen width or 300px, whichever is smaller
         
         # Create left panel for controls with scrollbar
-        left_panel_container = ttk.Frame(main_container, width=left_panel_width)
-        left_panel_container.pack(side='left', fill='y', padx=(0, 20))
-        left_panel_container.pack_propagate(False)  # Prevent the frame from shrinking
+        self.left_panel_container = ttk.Frame(main_container, width=left_panel_width)  # Start with default width
+        self.left_panel_container.pack(side='left', fill='y', padx=(0, 20))
+        self.left_panel_container.pack_propagate(False)  # Prevent the frame from shrinking
         
         # Back button at the top of left panel container (outside scroll area)
         back_button = ttk.Button(
-            left_panel_container,
+            self.left_panel_container,
             text="← Back to Selection",
             command=self.go_back,
             style='Back.TButton'
@@ -977,7 +1647,7 @@ class MainApplication:
         back_button.pack(fill='x', pady=(0, 10))
         
         # Add scrollbar
-        scrollbar = ttk.Scrollbar(left_panel_container)
+        scrollbar = ttk.Scrollbar(self.left_panel_container)
         scrollbar.pack(side='right', fill='y')
         
         # Create canvas for scrollable content with matching background
@@ -985,7 +1655,7 @@ class MainApplication:
         if not bg_color:  # Fallback if style lookup fails
             bg_color = self.left_panel_container.cget('background')
         self.scroll_canvas = Canvas(
-            left_panel_container,
+            self.left_panel_container,
             yscrollcommand=scrollbar.set,
             width=left_panel_width-20,
             bg=bg_color,
@@ -1104,6 +1774,9 @@ class MainApplication:
         radio_jpg = ttk.Radiobutton(export_frame, text="Compatible JPG (For All).jpg", variable=self.export_format_var, value='jpg')
         radio_jpg.pack(fill='x', pady=(0, 0))
         
+        # Map Mode Section
+        self.add_map_mode_selector(left_panel)
+        
         # Species Selection Section
         species_frame = ttk.LabelFrame(left_panel, text="Species Selection", padding="10")
         species_frame.pack(fill='x', pady=(0, 20))
@@ -1146,1376 +1819,91 @@ class MainApplication:
             command=self.download_map, 
             state="disabled", 
             style='Action.TButton'
-        )
-        self.download_button.pack(fill='x', pady=(0, 5))
-        
-        # Create right panel for map display with dynamic width
-        self.right_panel = ttk.Frame(main_container)
-        self.right_panel.pack(side='left', fill='both', expand=True)
-        
-        # Function to update panel sizes on window resize
-        def update_panel_sizes(event=None):
-            if event and event.widget != self.root:
-                return
-                
-            current_width = self.root.winfo_width()
-            new_left_width = min(300, int(current_width * 0.2))
-            
-            # Update left panel width
-            left_panel_container.configure(width=new_left_width)
-            self.scroll_canvas.configure(width=new_left_width-20)
-            self.scroll_canvas.itemconfig(self.scroll_canvas.find_all()[0], width=new_left_width-20)
-            
-            # Right panel will automatically adjust due to expand=True
-            
-            # If there's a map canvas, trigger a redraw
-            if hasattr(self, 'map_canvas') and self.map_canvas:
-                self.map_canvas.draw()
-        
-        # Bind resize event
-        self.root.bind('<Configure>', update_panel_sizes)
-        
-        # Configure scrolling
-        def on_configure(event):
-            self.scroll_canvas.configure(scrollregion=self.scroll_canvas.bbox('all'))
-        
-        left_panel.bind('<Configure>', on_configure)
-        
-        # Enable mousewheel scrolling
-        def on_mousewheel(event):
-            self.scroll_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-        
-        self.scroll_canvas.bind_all("<MouseWheel>", on_mousewheel)
-        
-        # Bind dropdowns
-        self.family_dropdown.bind("<<ComboboxSelected>>", self.update_genus_dropdown)
-        self.genus_dropdown.bind("<<ComboboxSelected>>", self.update_species_dropdown)
-    
-    def go_back(self):
-        """Return to the selection screen"""
-        # Store current position and state
-        x = self.root.winfo_x()
-        y = self.root.winfo_y()
-        current_state = self.root.state()
-        self.root.destroy()
-        selection = SelectionScreen(self.root.master, self.main_app, from_analysis=True)
-        # Set position first
-        selection.root.geometry(f"{selection.root.winfo_screenwidth()}x{selection.root.winfo_screenheight()}+{x}+{y}")
-        selection.root.update()  # Force geometry update
-        # Restore the previous window state
-        if current_state == 'zoomed':
-            selection.root.state('zoomed')
-    
-    def on_window_resize(self, event=None):
-        try:
-            # Get current window dimensions
-            current_width = self.root.winfo_width()
-            current_height = self.root.winfo_height()
-            
-            # Only process if we have valid dimensions
-            if current_width <= 1 or current_height <= 1:
-                return
-                
-            # Store current dimensions for restoring from maximize
-            if not hasattr(self, 'last_valid_size'):
-                self.last_valid_size = {
-                    'width': current_width,
-                    'height': current_height,
-                    'x': self.root.winfo_x(),
-                    'y': self.root.winfo_y()
-                }
-            
-            # Update panels if needed
-            self.update_panel_sizes()
-                
-        except Exception as e:
-            print(f"Warning: Resize handling error: {str(e)}")  # For debugging
-            pass  # Silently handle any errors during resize
-
-    def update_panel_sizes(self):
-        try:
-            current_width = self.root.winfo_width()
-            
-            # Calculate new left panel width (20% of window width, max 300px)
-            new_left_width = min(300, max(200, int(current_width * 0.2)))
-            
-            # Update left panel container if it exists
-            if hasattr(self, 'left_panel_container'):
-                self.left_panel_container.configure(width=new_left_width)
-            
-            # Update scroll canvas if it exists and has content
-            if hasattr(self, 'scroll_canvas'):
-                try:
-                    # Only update if canvas exists and has content
-                    if self.scroll_canvas.find_all():
-                        self.scroll_canvas.configure(width=new_left_width-20)
-                        self.scroll_canvas.itemconfig(
-                            self.scroll_canvas.find_all()[0],
-                            width=new_left_width-20
-                        )
-                except tk.TclError:
-                    pass  # Handle case where canvas is being destroyed
-            
-            # Redraw map if it exists
-            if hasattr(self, 'map_canvas') and self.map_canvas:
-                try:
-                    self.map_canvas.draw()
-                except Exception:
-                    pass  # Handle any drawing errors silently
-                    
-            # Force geometry update
-            self.root.update_idletasks()
-                
-        except Exception as e:
-            print(f"Warning: Panel update error: {str(e)}")  # For debugging
-            pass  # Silently handle any errors
-
-class SingleYearAnalysis:
-    def __init__(self, parent, main_app):
-        self.root = tk.Toplevel(parent)
-        self.root.title("Single Year Analysis - Montana County Distribution Map Generator")
-        
-        # Allow the window to be moved to any screen
-        self.root.attributes('-alpha', 1.0)
-        self.root.attributes('-topmost', False)
-        
-        # Store main_app reference
-        self.main_app = main_app
-        
-        # Get dependencies from main_app
-        self.pd = main_app.pd
-        self.plt = main_app.plt
-        self.FigureCanvasTkAgg = main_app.FigureCanvasTkAgg
-        
-        # Set window icon
-        if getattr(sys, 'frozen', False):
-            base_dir = sys._MEIPASS
-        else:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-        icon_path = os.path.join(base_dir, "app_icon.ico")
-        if os.path.exists(icon_path):
-            self.root.iconbitmap(icon_path)
-        
-        # Get screen dimensions
-        screen_width = self.root.winfo_screenwidth()
-        screen_height = self.root.winfo_screenheight()
-        
-        # Set initial size but don't maximize yet - that will be done by the calling method
-        self.root.geometry(f"{screen_width}x{screen_height}")
-        
-        # Ensure window can be moved and resized
-        self.root.resizable(True, True)
-        self.root.minsize(800, 600)
-        
-        # Initialize variables
-        self.map_canvas = None
-        self.current_fig = None
-        
-        # Initialize StringVar variables
-        self.pre_color = StringVar(self.root)
-        self.post_color = StringVar(self.root)
-        self.all_color = StringVar(self.root)
-        self.year_var = StringVar(self.root)
-        self.selected_family = StringVar(self.root)
-        self.selected_genus = StringVar(self.root)
-        self.selected_species = StringVar(self.root)
-        self.selected_file_var = StringVar(self.root)
-        self.export_format_var = StringVar(self.root)
-        
-        # Set default values
-        self.pre_color.set("grey")
-        self.post_color.set("red")
-        self.all_color.set("yellow")
-        self.selected_file_var.set("No file selected")
-        self.export_format_var.set("tiff")  # Default to tiff
-        
-        # Create toast notification instance
-        self.toast = ToastNotification(self.root)
-        
-        # Initialize pandas DataFrame
-        self.df = self.pd.DataFrame()
-        
-        # Get the shapefile data from parent
-        self.gdf = main_app.gdf.copy()
-        
-        # Initialize GUI
-        self.initialize_gui()
-        
-        # Bind window state change
-        self.root.bind("<Configure>", self.on_window_resize)
-
-    def standardize_county_names(self, county_series):
-        """
-        Standardize county names by:
-        1. Converting '&' to 'and'
-        2. Stripping whitespace
-        3. Converting to lowercase
-        """
-        return county_series.str.strip().str.lower().str.replace('&', 'and')
-
-    def load_excel(self):
-        path = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx")])
-        if not path:
-            return
-        
-        # Show loading dialog
-        loading_window = tk.Tk()
-        loading_window.title("Loading")
-        screen_width = loading_window.winfo_screenwidth()
-        screen_height = loading_window.winfo_screenheight()
-        window_width = 300
-        window_height = 100
-        x = (screen_width - window_width) // 2
-        y = (screen_height - window_height) // 2
-        loading_window.geometry(f"{window_width}x{window_height}+{x}+{y}")
-        loading_window.overrideredirect(True)
-        
-        frame = ttk.Frame(loading_window, padding="20", relief="raised")
-        frame.pack(fill='both', expand=True)
-        
-        loading_label = ttk.Label(frame, text="Loading file...\nPlease wait", font=('Helvetica', 10))
-        loading_label.pack(pady=10)
-        
-        progress = ttk.Progressbar(frame, mode='indeterminate')
-        progress.pack(fill='x', pady=5)
-        progress.start(10)
-        
-        loading_window.update()
-        
-        try:
-            # Load the Excel file
-            self.df = self.pd.read_excel(path, sheet_name=0)
-            
-            # # Print all column names immediately after loading
-            # print("\nAvailable columns in Excel file:")
-            # print("--------------------------------")
-            # for i, col in enumerate(self.df.columns, 1):
-            #     print(f"{i}. {col}")
-            # print("--------------------------------\n")
-            
-            # Now continue with column processing
-            self.df.columns = self.df.columns.str.strip()
-            
-            # Get just the filename from the path
-            filename = path.split('/')[-1]
-            
-            # Validate required columns
-            required_columns = ["county", "family", "genus", "species", "year"]
-            missing_columns = [col for col in required_columns if col not in self.df.columns]
-            
-            if missing_columns:
-                progress.stop()
-                loading_window.destroy()
-                self.selected_file_var.set("No file selected")
-                messagebox.showerror("Error", 
-                    f"Missing required columns: {', '.join(missing_columns)}\n\n"
-                    "The following columns are required:\n"
-                    "- county: for mapping locations\n"
-                    "- family: for taxonomic classification\n"
-                    "- genus: for taxonomic classification\n"
-                    "- species: for taxonomic classification\n"
-                    "- year: for temporal analysis\n\n"
-                    "Please check your Excel file and try again."
-                )
-                return
-            
-            # Process the data
-            # First standardize county names
-            self.df["county"] = self.standardize_county_names(self.df["county"])
-            
-            # Process other columns
-            for col in ["family", "genus", "species"]:
-                self.df[col] = self.df[col].astype(str).str.strip().str.lower()
-            self.df["year"] = self.df["year"].astype(str).str.extract(r'(\d{4})').astype(float)
-            
-            # Get valid Montana counties from shapefile
-            valid_counties = set(self.standardize_county_names(self.gdf["County"]))
-            
-            # Filter DataFrame to only include valid Montana counties
-            montana_records = self.df[self.df["county"].isin(valid_counties)]
-            
-            if len(montana_records) == 0:
-                progress.stop()
-                loading_window.destroy()
-                self.selected_file_var.set("No file selected")
-                messagebox.showerror("Error", 
-                    "No valid Montana county records found in the Excel file.\n\n"
-                    "Please check that your data contains Montana county records."
-                )
-                return
-            
-            # Replace the main DataFrame with only Montana records
-            self.df = montana_records
-            
-            # Calculate statistics using Montana records
-            num_records = len(montana_records)
-            num_families = len(montana_records["family"].unique())
-            num_genera = len(montana_records["genus"].unique())
-            num_species = len(montana_records["species"].unique())
-            year_range = f"{int(montana_records['year'].min())} - {int(montana_records['year'].max())}"
-            num_counties = len(montana_records["county"].unique())
-            
-            # Get valid families (non-empty/non-null values)
-            valid_families = sorted(montana_records["family"].dropna().unique())
-            valid_families = [f for f in valid_families if str(f).strip() and str(f).lower() != 'nan']  # Remove empty strings and 'nan'
-            
-            # Capitalize family names
-            family_values = ["All"] + [f.title() for f in valid_families]
-            
-            # Update Family dropdown
-            self.family_dropdown["values"] = family_values
-            self.family_dropdown.set("All")
-            
-            # Trigger genus dropdown update
-            self.update_genus_dropdown()
-            
-            # Set genus to "All" and trigger species update
-            self.genus_dropdown.set("All")
-            self.update_species_dropdown()
-            
-            # Set species to "all"
-            self.species_dropdown.set("all")
-            
-            # Reset year field
-            self.year_var.set("")
-            
-            # Update file info display
-            self.selected_file_var.set(f"✓ {filename}\n{num_records:,} Montana records loaded")
-            
-            # Stop progress bar and close loading window
-            progress.stop()
-            loading_window.destroy()
-            
-            # Show success message with detailed statistics
-            messagebox.showinfo("Success", 
-                f"File loaded successfully!\n\n"
-                f"Montana Dataset Summary:\n"
-                f"• Total Records: {num_records:,}\n"
-                f"• Unique Families: {num_families}\n"
-                f"• Unique Genera: {num_genera}\n"
-                f"• Unique Species: {num_species}\n"
-                f"• Counties Covered: {num_counties}\n"
-                f"• Year Range: {year_range}\n\n"
-                "Please select a Family to continue."
-            )
-            
-            print("✅ Excel file loaded successfully!")
-            
-        except Exception as e:
-            progress.stop()
-            loading_window.destroy()
-            self.selected_file_var.set("No file selected")
-            error_message = str(e)
-            if "No sheet named" in error_message:
-                error_message = "Invalid Excel file format. Please ensure your data is in the first sheet."
-            elif "Invalid file" in error_message:
-                error_message = "Invalid file format. Please ensure you're uploading a valid Excel (.xlsx) file."
-            
-            messagebox.showerror("Error", 
-                f"Error loading file:\n{error_message}\n\n"
-                "Please check your Excel file format and try again."
-            )
-    
-    def update_genus_dropdown(self, event=None):
-        family = self.selected_family.get().strip()
-        
-        if family == "Select Family":
-            self.genus_dropdown["values"] = []
-            self.genus_dropdown.set("Select Genus")
-            return
-        
-        # Filter based on family selection
-        if family == "All":
-            # Get all non-empty genus values
-            filtered = self.df[self.df["genus"].notna() & (self.df["genus"].str.strip() != "")]
-        else:
-            # Get genus for specific family (case-insensitive)
-            filtered = self.df[self.df["family"].str.lower() == family.lower()]
-        
-        # Get valid genera (non-empty/non-null values)
-        valid_genera = sorted(filtered["genus"].dropna().unique())
-        valid_genera = [g for g in valid_genera if str(g).strip() and str(g).lower() != 'nan']  # Remove empty strings and 'nan'
-        
-        # Create genus list with special options
-        genus_values = ["All"] + [g.title() for g in valid_genera]
-        
-        # Update Genus dropdown
-        self.genus_dropdown["values"] = genus_values
-        self.genus_dropdown.set("Select Genus")
-        
-        # Reset species dropdown
-        self.species_dropdown.set("Select Species")
-        self.species_dropdown["values"] = []
-    
-    def update_species_dropdown(self, event=None):
-        family = self.selected_family.get().strip()
-        genus = self.selected_genus.get().strip()
-        
-        if family == "Select Family" or genus == "Select Genus":
-            self.species_dropdown["values"] = []
-            self.species_dropdown.set("Select Species")
-            return
-        
-        # Start with base DataFrame
-        filtered = self.df
-        
-        # Apply family filter
-        if family == "All":
-            filtered = filtered[filtered["family"].notna() & (filtered["family"].str.strip() != "")]
-        else:
-            filtered = filtered[filtered["family"].str.lower() == family.lower()]
-        
-        # Apply genus filter
-        if genus == "All":
-            filtered = filtered[filtered["genus"].notna() & (filtered["genus"].str.strip() != "")]
-        else:
-            filtered = filtered[filtered["genus"].str.lower() == genus.lower()]
-        
-        # Get valid species (non-empty/non-null values)
-        valid_species = sorted(filtered["species"].dropna().unique())
-        valid_species = [s for s in valid_species if str(s).strip() and str(s).lower() != 'nan']  # Remove empty strings and 'nan'
-        
-        # Create species list with special options - note lowercase for species
-        species_values = ["all"] + valid_species
-        
-        # Update Species dropdown
-        self.species_dropdown["values"] = species_values
-        self.species_dropdown.set("Select Species")
-    
-    def is_valid_color(self, color):
-        """Validate if a color string is a valid matplotlib color"""
-        try:
-            # Convert color to RGB
-            self.plt.matplotlib.colors.to_rgb(color)
-            return True
-        except ValueError:
-            return False
-
-    def validate_colors(self):
-        """Validate all selected colors"""
-        colors = {
-            'Pre-Year': self.pre_color.get(),
-            'Post-Year': self.post_color.get(),
-            'All Records': self.all_color.get()
-        }
-        
-        invalid_colors = []
-        for name, color in colors.items():
-            if not self.is_valid_color(color):
-                invalid_colors.append(f"{name} color '{color}'")
-        
-        if invalid_colors:
-            error_msg = "Invalid colors detected:\n" + "\n".join(invalid_colors)
-            self.toast.show_toast(error_msg, duration=5000, error=True)
-            return False
-        return True
-
-    def on_color_change(self, event=None):
-        """Validate colors when they change"""
-        self.validate_colors()
-
-    def generate_map(self):
-        if self.map_canvas:
-            self.map_canvas.get_tk_widget().destroy()
-        
-        # Validate colors first
-        if not self.validate_colors():
-            self.download_button.config(state="disabled")
-            return
-        
-        gdf_copy = self.gdf.copy()
-        # Initialize all counties as white
-        gdf_copy["Color"] = "white"
-        
-        fam = self.selected_family.get().strip()
-        gen = self.selected_genus.get().strip()
-        spec = self.selected_species.get().strip()
-        year = self.year_var.get().strip()
-        
-        if not fam or fam == "Select Family" or not gen or gen == "Select Genus" or not spec or spec == "Select Species":
-            messagebox.showerror("Missing Input", "Please select Family, Genus, and Species.")
-            self.download_button.config(state="disabled")
-            return
-        
-        # Start with base DataFrame
-        filtered = self.df
-        
-        # Apply family filter
-        if fam == "All":
-            filtered = filtered[filtered["family"].notna() & (filtered["family"].str.strip() != "")]
-        elif fam == "Not Specified":
-            filtered = filtered[filtered["family"].isna() | (filtered["family"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["family"].str.lower() == fam.lower()]
-        
-        # Apply genus filter
-        if gen == "All":
-            filtered = filtered[filtered["genus"].notna() & (filtered["genus"].str.strip() != "")]
-        elif gen == "Not Specified":
-            filtered = filtered[filtered["genus"].isna() | (filtered["genus"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["genus"].str.lower() == gen.lower()]
-        
-        # Apply species filter
-        if spec == "all":
-            filtered = filtered[filtered["species"].notna() & (filtered["species"].str.strip() != "")]
-        elif spec == "not specified":
-            filtered = filtered[filtered["species"].isna() | (filtered["species"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["species"].str.lower() == spec.lower()]
-        
-        # Create a set of valid county names from the shapefile for quick lookup
-        valid_counties = set(self.standardize_county_names(gdf_copy["County"]))
-        
-        # Track unmatched counties to report to user
-        unmatched_counties = set()
-        
-        if isinstance(year, str) and year.isdigit():
-            year = int(year)
-            # First pass: Mark counties with post-dividing year records with post_color (only if they're white)
-            for county in filtered[filtered["year"] > year]["county"].unique():
-                county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-                if county_lower in valid_counties:
-                    mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                    if gdf_copy.loc[mask, "Color"].iloc[0] == "white":
-                        gdf_copy.loc[mask, "Color"] = self.post_color.get()
-                else:
-                    unmatched_counties.add(county)
-            
-            # Second pass: Mark counties with pre-dividing year records with pre_color (overriding any color)
-            for county in filtered[filtered["year"] <= year]["county"].unique():
-                county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-                if county_lower in valid_counties:
-                    mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                    gdf_copy.loc[mask, "Color"] = self.pre_color.get()
-                else:
-                    unmatched_counties.add(county)
-        else:
-            # If no year specified, mark all counties with records using all_color
-            for county in filtered["county"].unique():
-                county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-                if county_lower in valid_counties:
-                    mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                    gdf_copy.loc[mask, "Color"] = self.all_color.get()
-                else:
-                    unmatched_counties.add(county)
-        
-        # Report any unmatched counties
-        if unmatched_counties:
-            print("\nWarning: The following counties in your Excel file don't match the shapefile counties:")
-            print("-------------------------------------------------------------------------")
-            for county in sorted(unmatched_counties):
-                print(f"• {county}")
-            print("\nValid Montana county names:")
-            print("--------------------------------")
-            for county in sorted(valid_counties):
-                print(f"• {county}")
-            print("-------------------------------------------------------------------------\n")
-            
-            messagebox.showwarning("County Name Mismatch",
-                f"Some counties in your Excel file don't match the shapefile counties.\n\n"
-                f"Number of unmatched counties: {len(unmatched_counties)}\n\n"
-                f"Please check the console output for details and ensure county names match exactly."
-            )
-        
-        # Create figure with calculated size
-        fig = self.plt.figure(figsize=(12, 11))
-        
-        # Create main map axis with sufficient space for title and legend
-        ax = fig.add_axes([0.1, 0.2, 0.8, 0.6])  # Adjusted to leave more space at top
-        gdf_copy.boundary.plot(ax=ax, linewidth=1, edgecolor="black")
-        gdf_copy.plot(ax=ax, color=gdf_copy["Color"], alpha=0.6)
-        
-        # Add title with dynamic font size
-        title = f"{fam.title()} > {gen.title()} > {spec.lower()}"
-        if isinstance(year, int):
-            subtitle = f"\nYear: {year}"
-            title += subtitle
-        
-        # Calculate dynamic font size based on figure width
-        title_fontsize = min(15, max(8, fig.get_figwidth() * 1.5))
-        ax.set_title(title, fontsize=title_fontsize, pad=25, wrap=True)  # Increased padding
-        ax.axis("off")
-        
-        # Create a separate axis for the legend
-        legend_ax = fig.add_axes([0.2, 0.02, 0.6, 0.12])
-        legend_ax.axis('off')
-        
-        # Add a box around the legend
-        legend_box = self.plt.Rectangle((0, 0), 1, 1, 
-                                      facecolor='white', edgecolor='black',
-                                      transform=legend_ax.transAxes)
-        legend_ax.add_patch(legend_box)
-        
-        if isinstance(year, int):
-            # Add horizontal bars with their descriptions for year analysis
-            bar_length = 0.15
-            bar_height = 0.1
-            
-            # Pre-year color
-            legend_ax.add_patch(
-                self.plt.Rectangle((0.2, 0.5), bar_length, bar_height, 
-                                 facecolor=self.pre_color.get(), 
-                                 alpha=0.6,
-                                 edgecolor='black')
-            )
-            legend_ax.text(0.4, 0.55, f"Records ≤ {year}", fontsize=10, va='center')
-            
-            # Post-year color
-            legend_ax.add_patch(
-                self.plt.Rectangle((0.2, 0.2), bar_length, bar_height, 
-                                 facecolor=self.post_color.get(), 
-                                 alpha=0.6,
-                                 edgecolor='black')
-            )
-            legend_ax.text(0.4, 0.25, f"Records > {year}", fontsize=10, va='center')
-        else:
-            # Add single bar for all records
-            bar_length = 0.15
-            bar_height = 0.1
-            legend_ax.add_patch(
-                self.plt.Rectangle((0.2, 0.35), bar_length, bar_height, 
-                                 facecolor=self.all_color.get(), 
-                                 alpha=0.6,
-                                 edgecolor='black')
-            )
-            legend_ax.text(0.4, 0.4, "All Records", fontsize=10, va='center')
-        
-        # Set the legend axis limits
-        legend_ax.set_xlim(0, 1)
-        legend_ax.set_ylim(0, 1)
-        
-        # Adjust main plot to make room for legend
-        fig.subplots_adjust(bottom=0.2, top=0.9)
-        
-        self.map_canvas = self.FigureCanvasTkAgg(fig, master=self.right_panel)
-        self.map_canvas.draw()
-        self.map_canvas.get_tk_widget().pack(fill='both', expand=True)
-        
-        self.current_fig = fig
-        self.download_button.config(state="normal")
-        print("✅ Map generated successfully!")
-    
-    def download_map(self):
-        """Download the current map in the selected format"""
-        if not hasattr(self, 'current_fig') or self.current_fig is None:
-            messagebox.showerror("Error", "No map to download. Please generate a map first.")
-            return
-        
-        # Get export format
-        export_format = self.export_format_var.get()
-        
-        # Set up file naming
-        downloads_path = str(Path.home() / "Downloads")
-        fam = self.selected_family.get().strip().title()
-        gen = self.selected_genus.get().strip().title()
-        sp = self.selected_species.get().strip().lower()
-        year = self.year_var.get().strip()
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
-        
-        # Create filename based on format
-        year_info = f"_{year}" if year else ""
-        if export_format == 'svg':
-            filename = f"{fam}-{gen}-{sp}{year_info}_{timestamp}.svg"
-        elif export_format == 'tiff':
-            filename = f"{fam}-{gen}-{sp}{year_info}_{timestamp}.tiff"
-        elif export_format == 'jpg':
-            filename = f"{fam}-{gen}-{sp}{year_info}_{timestamp}.jpg"
-        else:
-            filename = f"{fam}-{gen}-{sp}{year_info}_{timestamp}.tiff"  # Default fallback
-        
-        file_path = os.path.join(downloads_path, filename)
-        
-        try:
-            # Configure matplotlib settings for the export format
-            mpl.rcParams['font.family'] = 'serif'
-            mpl.rcParams['font.serif'] = ['Times New Roman', 'Times', 'DejaVu Serif', 'serif']
-            
-            # Special configuration for SVG to preserve text as editable elements
-            if export_format == 'svg':
-                mpl.rcParams['svg.fonttype'] = 'none'
-            
-            # Save the figure
-            self.current_fig.savefig(file_path, format=export_format, bbox_inches='tight', dpi=300)
-            
-            # Show success message
-            self.toast.show_toast(f'Map saved as {filename} in Downloads!')
-            print(f"✅ Map saved as {export_format} file: {file_path}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error saving map:\n{str(e)}\n\nPlease try again.")
-    
-    def on_window_resize(self, event=None):
-        try:
-            # Get current window dimensions
-            current_width = self.root.winfo_width()
-            current_height = self.root.winfo_height()
-            
-            # Only process if we have valid dimensions
-            if current_width <= 1 or current_height <= 1:
-                return
-                
-            # Store current dimensions for restoring from maximize
-            if not hasattr(self, 'last_valid_size'):
-                self.last_valid_size = {
-                    'width': current_width,
-                    'height': current_height,
-                    'x': self.root.winfo_x(),
-                    'y': self.root.winfo_y()
-                }
-            
-            # Update panels if needed
-            self.update_panel_sizes()
-                
-        except Exception as e:
-            print(f"Warning: Resize handling error: {str(e)}")  # For debugging
-            pass  # Silently handle any errors during resize
-
-    def update_panel_sizes(self):
-        try:
-            current_width = self.root.winfo_width()
-            
-            # Calculate new left panel width (20% of window width, max 300px)
-            new_left_width = min(300, max(200, int(current_width * 0.2)))
-            
-            # Update left panel container if it exists
-            if hasattr(self, 'left_panel_container'):
-                self.left_panel_container.configure(width=new_left_width)
-            
-            # Update scroll canvas if it exists and has content
-            if hasattr(self, 'scroll_canvas'):
-                try:
-                    # Only update if canvas exists and has content
-                    if self.scroll_canvas.find_all():
-                        self.scroll_canvas.configure(width=new_left_width-20)
-                        self.scroll_canvas.itemconfig(
-                            self.scroll_canvas.find_all()[0],
-                            width=new_left_width-20
-                        )
-                except tk.TclError:
-                    pass  # Handle case where canvas is being destroyed
-            
-            # Redraw map if it exists
-            if hasattr(self, 'map_canvas') and self.map_canvas:
-                try:
-                    self.map_canvas.draw()
-                except Exception:
-                    pass  # Handle any drawing errors silently
-                    
-            # Force geometry update
-            self.root.update_idletasks()
-                
-        except Exception as e:
-            print(f"Warning: Panel update error: {str(e)}")  # For debugging
-            pass  # Silently handle any errors
-
-    def initialize_gui(self):
-        # Configure style
-        style = ttk.Style()
-        style.theme_use('clam')
-        style.configure('TLabel', font=('Helvetica', 10))
-        style.configure('TButton', font=('Helvetica', 10))
-        style.configure('Header.TLabel', font=('Helvetica', 12, 'bold'))
-        style.configure('Title.TLabel', font=('Helvetica', 24, 'bold'))  # Increased from 16 to 24
-        style.configure('Back.TButton', 
-                       font=('Helvetica', 10, 'bold'),
-                       padding=8)
-        
-        # Create main container with padding
-        main_container = ttk.Frame(self.root, padding="20")
-        main_container.pack(fill='both', expand=True)
-        
-        # Title
-        title_frame = ttk.Frame(main_container)
-        title_frame.pack(fill='x', pady=(0, 20))
-        title_label = ttk.Label(
-            title_frame, 
-            text="Montana County Distribution Map Generator - Single Year Analysis", 
-            style='Title.TLabel',
-            foreground='dark green'
-        )
-        title_label.pack()
-        
-        # Calculate left and right panel widths based on screen size
-        screen_width = self.root.winfo_screenwidth()
-        left_panel_width = min(300, int(screen_width * 0.2))  # 20% of screen width or 300px, whichever is smaller
-        
-        # Create left panel for controls with scrollbar
-        self.left_panel_container = ttk.Frame(main_container, width=left_panel_width)  # Start with default width
-        self.left_panel_container.pack(side='left', fill='y', padx=(0, 20))
-        self.left_panel_container.pack_propagate(False)  # Prevent the frame from shrinking
-        
-        # Back button at the top of left panel container (outside scroll area)
-        back_button = ttk.Button(
-            self.left_panel_container,
-            text="← Back to Selection",
-            command=self.go_back,
-            style='Back.TButton'
-        )
-        back_button.pack(fill='x', pady=(0, 10))
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(self.left_panel_container)
-        scrollbar.pack(side='right', fill='y')
-        
-        # Create canvas for scrollable content with matching background
-        bg_color = style.lookup('TFrame', 'background')  # Get ttk frame background color
-        if not bg_color:  # Fallback if style lookup fails
-            bg_color = self.left_panel_container.cget('background')
-        self.scroll_canvas = Canvas(
-            self.left_panel_container,
-            yscrollcommand=scrollbar.set,
-            width=left_panel_width-20,
-            bg=bg_color,
-            highlightthickness=0  # Remove border
-        )
-        self.scroll_canvas.pack(side='left', fill='y')
-        
-        scrollbar.config(command=self.scroll_canvas.yview)
-        
-        # Create frame for controls inside canvas
-        left_panel = ttk.Frame(self.scroll_canvas)
-        self.scroll_canvas.create_window((0, 0), window=left_panel, anchor='nw', width=left_panel_width-20)
-        
-        # Excel Load Section
-        excel_frame = ttk.LabelFrame(left_panel, text="Data Input", padding="10")
-        excel_frame.pack(fill='x', pady=(0, 20))
-        
-        # Create a frame for the button and file info
-        file_info_frame = ttk.Frame(excel_frame)
-        file_info_frame.pack(fill='x', expand=True)
-        
-        # Load button
-        load_button = ttk.Button(
-            file_info_frame, 
-            text="Load Excel File", 
-            command=self.load_excel, 
-            style='TButton'
-        )
-        load_button.pack(fill='x', pady=(0, 5))
-        
-        # File info label
-        file_label = ttk.Label(
-            file_info_frame, 
-            textvariable=self.selected_file_var,
-            style='FileInfo.TLabel',
-            wraplength=250
-        )
-        file_label.pack(fill='x')
-        
-        # Configure style for file info
-        style.configure('FileInfo.TLabel', 
-                       font=('Helvetica', 9),
-                       foreground='dark green')
-        
-        # Color Selection Section
-        color_frame = ttk.LabelFrame(left_panel, text="Color Settings", padding="10")
-        color_frame.pack(fill='x', pady=(0, 20))
-        
-        # Common color options
-        color_options = ["red", "blue", "grey", "black", "yellow", "purple", "orange", "pink", "brown"]
-        
-        # Pre Color
-        ttk.Label(color_frame, text="Pre-Year Color:", style='TLabel').pack(fill='x')
-        pre_color_combo = ttk.Combobox(
-            color_frame, 
-            textvariable=self.pre_color, 
-            values=color_options,
-            state="normal"
-        )
-        pre_color_combo.pack(fill='x', pady=(0, 10))
-        pre_color_combo.bind('<<ComboboxSelected>>', self.on_color_change)
-        pre_color_combo.bind('<Return>', self.on_color_change)
-        pre_color_combo.bind('<FocusOut>', self.on_color_change)
-        
-        # Post Color
-        ttk.Label(color_frame, text="Post-Year Color:", style='TLabel').pack(fill='x')
-        post_color_combo = ttk.Combobox(
-            color_frame, 
-            textvariable=self.post_color, 
-            values=color_options,
-            state="normal"
-        )
-        post_color_combo.pack(fill='x', pady=(0, 10))
-        post_color_combo.bind('<<ComboboxSelected>>', self.on_color_change)
-        post_color_combo.bind('<Return>', self.on_color_change)
-        post_color_combo.bind('<FocusOut>', self.on_color_change)
-        
-        # All Color
-        ttk.Label(color_frame, text="All Records Color:", style='TLabel').pack(fill='x')
-        all_color_combo = ttk.Combobox(
-            color_frame, 
-            textvariable=self.all_color, 
-            values=color_options,
-            state="normal"
-        )
-        all_color_combo.pack(fill='x', pady=(0, 10))
-        all_color_combo.bind('<<ComboboxSelected>>', self.on_color_change)
-        all_color_combo.bind('<Return>', self.on_color_change)
-        all_color_combo.bind('<FocusOut>', self.on_color_change)
-        
-        # Add helper text for custom colors
-        helper_label = ttk.Label(
-            color_frame, 
-            text="Tip: You can type any valid color name or hex code (e.g., #FF5733)",
-            style='TLabel',
-            wraplength=250
-        )
-        helper_label.pack(fill='x', pady=(5, 0))
-        
-        # Year Input Section
-        year_frame = ttk.LabelFrame(left_panel, text="Year Filter", padding="10")
-        year_frame.pack(fill='x', pady=(0, 20))
-        ttk.Label(year_frame, text="Year (Optional):", style='TLabel').pack(fill='x')
-        ttk.Entry(year_frame, textvariable=self.year_var).pack(fill='x')
-        
-        # Export Format Selection Section
-        export_frame = ttk.LabelFrame(left_panel, text="Export Format & Options", padding="10")
-        export_frame.pack(fill='x', pady=(0, 20))
-        
-        radio_tiff = ttk.Radiobutton(export_frame, text="Michael's TIFF (For Rulers Only).tiff", variable=self.export_format_var, value='tiff')
-        radio_tiff.pack(fill='x', pady=(0, 0))
-        
-        radio_svg = ttk.Radiobutton(export_frame, text="Casey's SVG (For the Rest of Us).svg", variable=self.export_format_var, value='svg')
-        radio_svg.pack(fill='x', pady=(0, 0))
-        
-        radio_jpg = ttk.Radiobutton(export_frame, text="Compatible JPG (For All).jpg", variable=self.export_format_var, value='jpg')
-        radio_jpg.pack(fill='x', pady=(0, 0))
-        
-        # Species Selection Section
-        species_frame = ttk.LabelFrame(left_panel, text="Species Selection", padding="10")
-        species_frame.pack(fill='x', pady=(0, 20))
-        
-        # Family
-        ttk.Label(species_frame, text="Family:", style='TLabel').pack(fill='x')
-        self.family_dropdown = ttk.Combobox(species_frame, textvariable=self.selected_family, state="readonly")
-        self.family_dropdown.pack(fill='x', pady=(0, 10))
-        
-        # Genus
-        ttk.Label(species_frame, text="Genus:", style='TLabel').pack(fill='x')
-        self.genus_dropdown = ttk.Combobox(species_frame, textvariable=self.selected_genus, state="readonly")
-        self.genus_dropdown.pack(fill='x', pady=(0, 10))
-        
-        # Species
-        ttk.Label(species_frame, text="Species:", style='TLabel').pack(fill='x')
-        self.species_dropdown = ttk.Combobox(species_frame, textvariable=self.selected_species, state="readonly")
-        self.species_dropdown.pack(fill='x', pady=(0, 10))
-        
-        # Button Section
-        button_frame = ttk.Frame(left_panel)
-        button_frame.pack(fill='x', pady=(0, 20))
-        
-        # Style configuration for buttons
-        style.configure('Action.TButton', 
-                       font=('Helvetica', 10, 'bold'),
-                       padding=10)
-        
-        generate_button = ttk.Button(
-            button_frame, 
-            text="Generate Map", 
-            command=self.generate_map, 
-            style='Action.TButton'
-        )
-        generate_button.pack(fill='x', pady=(0, 5))
-        
-        self.download_button = ttk.Button(
-            button_frame, 
-            text="Download Map", 
-            command=self.download_map, 
-            state="disabled", 
-            style='Action.TButton'
-        )
-        self.download_button.pack(fill='x', pady=(0, 5))
-        
-        # Create right panel for map display with dynamic width
-        self.right_panel = ttk.Frame(main_container)
-        self.right_panel.pack(side='left', fill='both', expand=True)
-        
-        # Bind resize event to the main update function
-        self.root.bind('<Configure>', self.on_window_resize)
-        
-        # Store initial window size
-        self.last_valid_size = {
-            'width': self.root.winfo_width(),
-            'height': self.root.winfo_height(),
-            'x': self.root.winfo_x(),
-            'y': self.root.winfo_y()
-        }
-        
-        # Remove the local update_panel_sizes function and use the class method instead
-        
-        # Configure scrolling
-        def on_configure(event):
-            self.scroll_canvas.configure(scrollregion=self.scroll_canvas.bbox('all'))
-        
-        left_panel.bind('<Configure>', on_configure)
-        
-        # Enable mousewheel scrolling
-        def on_mousewheel(event):
-            self.scroll_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-        
-        self.scroll_canvas.bind_all("<MouseWheel>", on_mousewheel)
-        
-        # Bind dropdowns
-        self.family_dropdown.bind("<<ComboboxSelected>>", self.update_genus_dropdown)
-        self.genus_dropdown.bind("<<ComboboxSelected>>", self.update_species_dropdown)
-    
-    def go_back(self):
-        """Return to the selection screen"""
-        # Store current position and state
-        x = self.root.winfo_x()
-        y = self.root.winfo_y()
-        current_state = self.root.state()
-        self.root.destroy()
-        selection = SelectionScreen(self.root.master, self.main_app, from_analysis=True)
-        # Set position first
-        selection.root.geometry(f"{selection.root.winfo_screenwidth()}x{selection.root.winfo_screenheight()}+{x}+{y}")
-        selection.root.update()  # Force geometry update
-        # Restore the previous window state
-        if current_state == 'zoomed':
-            selection.root.state('zoomed')
-
-class DualYearAnalysis:
-    def __init__(self, parent, main_app):
-        self.root = tk.Toplevel(parent)
-        self.root.title("Dual Year Analysis - Montana County Distribution Map Generator")
-        
-        # Allow the window to be moved to any screen
-        self.root.attributes('-alpha', 1.0)
-        self.root.attributes('-topmost', False)
-        
-        # Store main_app reference
-        self.main_app = main_app
-        
-        # Get dependencies from main_app
-        self.pd = main_app.pd
-        self.plt = main_app.plt
-        self.FigureCanvasTkAgg = main_app.FigureCanvasTkAgg
-        
-        # Set window icon
-        if getattr(sys, 'frozen', False):
-            base_dir = sys._MEIPASS
-        else:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-        icon_path = os.path.join(base_dir, "app_icon.ico")
-        if os.path.exists(icon_path):
-            self.root.iconbitmap(icon_path)
-        
-        # Get screen dimensions
-        screen_width = self.root.winfo_screenwidth()
-        screen_height = self.root.winfo_screenheight()
-        
-        # Set initial size but don't maximize yet - that will be done by the calling method
-        self.root.geometry(f"{screen_width}x{screen_height}")
-        
-        # Ensure window can be moved and resized
-        self.root.resizable(True, True)
-        self.root.minsize(800, 600)
-        
-        # Initialize variables
-        self.map_canvas = None
-        self.current_fig = None
-        
-        # Initialize StringVar variables
-        self.first_color = StringVar(self.root)
-        self.second_color = StringVar(self.root)
-        self.third_color = StringVar(self.root)
-        self.first_year_var = StringVar(self.root)
-        self.second_year_var = StringVar(self.root)
-        self.selected_family = StringVar(self.root)
-        self.selected_genus = StringVar(self.root)
-        self.selected_species = StringVar(self.root)
-        self.selected_file_var = StringVar(self.root)
-        self.export_format_var = StringVar(self.root)
-        
-        # Set default values
-        self.first_color.set("grey")  # For records ≤ first year
-        self.second_color.set("red")  # For records between years
-        self.third_color.set("yellow")  # For records > second year
-        self.selected_file_var.set("No file selected")
-        self.export_format_var.set("tiff")  # Default to tiff
-        
-        # Create toast notification instance
-        self.toast = ToastNotification(self.root)
-        
-        # Initialize pandas DataFrame
-        self.df = self.pd.DataFrame()
-        
-        # Get the shapefile data from parent
-        self.gdf = main_app.gdf.copy()
-        
-        # Initialize GUI
-        self.initialize_gui()
-        
-        # Bind window state change
-        self.root.bind("<Configure>", self.on_window_resize)
-
-    def standardize_county_names(self, county_series):
-        """
-        Standardize county names by:
-        1. Converting '&' to 'and'
-        2. Stripping whitespace
-        3. Converting to lowercase
-        """
-        return county_series.str.strip().str.lower().str.replace('&', 'and')
-
-    def load_excel(self):
-        path = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx")])
-        if not path:
-            return
-        
-        # Show loading dialog
-        loading_window = tk.Tk()
-        loading_window.title("Loading")
-        screen_width = loading_window.winfo_screenwidth()
-        screen_height = loading_window.winfo_screenheight()
-        window_width = 300
-        window_height = 100
-        x = (screen_width - window_width) // 2
-        y = (screen_height - window_height) // 2
-        loading_window.geometry(f"{window_width}x{window_height}+{x}+{y}")
-        loading_window.overrideredirect(True)
-        
-        frame = ttk.Frame(loading_window, padding="20", relief="raised")
-        frame.pack(fill='both', expand=True)
-        
-        loading_label = ttk.Label(frame, text="Loading file...\nPlease wait", font=('Helvetica', 10))
-        loading_label.pack(pady=10)
-        
-        progress = ttk.Progressbar(frame, mode='indeterminate')
-        progress.pack(fill='x', pady=5)
-        progress.start(10)
-        
-        loading_window.update()
-        
-        try:
-            # Load the Excel file
-            self.df = self.pd.read_excel(path, sheet_name=0)
-            
-            # # Print all column names immediately after loading
-            # print("\nAvailable columns in Excel file:")
-            # print("--------------------------------")
-            # for i, col in enumerate(self.df.columns, 1):
-            #     print(f"{i}. {col}")
-            # print("--------------------------------\n")
-            
-            # Now continue with column processing
-            self.df.columns = self.df.columns.str.strip()
-            
-            # Get just the filename from the path
-            filename = path.split('/')[-1]
-            
-            # Validate required columns
-            required_columns = ["county", "family", "genus", "species", "year"]
-            missing_columns = [col for col in required_columns if col not in self.df.columns]
-            
-            if missing_columns:
-                progress.stop()
-                loading_window.destroy()
-                self.selected_file_var.set("No file selected")
-                messagebox.showerror("Error", 
-                    f"Missing required columns: {', '.join(missing_columns)}\n\n"
-                    "The following columns are required:\n"
-                    "- county: for mapping locations\n"
-                    "- family: for taxonomic classification\n"
-                    "- genus: for taxonomic classification\n"
-                    "- species: for taxonomic classification\n"
-                    "- year: for temporal analysis\n\n"
-                    "Please check your Excel file and try again."
-                )
-                return
-            
-            # Process the data
-            # First standardize county names
-            self.df["county"] = self.standardize_county_names(self.df["county"])
-            
-            # Process other columns
-            for col in ["family", "genus", "species"]:
-                self.df[col] = self.df[col].astype(str).str.strip().str.lower()
-            self.df["year"] = self.df["year"].astype(str).str.extract(r'(\d{4})').astype(float)
-            
-            # Get valid Montana counties from shapefile
-            valid_counties = set(self.standardize_county_names(self.gdf["County"]))
-            
-            # Filter DataFrame to only include valid Montana counties
-            montana_records = self.df[self.df["county"].isin(valid_counties)]
-            
-            if len(montana_records) == 0:
-                progress.stop()
-                loading_window.destroy()
-                self.selected_file_var.set("No file selected")
-                messagebox.showerror("Error", 
-                    "No valid Montana county records found in the Excel file.\n\n"
-                    "Please check that your data contains Montana county records."
-                )
-                return
-            
-            # Replace the main DataFrame with only Montana records
-            self.df = montana_records
-            
-            # Calculate statistics using Montana records
-            num_records = len(montana_records)
-            num_families = len(montana_records["family"].unique())
-            num_genera = len(montana_records["genus"].unique())
-            num_species = len(montana_records["species"].unique())
-            year_range = f"{int(montana_records['year'].min())} - {int(montana_records['year'].max())}"
-            num_counties = len(montana_records["county"].unique())
-            
-            # Get valid families (non-empty/non-null values)
-            valid_families = sorted(montana_records["family"].dropna().unique())
-            valid_families = [f for f in valid_families if str(f).strip() and str(f).lower() != 'nan']  # Remove empty strings and 'nan'
-            
-            # Capitalize family names
-            family_values = ["All"] + [f.title() for f in valid_families]
-            
-            # Update Family dropdown
-            self.family_dropdown["values"] = family_values
-            self.family_dropdown.set("All")
-            
-            # Trigger genus dropdown update
-            self.update_genus_dropdown()
-            
-            # Set genus to "All" and trigger species update
-            self.genus_dropdown.set("All")
-            self.update_species_dropdown()
-            
-            # Set species to "all"
-            self.species_dropdown.set("all")
-            
-            # Reset year fields
-            self.first_year_var.set("")
-            self.second_year_var.set("")
-            
-            # Update file info display
-            self.selected_file_var.set(f"✓ {filename}\n{num_records:,} Montana records loaded")
-            
-            # Stop progress bar and close loading window
-            progress.stop()
-            loading_window.destroy()
-            
-            # Show success message with detailed statistics
-            messagebox.showinfo("Success", 
-                f"File loaded successfully!\n\n"
-                f"Montana Dataset Summary:\n"
-                f"• Total Records: {num_records:,}\n"
-                f"• Unique Families: {num_families}\n"
-                f"• Unique Genera: {num_genera}\n"
-                f"• Unique Species: {num_species}\n"
-                f"• Counties Covered: {num_counties}\n"
-                f"• Year Range: {year_range}\n\n"
-                "Please select a Family to continue."
-            )
-            
-            print("✅ Excel file loaded successfully!")
-            
-        except Exception as e:
-            progress.stop()
-            loading_window.destroy()
-            self.selected_file_var.set("No file selected")
-            error_message = str(e)
-            if "No sheet named" in error_message:
-                error_message = "Invalid Excel file format. Please ensure your data is in the first sheet."
-            elif "Invalid file" in error_message:
-                error_message = "Invalid file format. Please ensure you're uploading a valid Excel (.xlsx) file."
-            
-            messagebox.showerror("Error", 
-                f"Error loading file:\n{error_message}\n\n"
-                "Please check your Excel file format and try again."
-            )
-    
-    def update_genus_dropdown(self, event=None):
-        family = self.selected_family.get().strip()
-        
-        if family == "Select Family":
-            self.genus_dropdown["values"] = []
-            self.genus_dropdown.set("Select Genus")
-            return
+        )
+        self.download_button.pack(fill='x', pady=(0, 5))
         
-        # Filter based on family selection
-        if family == "All":
-            # Get all non-empty genus values
-            filtered = self.df[self.df["genus"].notna() & (self.df["genus"].str.strip() != "")]
-        else:
-            # Get genus for specific family (case-insensitive)
-            filtered = self.df[self.df["family"].str.lower() == family.lower()]
+        grid_button = ttk.Button(
+            button_frame, 
+            text="Download Species Grid", 
+            command=self.download_grid, 
+            style='Action.TButton'
+        )
+        grid_button.pack(fill='x', pady=(0, 5))
         
-        # Get valid genera (non-empty/non-null values)
-        valid_genera = sorted(filtered["genus"].dropna().unique())
-        valid_genera = [g for g in valid_genera if str(g).strip() and str(g).lower() != 'nan']  # Remove empty strings and 'nan'
+        sweep_button = ttk.Button(
+            button_frame, 
+            text="Export Year Sweep", 
+            command=self.export_year_sweep, 
+            style='Action.TButton'
+        )
+        sweep_button.pack(fill='x', pady=(0, 5))
         
-        # Create genus list with special options
-        genus_values = ["All"] + [g.title() for g in valid_genera]
+        # Debug panel with live figure count and memory use
+        if DEBUG_MODE:
+            debug_frame = ttk.LabelFrame(left_panel, text="Debug", padding="10")
+            debug_frame.pack(fill='x', pady=(0, 20))
+            ttk.Label(debug_frame, textvariable=self.debug_var, style='TLabel', wraplength=250).pack(fill='x')
+            self.update_debug_panel()
         
-        # Update Genus dropdown
-        self.genus_dropdown["values"] = genus_values
-        self.genus_dropdown.set("Select Genus")
+        # Create right panel for map display with dynamic width
+        self.right_panel = ttk.Frame(main_container)
+        self.right_panel.pack(side='left', fill='both', expand=True)
         
-        # Reset species dropdown
-        self.species_dropdown.set("Select Species")
-        self.species_dropdown["values"] = []
-    
-    def update_species_dropdown(self, event=None):
-        family = self.selected_family.get().strip()
-        genus = self.selected_genus.get().strip()
+        # Bind resize event to the main update function
+        self.root.bind('<Configure>', self.on_window_resize)
         
-        if family == "Select Family" or genus == "Select Genus":
-            self.species_dropdown["values"] = []
-            self.species_dropdown.set("Select Species")
-            return
+        # Store initial window size
+        self.last_valid_size = {
+            'width': self.root.winfo_width(),
+            'height': self.root.winfo_height(),
+            'x': self.root.winfo_x(),
+            'y': self.root.winfo_y()
+        }
         
-        # Start with base DataFrame
-        filtered = self.df
+        # Remove the local update_panel_sizes function and use the class method instead
         
-        # Apply family filter
-        if family == "All":
-            filtered = filtered[filtered["family"].notna() & (filtered["family"].str.strip() != "")]
-        else:
-            filtered = filtered[filtered["family"].str.lower() == family.lower()]
+        # Configure scrolling
+        def on_configure(event):
+            self.scroll_canvas.configure(scrollregion=self.scroll_canvas.bbox('all'))
         
-        # Apply genus filter
-        if genus == "All":
-            filtered = filtered[filtered["genus"].notna() & (filtered["genus"].str.strip() != "")]
-        else:
-            filtered = filtered[filtered["genus"].str.lower() == genus.lower()]
+        left_panel.bind('<Configure>', on_configure)
         
-        # Get valid species (non-empty/non-null values)
-        valid_species = sorted(filtered["species"].dropna().unique())
-        valid_species = [s for s in valid_species if str(s).strip() and str(s).lower() != 'nan']  # Remove empty strings and 'nan'
+        # Enable mousewheel scrolling
+        def on_mousewheel(event):
+            self.scroll_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
         
-        # Create species list with special options - note lowercase for species
-        species_values = ["all"] + valid_species
+        self.scroll_canvas.bind_all("<MouseWheel>", on_mousewheel)
         
-        # Update Species dropdown
-        self.species_dropdown["values"] = species_values
-        self.species_dropdown.set("Select Species")
-    
-    def is_valid_color(self, color):
-        """Validate if a color string is a valid matplotlib color"""
-        try:
-            # Convert color to RGB
-            self.plt.matplotlib.colors.to_rgb(color)
-            return True
-        except ValueError:
-            return False
+        # Bind dropdowns
+        self.family_dropdown.bind("<<ComboboxSelected>>", self.update_genus_dropdown)
+        self.genus_dropdown.bind("<<ComboboxSelected>>", self.update_species_dropdown)
 
-    def validate_colors(self):
-        """Validate all selected colors"""
-        colors = {
+class DualYearAnalysis(AnalysisWindow):
+    ANALYSIS_NAME = "Dual Year Analysis"
+    TITLE_PAD = 20
+    TITLE_WRAP = False
+
+    def init_period_variables(self):
+        self.first_color = StringVar(self.root)
+        self.second_color = StringVar(self.root)
+        self.third_color = StringVar(self.root)
+        self.first_year_var = StringVar(self.root)
+        self.second_year_var = StringVar(self.root)
+        
+        self.first_color.set("grey")  # For records ≤ first year
+        self.second_color.set("red")  # For records between years
+        self.third_color.set("yellow")  # For records > second year
+
+    def reset_period_fields(self):
+        self.first_year_var.set("")
+        self.second_year_var.set("")
+
+    def period_color_fields(self):
+        return {
             'First Period': self.first_color.get(),
             'Second Period': self.second_color.get(),
             'Third Period': self.third_color.get()
         }
-        
-        invalid_colors = []
-        for name, color in colors.items():
-            if not self.is_valid_color(color):
-                invalid_colors.append(f"{name} color '{color}'")
-        
-        if invalid_colors:
-            error_msg = "Invalid colors detected:\n" + "\n".join(invalid_colors)
-            self.toast.show_toast(error_msg, duration=5000, error=True)
-            return False
-        return True
 
     def validate_years(self):
         """Validate that both years are provided and first year is less than second year"""
@@ -2539,299 +1927,14 @@ class DualYearAnalysis:
             )
             return False
 
-    def on_color_change(self, event=None):
-        """Validate colors when they change"""
-        self.validate_colors()
-
-    def generate_map(self):
-        if self.map_canvas:
-            self.map_canvas.get_tk_widget().destroy()
-        
-        # Validate colors first
-        if not self.validate_colors():
-            self.download_button.config(state="disabled")
-            return
-        
+    def split_years_and_colors(self):
         # Validate years
         if not self.validate_years():
-            self.download_button.config(state="disabled")
-            return
-        
-        gdf_copy = self.gdf.copy()
-        # Initialize all counties as white
-        gdf_copy["Color"] = "white"
-        
-        fam = self.selected_family.get().strip()
-        gen = self.selected_genus.get().strip()
-        spec = self.selected_species.get().strip()
-        first_year = int(self.first_year_var.get().strip())
-        second_year = int(self.second_year_var.get().strip())
-        
-        if not fam or fam == "Select Family" or not gen or gen == "Select Genus" or not spec or spec == "Select Species":
-            messagebox.showerror("Missing Input", "Please select Family, Genus, and Species.")
-            self.download_button.config(state="disabled")
-            return
-        
-        # Start with base DataFrame
-        filtered = self.df
-        
-        # Apply family filter
-        if fam == "All":
-            filtered = filtered[filtered["family"].notna() & (filtered["family"].str.strip() != "")]
-        elif fam == "Not Specified":
-            filtered = filtered[filtered["family"].isna() | (filtered["family"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["family"].str.lower() == fam.lower()]
-        
-        # Apply genus filter
-        if gen == "All":
-            filtered = filtered[filtered["genus"].notna() & (filtered["genus"].str.strip() != "")]
-        elif gen == "Not Specified":
-            filtered = filtered[filtered["genus"].isna() | (filtered["genus"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["genus"].str.lower() == gen.lower()]
-        
-        # Apply species filter
-        if spec == "all":
-            filtered = filtered[filtered["species"].notna() & (filtered["species"].str.strip() != "")]
-        elif spec == "not specified":
-            filtered = filtered[filtered["species"].isna() | (filtered["species"].str.strip() == "")]
-        else:
-            filtered = filtered[filtered["species"].str.lower() == spec.lower()]
-        
-        # Create a set of valid county names from the shapefile for quick lookup
-        valid_counties = set(self.standardize_county_names(gdf_copy["County"]))
-        
-        # Track unmatched counties to report to user
-        unmatched_counties = set()
-        
-        # First pass: Mark counties with records > second_year with third_color (lowest priority)
-        for county in filtered[filtered["year"] > second_year]["county"].unique():
-            county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-            if county_lower in valid_counties:
-                mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                if gdf_copy.loc[mask, "Color"].iloc[0] == "white":
-                    gdf_copy.loc[mask, "Color"] = self.third_color.get()
-            else:
-                unmatched_counties.add(county)
-        
-        # Second pass: Mark counties with records between years with second_color (medium priority)
-        for county in filtered[(filtered["year"] > first_year) & (filtered["year"] <= second_year)]["county"].unique():
-            county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-            if county_lower in valid_counties:
-                mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                gdf_copy.loc[mask, "Color"] = self.second_color.get()
-            else:
-                unmatched_counties.add(county)
-        
-        # Third pass: Mark counties with records ≤ first_year with first_color (highest priority)
-        for county in filtered[filtered["year"] <= first_year]["county"].unique():
-            county_lower = self.standardize_county_names(pd.Series([county])).iloc[0]
-            if county_lower in valid_counties:
-                mask = self.standardize_county_names(gdf_copy["County"]) == county_lower
-                gdf_copy.loc[mask, "Color"] = self.first_color.get()
-            else:
-                unmatched_counties.add(county)
-        
-        # Report any unmatched counties
-        if unmatched_counties:
-            print("\nWarning: The following counties in your Excel file don't match the shapefile counties:")
-            print("-------------------------------------------------------------------------")
-            for county in sorted(unmatched_counties):
-                print(f"• {county}")
-            print("\nValid Montana county names:")
-            print("--------------------------------")
-            for county in sorted(valid_counties):
-                print(f"• {county}")
-            print("-------------------------------------------------------------------------\n")
-            
-            messagebox.showwarning("County Name Mismatch",
-                f"Some counties in your Excel file don't match the shapefile counties.\n\n"
-                f"Number of unmatched counties: {len(unmatched_counties)}\n\n"
-                f"Please check the console output for details and ensure county names match exactly."
-            )
-        
-        # Create figure with calculated size
-        fig = self.plt.figure(figsize=(12, 11))
-        
-        # Create main map axis with sufficient space for title and legend
-        ax = fig.add_axes([0.1, 0.2, 0.8, 0.6])  # Adjusted to leave more space at top
-        gdf_copy.boundary.plot(ax=ax, linewidth=1, edgecolor="black")
-        gdf_copy.plot(ax=ax, color=gdf_copy["Color"], alpha=0.6)
-        
-        # Add title with dynamic font size
-        title = f"{fam.title()} > {gen.title()} > {spec.lower()}\nYears: {first_year} - {second_year}"
-        ax.set_title(title, fontsize=15, pad=20)
-        ax.axis("off")
-        
-        # Create a separate axis for the legend
-        legend_ax = fig.add_axes([0.2, 0.02, 0.6, 0.12])
-        legend_ax.axis('off')
-        
-        # Add a box around the legend
-        legend_box = self.plt.Rectangle((0, 0), 1, 1, 
-                                      facecolor='white', edgecolor='black',
-                                      transform=legend_ax.transAxes)
-        legend_ax.add_patch(legend_box)
-        
-        # Add horizontal bars with their descriptions
-        bar_length = 0.15
-        bar_height = 0.1
-        
-        # First period color (highest priority)
-        legend_ax.add_patch(
-            self.plt.Rectangle((0.2, 0.7), bar_length, bar_height, 
-                             facecolor=self.first_color.get(), 
-                             alpha=0.6,
-                             edgecolor='black')
-        )
-        legend_ax.text(0.4, 0.75, f"Records ≤ {first_year}", fontsize=10, va='center')
-        
-        # Second period color (medium priority)
-        legend_ax.add_patch(
-            self.plt.Rectangle((0.2, 0.4), bar_length, bar_height, 
-                             facecolor=self.second_color.get(), 
-                             alpha=0.6,
-                             edgecolor='black')
-        )
-        legend_ax.text(0.4, 0.45, f"Records {first_year+1} - {second_year}", fontsize=10, va='center')
-        
-        # Third period color (lowest priority)
-        legend_ax.add_patch(
-            self.plt.Rectangle((0.2, 0.1), bar_length, bar_height, 
-                             facecolor=self.third_color.get(), 
-                             alpha=0.6,
-                             edgecolor='black')
-        )
-        legend_ax.text(0.4, 0.15, f"Records > {second_year}", fontsize=10, va='center')
-        
-        # Set the legend axis limits
-        legend_ax.set_xlim(0, 1)
-        legend_ax.set_ylim(0, 1)
-        
-        # Adjust main plot to make room for legend
-        fig.subplots_adjust(bottom=0.2, top=0.9)
-        
-        self.map_canvas = self.FigureCanvasTkAgg(fig, master=self.right_panel)
-        self.map_canvas.draw()
-        self.map_canvas.get_tk_widget().pack(fill='both', expand=True)
-        
-        self.current_fig = fig
-        self.download_button.config(state="normal")
-        print("✅ Map generated successfully!")
-    
-    def download_map(self):
-        """Download the current map in the selected format"""
-        if not hasattr(self, 'current_fig') or self.current_fig is None:
-            messagebox.showerror("Error", "No map to download. Please generate a map first.")
-            return
-        
-        # Get export format
-        export_format = self.export_format_var.get()
-        
-        # Set up file naming
-        downloads_path = str(Path.home() / "Downloads")
-        fam = self.selected_family.get().strip().title()
-        gen = self.selected_genus.get().strip().title()
-        sp = self.selected_species.get().strip().lower()
-        first_year = self.first_year_var.get().strip()
-        second_year = self.second_year_var.get().strip()
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
-        
-        # Create filename based on format
-        if export_format == 'svg':
-            filename = f"{fam}-{gen}-{sp}_{first_year}-{second_year}_{timestamp}.svg"
-        elif export_format == 'tiff':
-            filename = f"{fam}-{gen}-{sp}_{first_year}-{second_year}_{timestamp}.tiff"
-        elif export_format == 'jpg':
-            filename = f"{fam}-{gen}-{sp}_{first_year}-{second_year}_{timestamp}.jpg"
-        else:
-            filename = f"{fam}-{gen}-{sp}_{first_year}-{second_year}_{timestamp}.tiff"  # Default fallback
-        
-        file_path = os.path.join(downloads_path, filename)
+            return None
         
-        try:
-            # Configure matplotlib settings for the export format
-            mpl.rcParams['font.family'] = 'serif'
-            mpl.rcParams['font.serif'] = ['Times New Roman', 'Times', 'DejaVu Serif', 'serif']
-            
-            # Special configuration for SVG to preserve text as editable elements
-            if export_format == 'svg':
-                mpl.rcParams['svg.fonttype'] = 'none'
-            
-            # Save the figure
-            self.current_fig.savefig(file_path, format=export_format, bbox_inches='tight', dpi=300)
-            
-            # Show success message
-            self.toast.show_toast(f'Map saved as {filename} in Downloads!')
-            print(f"✅ Map saved as {export_format} file: {file_path}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error saving map:\n{str(e)}\n\nPlease try again.")
-    
-    def on_window_resize(self, event=None):
-        try:
-            # Get current window dimensions
-            current_width = self.root.winfo_width()
-            current_height = self.root.winfo_height()
-            
-            # Only process if we have valid dimensions
-            if current_width <= 1 or current_height <= 1:
-                return
-                
-            # Store current dimensions for restoring from maximize
-            if not hasattr(self, 'last_valid_size'):
-                self.last_valid_size = {
-                    'width': current_width,
-                    'height': current_height,
-                    'x': self.root.winfo_x(),
-                    'y': self.root.winfo_y()
-                }
-            
-            # Update panels if needed
-            self.update_panel_sizes()
-                
-        except Exception as e:
-            print(f"Warning: Resize handling error: {str(e)}")  # For debugging
-            pass  # Silently handle any errors during resize
-
-    def update_panel_sizes(self):
-        try:
-            current_width = self.root.winfo_width()
-            
-            # Calculate new left panel width (20% of window width, max 300px)
-            new_left_width = min(300, max(200, int(current_width * 0.2)))
-            
-            # Update left panel container if it exists
-            if hasattr(self, 'left_panel_container'):
-                self.left_panel_container.configure(width=new_left_width)
-            
-            # Update scroll canvas if it exists and has content
-            if hasattr(self, 'scroll_canvas'):
-                try:
-                    # Only update if canvas exists and has content
-                    if self.scroll_canvas.find_all():
-                        self.scroll_canvas.configure(width=new_left_width-20)
-                        self.scroll_canvas.itemconfig(
-                            self.scroll_canvas.find_all()[0],
-                            width=new_left_width-20
-                        )
-                except tk.TclError:
-                    pass  # Handle case where canvas is being destroyed
-            
-            # Redraw map if it exists
-            if hasattr(self, 'map_canvas') and self.map_canvas:
-                try:
-                    self.map_canvas.draw()
-                except Exception:
-                    pass  # Handle any drawing errors silently
-                    
-            # Force geometry update
-            self.root.update_idletasks()
-                
-        except Exception as e:
-            print(f"Warning: Panel update error: {str(e)}")  # For debugging
-            pass  # Silently handle any errors
+        # Periods in priority order: ≤ first_year, between years, > second_year
+        split_years = [int(self.first_year_var.get().strip()), int(self.second_year_var.get().strip())]
+        return split_years, [self.first_color.get(), self.second_color.get(), self.third_color.get()]
 
     def initialize_gui(self):
         # Configure style
@@ -3024,6 +2127,9 @@ class DualYearAnalysis:
         radio_jpg = ttk.Radiobutton(export_frame, text="Compatible JPG (For All).jpg", variable=self.export_format_var, value='jpg')
         radio_jpg.pack(fill='x', pady=(0, 0))
         
+        # Map Mode Section
+        self.add_map_mode_selector(left_panel)
+        
         # Species Selection Section
         species_frame = ttk.LabelFrame(left_panel, text="Species Selection", padding="10")
         species_frame.pack(fill='x', pady=(0, 20))
@@ -3069,6 +2175,21 @@ class DualYearAnalysis:
         )
         self.download_button.pack(fill='x', pady=(0, 5))
         
+        grid_button = ttk.Button(
+            button_frame, 
+            text="Download Species Grid", 
+            command=self.download_grid, 
+            style='Action.TButton'
+        )
+        grid_button.pack(fill='x', pady=(0, 5))
+        
+        # Debug panel with live figure count and memory use
+        if DEBUG_MODE:
+            debug_frame = ttk.LabelFrame(left_panel, text="Debug", padding="10")
+            debug_frame.pack(fill='x', pady=(0, 20))
+            ttk.Label(debug_frame, textvariable=self.debug_var, style='TLabel', wraplength=250).pack(fill='x')
+            self.update_debug_panel()
+        
         # Create right panel for map display with dynamic width
         self.right_panel = ttk.Frame(main_container)
         self.right_panel.pack(side='left', fill='both', expand=True)
@@ -3101,21 +2222,6 @@ class DualYearAnalysis:
         # Bind dropdowns
         self.family_dropdown.bind("<<ComboboxSelected>>", self.update_genus_dropdown)
         self.genus_dropdown.bind("<<ComboboxSelected>>", self.update_species_dropdown)
-    
-    def go_back(self):
-        """Return to the selection screen"""
-        # Store current position and state
-        x = self.root.winfo_x()
-        y = self.root.winfo_y()
-        current_state = self.root.state()
-        self.root.destroy()
-        selection = SelectionScreen(self.root.master, self.main_app, from_analysis=True)
-        # Set position first
-        selection.root.geometry(f"{selection.root.winfo_screenwidth()}x{selection.root.winfo_screenheight()}+{x}+{y}")
-        selection.root.update()  # Force geometry update
-        # Restore the previous window state
-        if current_state == 'zoomed':
-            selection.root.state('zoomed')
 
 if __name__ == "__main__":
     app = MainApplication()
\ No newline at end of file
@@ -0,0 +1,141 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Lean build profile: bundles only what the application actually uses.
+#
+# Compared to GUI_MAP_Generator.spec this
+#   - ships only the County.* files of MontanaCounties_shp (not the national
+#     shapefiles/cb_2021_us_county_5m dataset or CountyLines)
+#   - lets the matplotlib hook collect just the TkAgg, Agg and SVG backends
+#     instead of every matplotlib and geopandas submodule
+#   - drops matplotlib sample data and the PDF/PS, STIX and Computer Modern fonts
+#   - skips UPX, which has to be undone on every launch
+#
+# Build:  pyinstaller --clean --noconfirm GUI_MAP_Generator_lean.spec
+# Set MAP_GENERATOR_ONEDIR=1 for a one-folder build that starts without
+# unpacking to a temp directory. Measure either with bundle_report.py.
+import os
+
+APP_NAME = 'Montana_County_Map_Generator_Lean'
+ONEDIR = os.environ.get('MAP_GENERATOR_ONEDIR') == '1'
+
+# Only the shapefile components geopandas reads
+shapefile_dir = os.path.join(SPECPATH, 'MontanaCounties_shp')
+datas = [
+    (os.path.join(shapefile_dir, name), 'MontanaCounties_shp')
+    for name in os.listdir(shapefile_dir)
+    if name.startswith('County.') and os.path.splitext(name)[1].lower() in ('.shp', '.shx', '.dbf', '.prj', '.cpg')
+]
+datas.append(('app_icon.ico', '.'))
+
+hiddenimports = [
+    'matplotlib.backends.backend_tkagg',
+    'matplotlib.backends.backend_agg',
+    'matplotlib.backends.backend_svg',  # SVG export
+    'pyogrio',                          # Shapefile reads when the geometry cache is cold
+    'openpyxl',                         # pandas loads Excel engines dynamically
+]
+
+# Faster Excel engine, when installed
+try:
+    import python_calamine  # noqa: F401
+    hiddenimports.append('python_calamine')
+except ImportError:
+    pass
+
+# Stdlib unittest, doctest and pydoc stay: pyparsing (imported by matplotlib)
+# and other dependencies import them at runtime, and they are small
+excludes = [
+    # Development and packaging tools
+    'test',
+    'tests',
+    'pytest',
+    'IPython',
+    'jupyter',
+    'notebook',
+    'sphinx',
+    'setuptools',
+    'distutils',
+    'pip',
+    'wheel',
+    'virtualenv',
+    'venv',
+    # Other GUI toolkits and matplotlib backends
+    'PyQt5',
+    'PyQt6',
+    'PySide2',
+    'PySide6',
+    'wx',
+    'gi',
+    'cairo',
+    'tornado',
+    # Optional pandas/geopandas integrations the application does not use
+    'fiona',
+    'pyarrow',  # Parquet input; CSV/TSV and Excel still load without it
+    'scipy',
+    'sqlalchemy',
+    'jinja2',
+    'lxml',
+    'tables',
+    'fsspec',
+    # Bundled test suites
+    'matplotlib.tests',
+    'pandas.tests',
+    'geopandas.tests',
+    'shapely.tests',
+    'pyproj.tests',
+]
+
+a = Analysis(
+    ['GUI_MAP_Generator.py'],
+    pathex=[],
+    binaries=[],
+    datas=datas,
+    hiddenimports=hiddenimports,
+    hookspath=[],
+    hooksconfig={
+        'matplotlib': {
+            'backends': ['TkAgg', 'Agg', 'SVG'],
+        },
+    },
+    runtime_hooks=[],
+    excludes=excludes,
+    noarchive=False,
+    optimize=0,  # Docstrings are required by some dependencies
+)
+
+# Data files the application never reads
+UNUSED_DATA = (
+    'matplotlib/mpl-data/sample_data/',
+    'matplotlib/mpl-data/plot_directive/',
+    'matplotlib/mpl-data/fonts/afm/',
+    'matplotlib/mpl-data/fonts/pdfcorefonts/',
+    'matplotlib/mpl-data/fonts/ttf/STIX',
+    'matplotlib/mpl-data/fonts/ttf/cm',
+    'geopandas/datasets/',
+)
+a.datas = [entry for entry in a.datas if not entry[0].replace('\\', '/').startswith(UNUSED_DATA)]
+
+pyz = PYZ(a.pure, cipher=None)
+
+exe_options = dict(
+    name=APP_NAME,
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,  # UPX-compressed DLLs are decompressed on every launch
+    console=False,  # No console window
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon='app_icon.ico',
+    version_file='version_info.txt',
+    uac_admin=False,
+    uac_uiaccess=False,
+)
+
+if ONEDIR:
+    exe = EXE(pyz, a.scripts, [], exclude_binaries=True, **exe_options)
+    coll = COLLECT(exe, a.binaries, a.datas, strip=False, upx=False, name=APP_NAME)
+else:
+    exe = EXE(pyz, a.scripts, a.binaries, a.datas, [], runtime_tmpdir=None, **exe_options)
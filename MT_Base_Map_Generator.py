@@ -1,11 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import geopandas as gpd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import pandas as pd
 from shapely.geometry import Point
 import os
+import map_engine
 
 class MontanaBaseMapGenerator:
     def __init__(self, root):
@@ -52,6 +52,13 @@ class MontanaBaseMapGenerator:
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.map_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
+        # The county layer is plotted once and shown or hidden; each state
+        # ("blank" or "base") is cached as a bitmap at the current canvas size
+        self.base_layer = None
+        self.state = "blank"
+        self.bitmaps = {}
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        
         # Configure grid weights
         self.root.grid_rowconfigure(0, weight=1)
         self.root.grid_columnconfigure(0, weight=1)
@@ -70,20 +77,39 @@ class MontanaBaseMapGenerator:
         self.ax.set_facecolor('white')
         self.fig.patch.set_facecolor('white')
         self.ax.axis('off')
-        self.canvas.draw()
+        self.show_state("blank")
 
     def clear_map(self):
         """Clear the map and return to blank white canvas"""
-        self.initialize_blank_canvas()
+        self.show_state("blank")
+
+    def canvas_size(self):
+        return (int(self.fig.bbox.width), int(self.fig.bbox.height))
+
+    def on_draw(self, event):
+        """Cache the bitmap of the state just drawn, dropping bitmaps of other canvas sizes"""
+        size = self.canvas_size()
+        self.bitmaps = {key: bitmap for key, bitmap in self.bitmaps.items() if key[1] == size}
+        self.bitmaps[(self.state, size)] = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def show_state(self, state):
+        """Show the blank canvas or the base map, blitting its cached bitmap when there is one"""
+        self.state = state
+        if self.base_layer is not None:
+            self.base_layer.set_visible(state == "base")
+        
+        bitmap = self.bitmaps.get((state, self.canvas_size()))
+        if bitmap is not None:
+            self.canvas.restore_region(bitmap)
+            self.canvas.blit(self.fig.bbox)
+        else:
+            self.canvas.draw()
 
     def load_montana_boundary(self):
         try:
-            # Load Montana counties shapefile
+            # Load Montana counties and the dissolved state boundary from the shared geometry cache
             counties_path = "MontanaCounties_shp/County.shp"
-            self.counties_gdf = gpd.read_file(counties_path)
-            
-            # Create state boundary by dissolving all counties
-            self.montana_gdf = self.counties_gdf.dissolve(by=None, aggfunc='first')
+            self.counties_gdf, self.montana_gdf = map_engine.load_county_geometry(counties_path)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load Montana boundary: {str(e)}")
@@ -95,14 +121,20 @@ class MontanaBaseMapGenerator:
             messagebox.showerror("Error", "Montana boundary data not loaded!")
             return
         
-        # Clear the current plot
-        self.ax.clear()
+        # The line work never changes, so it is plotted only on the first call
+        if self.base_layer is None:
+            self.build_base_layer()
         
+        self.show_state("base")
+
+    def build_base_layer(self):
+        """Plot the counties once; later calls only toggle their visibility"""
         # Plot all counties with white fill and black boundaries
         self.counties_gdf.plot(ax=self.ax,
                              color='white',      # White fill for counties
                              edgecolor='black',  # Black boundary lines
                              linewidth=1.0)      # Thin, crisp lines
+        self.base_layer = self.ax.collections[-1]
         
         # Set white background
         self.ax.set_facecolor('white')
@@ -122,9 +154,6 @@ class MontanaBaseMapGenerator:
         
         # Set aspect ratio to equal for proper geographic display
         self.ax.set_aspect('equal')
-        
-        # Update the canvas
-        self.canvas.draw()
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,256 @@
+"""
+Stage benchmarks for the map generator at growing record counts.
+
+Times each stage of making a map: shapefile load, record ingest from Excel,
+CSV and Parquet, county normalization, taxon filtering, county
+classification, figure build and 300 DPI TIFF/SVG/JPG export. Record stages
+run on synthetic datasets of each size from generate_occurrences.py, or on
+rows resampled from a source file with --source. Results can be saved as
+JSON and compared against a saved baseline; the run fails when a stage got
+slower than the tolerance allows.
+
+Examples:
+    python benchmark_report.py
+    python benchmark_report.py --source "All MT bumble bees-databases combined-Ahmad.xlsx"
+    python benchmark_report.py --sizes 10000 100000 --json bench.json
+    python benchmark_report.py --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import generate_occurrences
+import map_engine
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+EXPORT_FORMATS = ["tiff", "svg", "jpg"]
+
+# Selection and split years used by the filter, classification and figure stages
+BENCH_TAXON = ("all", "bombus", "all")
+BENCH_SPLIT_YEARS = [1950, 1980, 2000, 2010]
+
+
+def get_base_dir():
+    """Directory holding the bundled data files"""
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Time the load, filter, classify and render stages of the map generator."
+    )
+    parser.add_argument("--source",
+                        help="Workbook, CSV/TSV or Parquet file to resample the datasets from "
+                             "(default: generated occurrence records)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, metavar="N",
+                        help="Synthetic dataset sizes in records (default: 10000 100000 1000000)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per stage; the median is reported (default: 3)")
+    parser.add_argument("--max-excel-rows", type=int, default=100_000,
+                        help="Largest dataset also written and ingested as .xlsx (default: 100000)")
+    parser.add_argument("--dpi", type=int, default=300, help="Export resolution (default: 300)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator or resampling seed (default: 0)")
+    parser.add_argument("--workdir", help="Directory for the synthetic datasets and exports (default: a temporary one)")
+    parser.add_argument("--json", dest="json_path", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against the JSON of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline as a fraction (default: 0.25)")
+    return parser
+
+
+class StageTimer:
+    """Runs stages and keeps the median time of each (stage, size)"""
+
+    def __init__(self, repeat):
+        self.repeat = max(1, repeat)
+        self.results = []
+
+    def time(self, stage, size, func, repeat=None):
+        """Median seconds of func() over the repeats; returns the result of the last run"""
+        seconds = []
+        for _ in range(repeat or self.repeat):
+            start = time.perf_counter()
+            result = func()
+            seconds.append(time.perf_counter() - start)
+        median = statistics.median(seconds)
+        self.results.append({"stage": stage, "size": size, "seconds": median})
+        size_info = f"{size:>10,}" if size else f"{'-':>10}"
+        print(f"{stage:<28} {size_info} {median * 1000:>11.1f} ms")
+        return result
+
+
+def synthetic_records(source, n_records, county_names, seed):
+    """n_records raw rows: generated occurrences, or resampled (with replacement) from source"""
+    if source is None:
+        return generate_occurrences.generate_records(n_records, county_names, seed=seed)
+    return source.sample(n=n_records, replace=True, random_state=seed).reset_index(drop=True)
+
+
+def read_source(path):
+    """Raw (unnormalized) rows of the required columns of a record file"""
+    import pandas as pd
+
+    file_format = map_engine.input_format(path)
+    if file_format == "excel":
+        raw = map_engine.read_workbook(path)
+    elif file_format == "parquet":
+        raw = pd.concat(block for block, _, _ in map_engine.read_parquet_blocks(path))
+    else:
+        raw = pd.concat(block for block, _, _ in map_engine.read_delimited_blocks(path))
+    raw.columns = raw.columns.str.strip()
+    return raw[map_engine.REQUIRED_COLUMNS]
+
+
+def write_datasets(raw, workdir, n_records, max_excel_rows):
+    """Write one synthetic dataset in each input format; returns {format: path}"""
+    paths = {
+        "csv": os.path.join(workdir, f"records_{n_records}.csv"),
+        "parquet": os.path.join(workdir, f"records_{n_records}.parquet"),
+    }
+    generate_occurrences.write_records(raw, paths["csv"])
+    try:
+        generate_occurrences.write_records(raw, paths["parquet"])
+    except ImportError:
+        del paths["parquet"]
+        print("pyarrow is not installed; the Parquet ingest stage is skipped.")
+    if n_records <= max_excel_rows:
+        paths["xlsx"] = os.path.join(workdir, f"records_{n_records}.xlsx")
+        generate_occurrences.write_records(raw, paths["xlsx"])
+    return paths
+
+
+def run_record_stages(timer, raw, n_records, counties, args, workdir):
+    """Ingest, normalization, filtering and classification stages for one dataset size"""
+    valid_counties = set(counties["county_key"])
+    county_keys = counties["county_key"]
+
+    write_start = time.perf_counter()
+    paths = write_datasets(raw, workdir, n_records, args.max_excel_rows)
+    print(f"  (wrote {', '.join(sorted(paths))} datasets in {time.perf_counter() - write_start:.1f}s)")
+
+    for file_format, path in sorted(paths.items()):
+        timer.time(f"ingest {file_format}", n_records,
+                   lambda: map_engine.load_records(path, valid_counties, use_cache=False))
+
+    records = timer.time("normalize counties", n_records, lambda: map_engine.normalize_records(raw, valid_counties))
+    timer.time("taxon filter (records)", n_records, lambda: map_engine.filter_taxon(records, *BENCH_TAXON))
+
+    periods, labels = map_engine.year_periods(BENCH_SPLIT_YEARS)
+    colors = map_engine.default_period_colors(len(periods))
+    timer.time("classify (records)", n_records,
+               lambda: map_engine.county_colors(map_engine.filter_taxon(records, *BENCH_TAXON),
+                                                county_keys, periods, colors))
+
+    summary = timer.time("summary build", n_records, lambda: map_engine.TaxonCountySummary(records))
+    timer.time("taxon filter (summary)", n_records, lambda: summary.select(*BENCH_TAXON))
+    timer.time("classify (summary)", n_records,
+               lambda: summary.split_year_colors(*BENCH_TAXON, county_keys, BENCH_SPLIT_YEARS, colors))
+    timer.time("classify richness", n_records,
+               lambda: summary.county_values(*BENCH_TAXON, county_keys, "richness"))
+    return summary
+
+
+def run_figure_stages(timer, counties, summary, args, workdir):
+    """Figure build, recolor and export stages; independent of the dataset size"""
+    spec = map_engine.MapSpec(*BENCH_TAXON, BENCH_SPLIT_YEARS)
+    view, _ = timer.time("figure build", None, lambda: map_engine.render(counties, summary, spec))
+    timer.time("figure recolor", None, lambda: map_engine.render(counties, summary, spec, view=view))
+
+    for export_format in EXPORT_FORMATS:
+        map_engine.configure_export_fonts(export_format)
+        path = os.path.join(workdir, spec.filename(export_format))
+        timer.time(f"export {export_format} {args.dpi} dpi", None,
+                   lambda: view.savefig(path, format=export_format, bbox_inches='tight', dpi=args.dpi))
+
+
+def environment():
+    """Versions that affect the timings"""
+    import matplotlib
+    import pandas as pd
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "excel_engine": map_engine.excel_engine() or "openpyxl",
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Print the change of every stage against a baseline; returns the regressed stages"""
+    with open(baseline_path) as f:
+        baseline = {(entry["stage"], entry["size"]): entry["seconds"] for entry in json.load(f)["results"]}
+
+    print(f"\nAgainst {baseline_path} (tolerance +{tolerance:.0%}):")
+    regressions = []
+    for entry in results:
+        before = baseline.get((entry["stage"], entry["size"]))
+        if not before:
+            continue
+        change = entry["seconds"] / before - 1
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(entry)
+        size_info = f"{entry['size']:>10,}" if entry["size"] else f"{'-':>10}"
+        print(f"{entry['stage']:<28} {size_info} {change:>+8.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main(argv=None):
+    import matplotlib
+    matplotlib.use("Agg")
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.source and not os.path.exists(args.source):
+        parser.error(f"Source file not found: {args.source}")
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        return run(args, args.workdir)
+    with tempfile.TemporaryDirectory(prefix="map_benchmarks_") as workdir:
+        return run(args, workdir)
+
+
+def run(args, workdir):
+    """Run every stage with the datasets and exports in workdir; returns the exit code"""
+    timer = StageTimer(args.repeat)
+
+    print(f"{'stage':<28} {'records':>10} {'median':>14}")
+    shapefile_path = os.path.join(get_base_dir(), "MontanaCounties_shp", "County.shp")
+    timer.time("shapefile load", None,
+               lambda: map_engine.load_county_geometry(shapefile_path, use_cache=False))
+    counties, _ = timer.time("shapefile load (cached)", None,
+                             lambda: map_engine.load_county_geometry(shapefile_path))
+    county_names = generate_occurrences.shapefile_county_names(shapefile_path)
+    counties = map_engine.prepare_counties(counties)
+
+    source = read_source(args.source) if args.source else None
+    summary = None
+    for n_records in args.sizes:
+        raw = synthetic_records(source, n_records, county_names, args.seed)
+        summary = run_record_stages(timer, raw, n_records, counties, args, workdir)
+    if summary is not None:
+        run_figure_stages(timer, counties, summary, args, workdir)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"environment": environment(), "sizes": args.sizes, "dpi": args.dpi,
+                       "results": timer.results}, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+    if args.baseline:
+        regressions = compare(timer.results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than the baseline allows.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
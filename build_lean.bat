@@ -0,0 +1,13 @@
+@echo off
+echo Building lean Montana County Map Generator...
+echo.
+
+if exist "build" rmdir /s /q "build"
+
+pyinstaller --clean --noconfirm GUI_MAP_Generator_lean.spec
+
+echo.
+echo Build completed! Check dist/Montana_County_Map_Generator_Lean.exe
+echo Measuring bundle size and launch time...
+python bundle_report.py dist/Montana_County_Map_Generator_Lean.exe
+pause
@@ -0,0 +1,191 @@
+"""
+Size and launch-time report for PyInstaller builds of the map generator.
+
+Lists the largest parts of a build and launches it with --profile-startup to
+measure how long one-file extraction and interpreter start-up take before the
+application code runs, and how long until the app is ready.
+
+Examples:
+    python bundle_report.py dist/Montana_County_Map_Generator_Lean.exe
+    python bundle_report.py dist/Montana_County_Map_Generator.exe dist/Montana_County_Map_Generator_Lean.exe
+    python bundle_report.py dist/Montana_County_Map_Generator_Lean --runs 5
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Report the size and launch time of PyInstaller builds."
+    )
+    parser.add_argument("builds", nargs="+",
+                        help="One-file executable or one-folder build directory to measure")
+    parser.add_argument("--runs", type=int, default=3, help="Launches to time per build (default: 3)")
+    parser.add_argument("--top", type=int, default=15, help="Largest bundle parts to list (default: 15)")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="Seconds to wait for a launch to finish loading (default: 120)")
+    parser.add_argument("--size-only", action="store_true", help="Skip the launch timing")
+    return parser
+
+
+def format_mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def find_executable(build):
+    """Executable of a build: the file itself, or the .exe/binary named after a one-folder build"""
+    if os.path.isfile(build):
+        return build
+    name = os.path.basename(os.path.normpath(build))
+    for candidate in (name + ".exe", name):
+        path = os.path.join(build, candidate)
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(f"No executable found in {build}")
+
+
+def bundle_contents(build):
+    """(name, size) of everything in a build; sizes are uncompressed where known"""
+    if os.path.isdir(build):
+        contents = []
+        for root, _, files in os.walk(build):
+            for name in files:
+                path = os.path.join(root, name)
+                contents.append((os.path.relpath(path, build), os.path.getsize(path)))
+        return contents
+
+    # One-file build: list the embedded archive (PyInstaller 6 table of contents)
+    try:
+        from PyInstaller.archive.readers import CArchiveReader
+    except ImportError:
+        print("PyInstaller is not installed; listing the one-file archive is skipped.")
+        return []
+    try:
+        archive = CArchiveReader(build)
+        return [(name, entry[2]) for name, entry in archive.toc.items()]
+    except Exception as e:
+        print(f"Could not read the archive of {build}: {str(e)}")
+        return []
+
+
+def group_contents(contents):
+    """Total size per top-level package or folder, largest first"""
+    groups = {}
+    for name, size in contents:
+        parts = name.replace("\\", "/").split("/")
+        key = parts[0] if len(parts) > 1 else "(top level)"
+        if key == "_internal" and len(parts) > 2:
+            key = parts[1]  # One-folder builds keep everything under _internal
+        groups[key] = groups.get(key, 0) + size
+    return sorted(groups.items(), key=lambda item: -item[1])
+
+
+def launch_once(executable, timeout):
+    """
+    Launch with --profile-startup and wait for the report.
+
+    Returns (seconds until the application code started, seconds until ready),
+    measured from the moment the process was launched.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, "startup_profile.json")
+        launched = time.time()
+        popen_options = {}
+        if os.name == "nt":
+            popen_options["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            popen_options["start_new_session"] = True
+        process = subprocess.Popen([executable, f"--profile-startup={report_path}"], **popen_options)
+
+        try:
+            report = None
+            deadline = launched + timeout
+            while time.time() < deadline:
+                if os.path.exists(report_path):
+                    try:
+                        with open(report_path) as f:
+                            report = json.load(f)
+                        break
+                    except ValueError:
+                        pass  # Still being written
+                if process.poll() is not None:
+                    raise RuntimeError(f"{executable} exited with code {process.returncode} before it was ready")
+                time.sleep(0.05)
+            if report is None:
+                raise TimeoutError(f"{executable} was not ready within {timeout:.0f}s")
+        finally:
+            stop_process(process)
+
+    started = report["startup_epoch"] - launched
+    ready = started + report["milestones"]["ready"]
+    return started, ready
+
+
+def stop_process(process):
+    """Stop the launched app, including the child process of a one-file build"""
+    if process.poll() is not None:
+        return
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+    else:
+        os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def report_build(build, args):
+    print(f"=== {build}")
+    contents = bundle_contents(build)
+    total = sum(size for _, size in contents) if os.path.isdir(build) else os.path.getsize(build)
+    print(f"Bundle size on disk: {format_mb(total)}")
+
+    if contents:
+        if os.path.isfile(build):
+            unpacked = sum(size for _, size in contents)
+            print(f"Unpacked to the temp directory on every launch: {format_mb(unpacked)}")
+        print("Largest parts:")
+        for name, size in group_contents(contents)[:args.top]:
+            print(f"  {name:<40}{format_mb(size):>10}")
+
+    if args.size_only:
+        return
+
+    executable = find_executable(build)
+    starts, readies = [], []
+    for run in range(args.runs):
+        started, ready = launch_once(executable, args.timeout)
+        starts.append(started)
+        readies.append(ready)
+        print(f"  run {run + 1}: app code started after {started:.2f}s, ready after {ready:.2f}s")
+
+    label = "Extraction + interpreter start" if os.path.isfile(build) else "Interpreter start"
+    print(f"{label}: median {statistics.median(starts):.2f}s (min {min(starts):.2f}s)")
+    print(f"Ready: median {statistics.median(readies):.2f}s (min {min(readies):.2f}s)")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    for build in args.builds:
+        if not os.path.exists(build):
+            print(f"Build not found: {build}", file=sys.stderr)
+            return 1
+        try:
+            report_build(build, args)
+        except (RuntimeError, TimeoutError, FileNotFoundError) as e:
+            print(f"Error measuring {build}: {str(e)}", file=sys.stderr)
+            return 1
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
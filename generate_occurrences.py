@@ -0,0 +1,244 @@
+"""
+Synthetic occurrence records for scale-testing the record loaders and maps.
+
+Writes county, family, genus, species and year records of any size as Excel,
+CSV/TSV or Parquet, so load_records() and map generation can be stress-tested
+offline. Counties are drawn from the names in County.shp, and taxa from a
+list of Montana bees. Both follow skewed (Zipf) frequencies, so a few
+counties and species hold most records, and recent years are sampled most.
+A fraction of rows is written the way real exports are: "Lewis & Clark",
+stray whitespace, mixed case, dates or "Pre 2016" in the year column,
+missing species and counties from neighboring states.
+
+Examples:
+    python generate_occurrences.py 100000 synthetic.csv
+    python generate_occurrences.py 1000000 big.parquet big.csv --seed 7
+    python generate_occurrences.py 50000 dirty.xlsx --dirty-fraction 0.2
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import map_engine
+
+# Montana bee taxa (family, genus, species), most of them Bombus as in the combined database
+TAXA = [("Apidae", "Bombus", species) for species in [
+    "appositus", "auricomus", "bifarius", "bimaculatus", "borealis", "centralis", "fernaldae",
+    "fervidus", "flavidus", "flavifrons", "frigidus", "griseocollis", "huntii", "insularis",
+    "melanopygus", "mixtus", "morrisoni", "nevadensis", "occidentalis", "pensylvanicus",
+    "perplexus", "rufocinctus", "suckleyi", "sylvicola", "ternarius", "terricola", "vagans",
+]] + [
+    ("Apidae", "Apis", "mellifera"),
+    ("Apidae", "Xylocopa", "varipuncta"),
+    ("Apidae", "Anthophora", "terminalis"),
+    ("Apidae", "Melissodes", "agilis"),
+    ("Halictidae", "Halictus", "rubicundus"),
+    ("Halictidae", "Halictus", "ligatus"),
+    ("Halictidae", "Lasioglossum", "zonulum"),
+    ("Halictidae", "Agapostemon", "texanus"),
+    ("Megachilidae", "Osmia", "lignaria"),
+    ("Megachilidae", "Osmia", "bucephala"),
+    ("Megachilidae", "Megachile", "rotundata"),
+    ("Megachilidae", "Anthidium", "manicatum"),
+    ("Andrenidae", "Andrena", "prunorum"),
+    ("Andrenidae", "Andrena", "nigrihirta"),
+    ("Colletidae", "Colletes", "fulgidus"),
+    ("Colletidae", "Hylaeus", "modestus"),
+]
+
+# Counties of neighboring states, none of which share a name with a Montana county
+OUT_OF_STATE_COUNTIES = ["Ada", "Kootenai", "Bonneville", "Latah", "Natrona", "Laramie", "Burleigh", "Pennington"]
+
+DIRTY_FRACTION = 0.05
+OUT_OF_STATE_FRACTION = 0.02
+MISSING_SPECIES_FRACTION = 0.01
+TAXON_SKEW = 1.1
+COUNTY_SKEW = 0.8
+YEAR_RANGE = (1900, 2023)
+
+OUTPUT_EXTENSIONS = [".xlsx", ".csv", ".tsv", ".txt", ".parquet"]
+
+# Largest number of data rows Excel accepts below the header
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def get_base_dir():
+    """Directory holding the bundled data files"""
+    if getattr(sys, 'frozen', False):
+        return sys._MEIPASS
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Write synthetic Montana occurrence records for scale testing."
+    )
+    parser.add_argument("records", type=int, help="Number of records to generate")
+    parser.add_argument("outputs", nargs="+",
+                        help="Output files; .xlsx, .csv/.tsv/.txt or .parquet, by extension")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--dirty-fraction", type=float, default=DIRTY_FRACTION,
+                        help=f"Rows with messy county, taxon and year spellings (default: {DIRTY_FRACTION})")
+    parser.add_argument("--out-of-state-fraction", type=float, default=OUT_OF_STATE_FRACTION,
+                        help=f"Rows in counties of neighboring states (default: {OUT_OF_STATE_FRACTION})")
+    parser.add_argument("--missing-species-fraction", type=float, default=MISSING_SPECIES_FRACTION,
+                        help=f"Rows without a species (default: {MISSING_SPECIES_FRACTION})")
+    parser.add_argument("--extra-species", type=int, default=0, metavar="N",
+                        help="Add N morphospecies (sp001, ...) spread over the genera for richness tests")
+    parser.add_argument("--taxon-skew", type=float, default=TAXON_SKEW,
+                        help=f"Zipf exponent of the taxon frequencies; 0 is uniform (default: {TAXON_SKEW})")
+    parser.add_argument("--years", type=int, nargs=2, default=list(YEAR_RANGE), metavar=("FIRST", "LAST"),
+                        help=f"Record year range (default: {YEAR_RANGE[0]} {YEAR_RANGE[1]})")
+    return parser
+
+
+def shapefile_county_names(shapefile_path=None):
+    """County display names from County.shp ("Lewis and Clark", ...)"""
+    if shapefile_path is None:
+        shapefile_path = os.path.join(get_base_dir(), "MontanaCounties_shp", "County.shp")
+    counties, _ = map_engine.load_county_geometry(shapefile_path)
+    if "NAMELABEL" in counties.columns:
+        return sorted(counties["NAMELABEL"].str.strip())
+    return sorted(counties["NAME"].str.strip().str.title())
+
+
+def with_extra_species(taxa, n_extra):
+    """taxa plus n_extra morphospecies assigned round-robin to its genera"""
+    genera = sorted({(family, genus) for family, genus, _ in taxa})
+    extra = [(*genera[i % len(genera)], f"sp{i + 1:03d}") for i in range(n_extra)]
+    return list(taxa) + extra
+
+
+def zipf_weights(n, exponent, rng):
+    """Probabilities proportional to 1 / rank ** exponent, with the ranks shuffled"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def _dirty_county_variants(name):
+    """Spellings of one county name seen in record exports"""
+    return [
+        name.replace(" and ", " & "),
+        f"  {name}",
+        f"{name} ",
+        name.upper(),
+        name.lower(),
+    ]
+
+
+def _dirty_years(years, rng):
+    """Years written as a date, a US date or "Pre YYYY" instead of a number"""
+    months = rng.integers(4, 10, len(years))
+    days = rng.integers(1, 29, len(years))
+    styles = rng.integers(0, 3, len(years))
+    return [
+        f"{year}-{month:02d}-{day:02d}" if style == 0 else f"{month}/{day}/{year}" if style == 1 else f"Pre {year}"
+        for year, month, day, style in zip(years, months, days, styles)
+    ]
+
+
+def generate_records(n_records, county_names, seed=0, taxa=TAXA,
+                     dirty_fraction=DIRTY_FRACTION,
+                     out_of_state_fraction=OUT_OF_STATE_FRACTION,
+                     missing_species_fraction=MISSING_SPECIES_FRACTION,
+                     taxon_skew=TAXON_SKEW, year_range=YEAR_RANGE):
+    """
+    Raw occurrence records with the required columns, as found in a record export.
+
+    Taxa and counties are drawn with Zipf frequencies and years with an
+    exponential bias towards year_range's end. Dirty rows get a messy
+    county spelling, a capitalized genus with trailing space and a date or
+    "Pre YYYY" string as year; the year column is then of object dtype.
+    """
+    rng = np.random.default_rng(seed)
+    county_names = np.asarray(county_names, dtype=object)
+    taxa = np.asarray(taxa, dtype=object)
+
+    county_index = rng.choice(len(county_names), n_records, p=zipf_weights(len(county_names), COUNTY_SKEW, rng))
+    taxon_index = rng.choice(len(taxa), n_records, p=zipf_weights(len(taxa), taxon_skew, rng))
+
+    first_year, last_year = year_range
+    ages = rng.exponential((last_year - first_year) / 4, n_records).astype(int)
+    years = np.clip(last_year - ages, first_year, last_year)
+
+    records = pd.DataFrame({
+        "county": county_names[county_index],
+        "family": taxa[taxon_index, 0],
+        "genus": taxa[taxon_index, 1],
+        "species": taxa[taxon_index, 2],
+        "year": years,
+    })
+
+    dirty = np.flatnonzero(rng.random(n_records) < dirty_fraction)
+    if len(dirty):
+        variants = np.array([_dirty_county_variants(name) for name in county_names], dtype=object)
+        choice = rng.integers(0, variants.shape[1], len(dirty))
+        records.loc[dirty, "county"] = variants[county_index[dirty], choice]
+        records.loc[dirty, "genus"] = [f"{genus.upper()} " for genus in records["genus"].to_numpy()[dirty]]
+        records["year"] = records["year"].astype(object)
+        records.loc[dirty, "year"] = _dirty_years(years[dirty], rng)
+
+    out_of_state = rng.random(n_records) < out_of_state_fraction
+    records.loc[out_of_state, "county"] = rng.choice(OUT_OF_STATE_COUNTIES, int(out_of_state.sum()))
+    records.loc[rng.random(n_records) < missing_species_fraction, "species"] = np.nan
+    return records
+
+
+def write_records(records, path):
+    """Write records as Excel, CSV/TSV or Parquet, by path's extension"""
+    file_format = map_engine.input_format(path)
+    if file_format == "excel":
+        if len(records) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} records; use CSV or Parquet for {path}")
+        records.to_excel(path, index=False)
+    elif file_format == "parquet":
+        # Dirty years mix numbers and strings; Parquet columns need one type
+        if records["year"].dtype == object:
+            records = records.astype({"year": str})
+        records.to_parquet(path, index=False)
+    else:
+        records.to_csv(path, index=False, sep="\t" if path.lower().endswith(".tsv") else ",")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.records < 1:
+        parser.error("The number of records must be positive.")
+    if args.years[0] > args.years[1]:
+        parser.error("First year must not be after the last year.")
+    for path in args.outputs:
+        if os.path.splitext(path)[1].lower() not in OUTPUT_EXTENSIONS:
+            parser.error(f"Unsupported output file type: {path} (use {', '.join(OUTPUT_EXTENSIONS)})")
+
+    start = time.perf_counter()
+    taxa = with_extra_species(TAXA, args.extra_species)
+    records = generate_records(
+        args.records, shapefile_county_names(), seed=args.seed,
+        taxa=taxa,
+        dirty_fraction=args.dirty_fraction,
+        out_of_state_fraction=args.out_of_state_fraction,
+        missing_species_fraction=args.missing_species_fraction,
+        taxon_skew=args.taxon_skew,
+        year_range=tuple(args.years),
+    )
+    print(f"Generated {len(records):,} records of {len(taxa)} taxa in {time.perf_counter() - start:.1f}s")
+
+    for path in args.outputs:
+        start = time.perf_counter()
+        try:
+            write_records(records, path)
+        except (ValueError, ImportError) as e:
+            print(f"Error writing {path}: {str(e)}", file=sys.stderr)
+            return 1
+        print(f"✅ Records saved: {path} ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1597 @@
+"""
+Shared map engine for the Montana County Distribution Map Generator.
+
+Holds the data and coloring logic used by the analysis windows so that it
+can be reused without any Tk widgets. The headless pipeline is
+load_records() → TaxonCountySummary → MapSpec → render(), which the GUI
+windows and Batch_Map_Generator.py both call.
+"""
+import datetime
+import hashlib
+import json
+import math
+import os
+import pickle
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Bump when the layout of any on-disk cache changes
+CACHE_VERSION = 2
+
+# Simplification tolerance in shapefile units (metres, Montana State Plane).
+# Well below one pixel even for 300 DPI exports of the whole state.
+SIMPLIFY_TOLERANCE = 50.0
+
+
+def standardize_county_names(county_series):
+    """
+    Standardize county names by:
+    1. Converting '&' to 'and'
+    2. Stripping whitespace
+    3. Converting to lowercase
+    """
+    return county_series.str.strip().str.lower().str.replace('&', 'and')
+
+
+def period_mask(years, lower=None, upper=None):
+    """Boolean mask of records with lower < year <= upper (None means unbounded)"""
+    if lower is None and upper is None:
+        # An open period covers every record, including ones without a year
+        return np.ones(len(years), dtype=bool)
+    # Comparisons on the nullable year column are NA for missing years
+    mask = years.notna().to_numpy().copy()
+    if lower is not None:
+        mask &= (years > lower).to_numpy(dtype=bool, na_value=False)
+    if upper is not None:
+        mask &= (years <= upper).to_numpy(dtype=bool, na_value=False)
+    return mask
+
+
+def classify_counties(records, county_keys, periods):
+    """
+    Assign every shapefile county to the highest-priority period it has records in.
+
+    records are normalized (see normalize_records()). periods is a list of
+    (lower, upper) year bounds ordered from highest to lowest priority.
+    Returns a Series of period indexes aligned with county_keys (-1 for
+    counties without records) and the set of record counties that are not
+    present in county_keys.
+    """
+    if len(records) == 0:
+        return pd.Series(-1, index=county_keys.index), set()
+
+    # One membership column per period, reduced per county in a single groupby
+    membership = pd.DataFrame(
+        {i: period_mask(records["year"], lower, upper) for i, (lower, upper) in enumerate(periods)}
+    )
+    membership["county"] = records["county"].to_numpy(dtype=object)
+    per_county = membership.groupby("county", sort=False).any()
+
+    has_records = per_county.any(axis=1)
+    period_index = pd.Series(
+        np.where(has_records, per_county.to_numpy().argmax(axis=1), -1),
+        index=per_county.index
+    )
+
+    matched = period_index.reindex(county_keys.to_numpy()).fillna(-1).astype(int)
+    matched.index = county_keys.index
+
+    record_counties = set(period_index.index[has_records.to_numpy()])
+    unmatched = record_counties - set(county_keys)
+    return matched, unmatched
+
+
+def _palette_colors(period_index, colors, default_color):
+    """Map period indexes (-1 for none) to colors, keeping the index"""
+    palette = np.array([default_color] + list(colors), dtype=object)
+    return pd.Series(palette[period_index.to_numpy() + 1], index=period_index.index)
+
+
+def county_colors(records, county_keys, periods, colors, default_color="white"):
+    """
+    Color every shapefile county by its highest-priority period.
+
+    colors holds one color per period. Returns a Series of colors aligned with
+    county_keys and the set of unmatched record counties.
+    """
+    period_index, unmatched = classify_counties(records, county_keys, periods)
+    return _palette_colors(period_index, colors, default_color), unmatched
+
+
+TAXON_COLUMNS = ["family", "genus", "species"]
+ALL = "all"
+
+
+def _is_valid_name(name):
+    """True for non-empty taxon names that are not a stringified missing value"""
+    return bool(str(name).strip()) and str(name).lower() != 'nan'
+
+
+def compact_records(records):
+    """
+    Store normalized records compactly: county and taxon names as categoricals
+    (small integer codes) and the year as a nullable Int16.
+    """
+    records = records.copy()
+    for col in ["county"] + TAXON_COLUMNS:
+        records[col] = records[col].astype("category")
+    records["year"] = records["year"].astype("Int16")
+    return records
+
+
+def concat_compact(blocks):
+    """
+    Concatenate compacted record blocks into one compact frame.
+
+    Each block has its own categories; they are merged (sorted, as in
+    compact_records()) so the concatenated columns stay categorical.
+    """
+    if len(blocks) == 1:
+        return blocks[0]
+    from pandas.api.types import union_categoricals
+
+    blocks = list(blocks)
+    for col in ["county"] + TAXON_COLUMNS:
+        categories = union_categoricals([block[col] for block in blocks], sort_categories=True).categories
+        blocks = [block.assign(**{col: block[col].cat.set_categories(categories)}) for block in blocks]
+    return pd.concat(blocks)
+
+
+def memory_footprint_mb(records):
+    """Memory held by the records in MB, including the strings behind object columns"""
+    return records.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+class TaxonomyIndex:
+    """
+    Family → genus → species hierarchy built once from the loaded records.
+
+    Names are stored lowercase, matching the normalized records. The special
+    key "all" stands for any non-empty value at that level, mirroring the
+    "All" entries of the dropdowns.
+    """
+
+    def __init__(self, records):
+        # Missing names (NaN on pandas 3) count as empty, as in _taxon_mask()
+        triples = records[TAXON_COLUMNS].drop_duplicates().astype(object).fillna("").astype(str)
+        families = triples["family"].to_numpy()
+        genera = triples["genus"].to_numpy()
+        species = triples["species"].to_numpy()
+
+        self.families = sorted({f for f in families if _is_valid_name(f)})
+
+        genera_by_family = {ALL: set()}
+        species_by_pair = {(ALL, ALL): set()}
+        for family, genus, sp in zip(families, genera, species):
+            family_set = bool(family.strip())
+            genus_set = bool(genus.strip())
+
+            if _is_valid_name(genus):
+                genera_by_family.setdefault(family, set()).add(genus)
+                if genus_set:
+                    genera_by_family[ALL].add(genus)
+
+            if not _is_valid_name(sp):
+                continue
+            species_by_pair.setdefault((family, genus), set()).add(sp)
+            if family_set:
+                species_by_pair.setdefault((ALL, genus), set()).add(sp)
+            if genus_set:
+                species_by_pair.setdefault((family, ALL), set()).add(sp)
+            if family_set and genus_set:
+                species_by_pair[(ALL, ALL)].add(sp)
+
+        self._genera = {key: sorted(values) for key, values in genera_by_family.items()}
+        self._species = {key: sorted(values) for key, values in species_by_pair.items()}
+
+    def genera(self, family):
+        """Sorted genera recorded under family ("all" for every family)"""
+        return self._genera.get(family.strip().lower(), [])
+
+    def species(self, family, genus):
+        """Sorted species recorded under family and genus ("all" allowed at either level)"""
+        return self._species.get((family.strip().lower(), genus.strip().lower()), [])
+
+
+REQUIRED_COLUMNS = ["county", "family", "genus", "species", "year"]
+
+
+class MissingColumnsError(ValueError):
+    """Raised when an input file lacks one or more required columns"""
+
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(f"Missing required columns: {', '.join(missing)}")
+
+
+class NoMontanaRecordsError(ValueError):
+    """Raised when none of the records fall in a Montana county"""
+
+    def __init__(self):
+        super().__init__("No valid Montana county records found")
+
+
+class LoadCancelled(Exception):
+    """Raised when a record load is cancelled through its cancel event"""
+
+
+# Rows normalized between progress reports and cancellation checks
+NORMALIZE_CHUNK_ROWS = 50000
+
+
+def _check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise LoadCancelled()
+
+
+def _normalize_chunk(df, valid_counties):
+    """Standardize one block of raw records and keep the Montana rows"""
+    df = df.copy()
+
+    # First standardize county names
+    df["county"] = standardize_county_names(df["county"].astype(str))
+
+    # Process other columns
+    for col in TAXON_COLUMNS:
+        df[col] = df[col].astype(str).str.strip().str.lower()
+    df["year"] = df["year"].astype(str).str.extract(r'(\d{4})', expand=False).astype(float)
+
+    # Filter to only include valid Montana counties
+    return df[df["county"].isin(valid_counties)]
+
+
+def _normalize_stream(blocks, valid_counties, progress=None, cancel=None):
+    """
+    Normalize raw record blocks as they are read, keeping only the Montana rows.
+
+    blocks yields (block, fraction done, progress text). Only the current
+    block and the Montana rows kept so far are held in memory, and the kept
+    rows are compacted (see compact_records()) block by block. Returns the
+    normalized records and the seconds spent reading and normalizing.
+    """
+    kept = []
+    read_seconds = normalize_seconds = 0.0
+    start = time.perf_counter()
+    for block, fraction, text in blocks:
+        read_seconds += time.perf_counter() - start
+        _check_cancelled(cancel)
+
+        start = time.perf_counter()
+        chunk = _normalize_chunk(block, valid_counties)
+        if len(chunk):
+            kept.append(compact_records(chunk))
+        normalize_seconds += time.perf_counter() - start
+        if progress is not None:
+            progress(f"Normalizing records... {text}", fraction)
+        start = time.perf_counter()
+
+    if not kept:
+        raise NoMontanaRecordsError()
+    return concat_compact(kept), read_seconds, normalize_seconds
+
+
+def _check_columns(columns):
+    """Raise MissingColumnsError unless every required column is present"""
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_columns:
+        raise MissingColumnsError(missing_columns)
+
+
+def normalize_records(df, valid_counties, progress=None, cancel=None):
+    """
+    Normalize raw records and keep only those in valid_counties.
+
+    County names are standardized, taxon names stripped and lowercased and
+    the first four-digit year extracted. County and taxon columns are
+    returned as categoricals and the year as a nullable Int16. Rows are
+    processed in blocks of NORMALIZE_CHUNK_ROWS so progress(message,
+    fraction) can be reported and a set cancel event (threading.Event)
+    raises LoadCancelled between blocks.
+    """
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    _check_columns(df.columns)
+
+    total = len(df)
+
+    def blocks():
+        for start in range(0, total, NORMALIZE_CHUNK_ROWS):
+            done = min(start + NORMALIZE_CHUNK_ROWS, total)
+            yield df.iloc[start:done], done / total, f"{done:,} / {total:,}"
+
+    records, _, _ = _normalize_stream(blocks(), valid_counties, progress, cancel)
+    return records
+
+
+# File dialog types for the supported record files
+INPUT_FILETYPES = [
+    ("Record Files", "*.xlsx *.csv *.tsv *.txt *.parquet"),
+    ("Excel Files", "*.xlsx"),
+    ("CSV/TSV Files", "*.csv *.tsv *.txt"),
+    ("Parquet Files", "*.parquet"),
+]
+
+
+def input_format(path):
+    """"excel", "delimited" or "parquet", from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".csv", ".tsv", ".txt"):
+        return "delimited"
+    if extension == ".parquet":
+        return "parquet"
+    return "excel"
+
+
+def _is_required_column(col):
+    return str(col).strip() in REQUIRED_COLUMNS
+
+
+def detect_separator(path):
+    """Tab or comma, whichever splits the header line into more fields"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        header = f.readline()
+    return "\t" if header.count("\t") >= header.count(",") else ","
+
+
+def read_delimited_blocks(path):
+    """
+    Stream the required columns of a CSV/TSV file in NORMALIZE_CHUNK_ROWS blocks.
+
+    Tab-separated exports (GBIF and SCAN downloads, even when named .csv)
+    are read without quote handling, as their text fields contain stray
+    quote characters. Yields (block, fraction of the file read, progress text).
+    """
+    import csv
+
+    sep = detect_separator(path)
+    options = dict(sep=sep, usecols=_is_required_column, dtype=str, encoding="utf-8",
+                   encoding_errors="replace")
+    if sep == "\t":
+        options["quoting"] = csv.QUOTE_NONE
+
+    header = pd.read_csv(path, nrows=0, **options).columns
+    _check_columns([str(col).strip() for col in header])
+
+    size = os.path.getsize(path) or 1
+    rows = 0
+    with open(path, "rb") as f:
+        for block in pd.read_csv(f, chunksize=NORMALIZE_CHUNK_ROWS, **options):
+            block.columns = block.columns.str.strip()
+            rows += len(block)
+            yield block, min(f.tell() / size, 1.0), f"{rows:,} rows read"
+
+
+def read_parquet_blocks(path):
+    """
+    Stream the required columns of a Parquet file in NORMALIZE_CHUNK_ROWS blocks.
+
+    Needs pyarrow. Yields (block, fraction of the rows read, progress text).
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow).")
+
+    parquet_file = pq.ParquetFile(path)
+    columns = [name for name in parquet_file.schema_arrow.names if _is_required_column(name)]
+    _check_columns([name.strip() for name in columns])
+
+    total = parquet_file.metadata.num_rows or 1
+    rows = 0
+    for batch in parquet_file.iter_batches(batch_size=NORMALIZE_CHUNK_ROWS, columns=columns):
+        block = batch.to_pandas()
+        block.columns = block.columns.str.strip()
+        rows += len(block)
+        yield block, rows / total, f"{rows:,} / {total:,}"
+
+
+def excel_engine():
+    """Fastest installed engine for .xlsx files (None lets pandas pick openpyxl)"""
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return None
+    # pandas supports the calamine engine from 2.2 onwards
+    major, minor = (int(part) for part in pd.__version__.split(".")[:2])
+    return "calamine" if (major, minor) >= (2, 2) else None
+
+
+def read_workbook(path):
+    """Read only the required columns from the first sheet of an Excel workbook"""
+    return pd.read_excel(
+        path,
+        sheet_name=0,
+        usecols=lambda col: str(col).strip() in REQUIRED_COLUMNS,
+        engine=excel_engine()
+    )
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Parsed-record cache files kept in the cache directory, newest first
+RECORDS_CACHE_LIMIT = 20
+
+
+def _records_cache_path(path, valid_counties):
+    """
+    Cache file for the normalized records of path.
+
+    The content hash is remembered per (path, size, mtime) in a small index,
+    so an unchanged file is not re-hashed; a touched but identical file still
+    maps to the same cache entry. The valid county set is part of the key.
+    Writing an entry drops those of files that are gone or whose cached
+    records were pruned.
+    """
+    cache_dir = get_cache_dir()
+    index_path = cache_dir / "records_index.json"
+    stat = os.stat(path)
+    abs_path = os.path.abspath(path)
+
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    entry = index.get(abs_path)
+    if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        content_hash = entry["sha256"]
+    else:
+        content_hash = file_hash(path)
+        index = _live_index_entries(index, cache_dir)
+        index[abs_path] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": content_hash}
+        try:
+            with open(index_path, "w") as f:
+                json.dump(index, f)
+        except OSError as e:
+            print(f"Warning: Could not write records cache index: {str(e)}")
+
+    counties_hash = hashlib.sha256("|".join(sorted(valid_counties)).encode()).hexdigest()
+    return cache_dir / f"records_{content_hash[:16]}_{counties_hash[:8]}_v{CACHE_VERSION}.pkl"
+
+
+def _live_index_entries(index, cache_dir):
+    """Records cache index entries whose file still exists and still has cached records"""
+    cached_hashes = {p.name.split("_")[1] for p in cache_dir.glob("records_*.pkl")}
+    return {
+        entry_path: entry for entry_path, entry in index.items()
+        if entry["sha256"][:16] in cached_hashes and os.path.exists(entry_path)
+    }
+
+
+def _prune_records_cache(cache_dir):
+    """Delete the oldest parsed-record cache files beyond RECORDS_CACHE_LIMIT"""
+    cached = sorted(cache_dir.glob("records_*.pkl"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in cached[RECORDS_CACHE_LIMIT:]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+
+def load_records(path, valid_counties, timings=None, use_cache=True, progress=None, cancel=None):
+    """
+    Read an Excel workbook, CSV/TSV or Parquet file and normalize it to Montana records.
+
+    CSV/TSV and Parquet files are streamed in blocks that are normalized and
+    filtered to Montana as they are read, so memory stays bounded by the
+    block size and the Montana rows whatever the file size.
+
+    Normalized records are cached on disk keyed by the file's content hash,
+    so reopening an unchanged workbook skips parsing entirely. When a timings
+    dict is passed it receives the parse and normalize durations in seconds
+    and the engine used ("cache" on a cache hit).
+
+    progress(message, fraction) is called as the load advances; fraction is
+    None while the workbook is being parsed. Setting the cancel event raises
+    LoadCancelled at the next check. Both are meant for loads running on a
+    worker thread.
+    """
+    start = time.perf_counter()
+
+    def report(message, fraction):
+        if progress is not None:
+            progress(message, fraction)
+
+    cache_path = None
+    if use_cache:
+        try:
+            report("Checking cache...", None)
+            cache_path = _records_cache_path(path, valid_counties)
+            if cache_path.exists():
+                records = pd.read_pickle(cache_path)
+                os.utime(cache_path)  # Mark as recently used for pruning
+                if timings is not None:
+                    timings["engine"] = "cache"
+                    timings["parse_seconds"] = time.perf_counter() - start
+                    timings["normalize_seconds"] = 0.0
+                report(f"Loaded {len(records):,} records from cache", 1.0)
+                return records
+        except Exception as e:
+            print(f"Warning: Could not read records cache: {str(e)}")
+
+    _check_cancelled(cancel)
+    file_format = input_format(path)
+    if file_format == "excel":
+        report("Reading workbook...", None)
+        raw = read_workbook(path)
+        parsed = time.perf_counter()
+        _check_cancelled(cancel)
+        records = normalize_records(raw, valid_counties, progress=progress, cancel=cancel)
+        engine = excel_engine() or "openpyxl"
+        parse_seconds = parsed - start
+        normalize_seconds = time.perf_counter() - parsed
+    else:
+        report("Reading records...", None)
+        if file_format == "parquet":
+            blocks, engine = read_parquet_blocks(path), "pyarrow"
+        else:
+            blocks, engine = read_delimited_blocks(path), "streamed csv"
+        records, parse_seconds, normalize_seconds = _normalize_stream(blocks, valid_counties, progress, cancel)
+
+    if cache_path is not None:
+        try:
+            records.to_pickle(cache_path)
+            _prune_records_cache(cache_path.parent)
+        except Exception as e:
+            print(f"Warning: Could not write records cache: {str(e)}")
+
+    if timings is not None:
+        timings["engine"] = engine
+        timings["parse_seconds"] = parse_seconds
+        timings["normalize_seconds"] = normalize_seconds
+    return records
+
+
+def record_summary(records):
+    """Dataset statistics shown after a file is loaded"""
+    return {
+        "records": len(records),
+        "families": records["family"].nunique(),
+        "genera": records["genus"].nunique(),
+        "species": records["species"].nunique(),
+        "counties": records["county"].nunique(),
+        "year_range": f"{int(records['year'].min())} - {int(records['year'].max())}",
+        "memory_mb": memory_footprint_mb(records),
+    }
+
+
+def _taxon_mask(values, selection):
+    """Mask for one taxon level: "all", "not specified" or an exact (case-insensitive) name"""
+    selection = selection.strip().lower()
+    if selection == ALL:
+        return values.notna() & (values != "")
+    if selection == "not specified":
+        return values.isna() | (values == "")
+    return values == selection
+
+
+def filter_taxon(records, family, genus, species):
+    """Records matching the family, genus and species selections"""
+    mask = (
+        _taxon_mask(records["family"], family)
+        & _taxon_mask(records["genus"], genus)
+        & _taxon_mask(records["species"], species)
+    )
+    return records[mask.to_numpy()]
+
+
+class TaxonCountySummary:
+    """
+    Per (family, genus, species, county) summary of the records, built once at load.
+
+    Each group keeps its record count, number of dated records and first
+    and last dated year, so every coloring question is answered from the
+    groups without touching the raw records again.
+    """
+
+    def __init__(self, records):
+        # Records are normalized already; group on their categorical columns as they are
+        grouped = records.groupby(TAXON_COLUMNS + ["county"], sort=True, dropna=False, observed=True)
+        codes = grouped.ngroup().to_numpy()
+
+        years = records["year"].to_numpy(dtype=float, na_value=np.nan)
+        dated = ~np.isnan(years)
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+
+        self.groups = grouped.size().index.to_frame(index=False).astype(object)
+        self.groups["records"] = np.bincount(codes, minlength=n_groups)
+        self.groups["dated"] = np.bincount(codes[dated], minlength=n_groups)
+        self.groups["first_year"] = pd.Series(years[dated]).groupby(codes[dated]).min().reindex(range(n_groups)).to_numpy()
+        self.groups["last_year"] = pd.Series(years[dated]).groupby(codes[dated]).max().reindex(range(n_groups)).to_numpy()
+
+        self._county_codes, self._counties = pd.factorize(self.groups["county"])
+
+        # Distinct named (genus, species) pairs for species richness
+        self._named_species = np.array([_is_valid_name(sp) for sp in self.groups["species"]], dtype=bool)
+        self._species_codes, species_pairs = pd.factorize(
+            pd.MultiIndex.from_frame(self.groups[["genus", "species"]].astype(str))
+        )
+        self._n_species = len(species_pairs)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def select(self, family, genus, species):
+        """Indexes of the groups matching the selections, with the semantics of filter_taxon()"""
+        mask = (
+            _taxon_mask(self.groups["family"], family)
+            & _taxon_mask(self.groups["genus"], genus)
+            & _taxon_mask(self.groups["species"], species)
+        )
+        return np.flatnonzero(mask.to_numpy())
+
+    def _per_county(self, groups, values, reduce):
+        """Reduce per-group values to one value per summary county (NaN for no groups)"""
+        out = pd.Series(values).groupby(self._county_codes[groups]).agg(reduce)
+        return out.reindex(range(len(self._counties))).to_numpy(dtype=float)
+
+    def _align_classes(self, classes, county_keys):
+        """Per-county period indexes aligned with county_keys, and the unmatched record counties"""
+        period_index = pd.Series(classes, index=self._counties)
+        matched = period_index.reindex(county_keys.to_numpy()).fillna(-1).astype(int)
+        matched.index = county_keys.index
+
+        unmatched = set(self._counties[classes >= 0]) - set(county_keys)
+        return matched, unmatched
+
+    def classify_split_years(self, family, genus, species, county_keys, split_years):
+        """
+        Period of every county for any number of sorted split years.
+
+        Periods run from the earliest, which has priority (see year_periods()),
+        so a county's period is the one holding its earliest dated record: one
+        searchsorted of the groups' first years against the split years and a
+        per-county minimum, however many periods there are. Without split
+        years the single open period covers every record, dated or not.
+        Returns the period index of every county in county_keys (-1 without
+        records) and the set of record counties not present in county_keys.
+        """
+        groups = self.select(family, genus, species)
+        county_codes = self._county_codes[groups]
+        n_counties = len(self._counties)
+
+        if not len(split_years):
+            has_records = np.bincount(county_codes, weights=self.groups["records"].to_numpy()[groups],
+                                      minlength=n_counties) > 0
+            return self._align_classes(np.where(has_records, 0, -1), county_keys)
+
+        first_years = self.groups["first_year"].to_numpy()[groups]
+        dated = ~np.isnan(first_years)
+        group_periods = np.searchsorted(np.asarray(split_years, dtype=float), first_years[dated], side="left")
+
+        no_records = len(split_years) + 1
+        classes = np.full(n_counties, no_records)
+        np.minimum.at(classes, county_codes[dated], group_periods)
+        return self._align_classes(np.where(classes == no_records, -1, classes), county_keys)
+
+    def split_year_colors(self, family, genus, species, county_keys, split_years, colors, default_color="white"):
+        """Colors aligned with county_keys for sorted split years, and the unmatched record counties"""
+        period_index, unmatched = self.classify_split_years(family, genus, species, county_keys, split_years)
+        return _palette_colors(period_index, colors, default_color), unmatched
+
+    def county_values(self, family, genus, species, county_keys, mode, reference_year=None):
+        """
+        One choropleth value per county for a taxon selection (see CHOROPLETH_MODES).
+
+        "records" counts the records, "richness" the distinct named species and
+        "years-since" the years from the latest dated record to reference_year
+        (default: the current year). Each is a bincount or per-county reduce
+        over the selected groups. Returns float values aligned with county_keys,
+        NaN for counties without (dated) records, and the unmatched record counties.
+        """
+        groups = self.select(family, genus, species)
+        county_codes = self._county_codes[groups]
+        n_counties = len(self._counties)
+
+        if mode == "records":
+            values = np.bincount(county_codes, weights=self.groups["records"].to_numpy()[groups],
+                                 minlength=n_counties)
+        elif mode == "richness":
+            named = self._named_species[groups]
+            county_species = np.unique(county_codes[named] * self._n_species + self._species_codes[groups][named])
+            values = np.bincount(county_species // self._n_species, minlength=n_counties).astype(float)
+        elif mode == "years-since":
+            if reference_year is None:
+                reference_year = datetime.date.today().year
+            dated = groups[self.groups["dated"].to_numpy()[groups] > 0]
+            values = reference_year - self._per_county(dated, self.groups["last_year"].to_numpy()[dated], "max")
+        else:
+            raise ValueError(f"Unknown map mode: {mode}")
+
+        has_records = np.bincount(county_codes, minlength=n_counties) > 0
+        values = np.where(has_records, values, np.nan)
+
+        positions = pd.Index(self._counties).get_indexer(county_keys.to_numpy())
+        found = positions >= 0
+        aligned = np.full(len(county_keys), np.nan)
+        aligned[found] = values[positions[found]]
+        return aligned, set(self._counties[has_records]) - set(county_keys)
+
+    def year_bounds(self, family, genus, species, county_keys):
+        """
+        First and last dated record year of every county in county_keys.
+
+        Returns two float arrays aligned with county_keys (NaN for counties
+        without dated records) and the set of unmatched record counties.
+        """
+        groups = self.select(family, genus, species)
+        groups = groups[self.groups["dated"].to_numpy()[groups] > 0]
+        first = self._per_county(groups, self.groups["first_year"].to_numpy()[groups], "min")
+        last = self._per_county(groups, self.groups["last_year"].to_numpy()[groups], "max")
+
+        positions = pd.Index(self._counties).get_indexer(county_keys.to_numpy())
+        found = positions >= 0
+        first_aligned = np.full(len(county_keys), np.nan)
+        last_aligned = np.full(len(county_keys), np.nan)
+        first_aligned[found] = first[positions[found]]
+        last_aligned[found] = last[positions[found]]
+
+        dated_counties = set(self._counties[np.unique(self._county_codes[groups])])
+        return first_aligned, last_aligned, dated_counties - set(county_keys)
+
+    def year_range(self, family, genus, species):
+        """(first, last) dated record year of the selection, or None without dated records"""
+        groups = self.select(family, genus, species)
+        first = self.groups["first_year"].to_numpy()[groups]
+        if np.isnan(first).all():
+            return None
+        last = self.groups["last_year"].to_numpy()[groups]
+        return int(np.nanmin(first)), int(np.nanmax(last))
+
+
+def get_cache_dir():
+    """Per-user cache directory for derived data (created on demand)"""
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local"))
+        cache_dir = base / "MontanaCountyMapGenerator" / "cache"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+        cache_dir = base / "montana_county_map_generator"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def shapefile_hash(shapefile_path):
+    """SHA-256 over the shapefile and the sidecar files that affect geometry or attributes"""
+    digest = hashlib.sha256()
+    base = os.path.splitext(shapefile_path)[0]
+    for ext in (".shp", ".shx", ".dbf", ".prj"):
+        part = base + ext
+        if os.path.exists(part):
+            with open(part, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _simplify_counties(geometries, tolerance):
+    """Simplify county polygons while keeping shared borders shared where GEOS supports it"""
+    import shapely
+    try:
+        return shapely.coverage_simplify(geometries, tolerance)
+    except (AttributeError, shapely.errors.GEOSException, shapely.errors.UnsupportedGEOSVersionError):
+        return shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+
+def _build_geometry_cache(shapefile_path, tolerance):
+    """Read the shapefile once and derive simplified counties plus the dissolved state outline"""
+    import geopandas as gpd
+    import shapely
+
+    counties = gpd.read_file(shapefile_path)
+    geometries = counties.geometry.values
+    outline = shapely.simplify(shapely.union_all(geometries), tolerance, preserve_topology=True)
+
+    return {
+        "version": CACHE_VERSION,
+        "tolerance": tolerance,
+        "crs": counties.crs.to_wkt() if counties.crs else None,
+        "attributes": pd.DataFrame(counties.drop(columns=counties.geometry.name)),
+        "counties_wkb": shapely.to_wkb(_simplify_counties(geometries, tolerance)),
+        "outline_wkb": shapely.to_wkb(outline),
+    }
+
+
+def load_county_geometry(shapefile_path, tolerance=SIMPLIFY_TOLERANCE, use_cache=True, timings=None):
+    """
+    Load simplified county polygons and the dissolved state outline.
+
+    Results are cached as WKB in the user cache directory, keyed by the hash
+    of the source shapefile, so later launches skip shapefile parsing, the
+    dissolve and the simplification. Returns (counties, outline) GeoDataFrames.
+    When a timings dict is passed it receives whether the cache was hit and
+    the load duration in seconds.
+    """
+    import geopandas as gpd
+    import shapely
+
+    start = time.perf_counter()
+    cache_hit = False
+    cache_path = None
+    data = None
+    if use_cache:
+        try:
+            key = shapefile_hash(shapefile_path)[:16]
+            cache_path = get_cache_dir() / f"county_geometry_{key}_t{tolerance:g}_v{CACHE_VERSION}.pkl"
+            if cache_path.exists():
+                with open(cache_path, "rb") as f:
+                    data = pickle.load(f)
+                cache_hit = True
+        except Exception as e:
+            print(f"Warning: Could not read geometry cache: {str(e)}")
+            data = None
+
+    if data is None:
+        data = _build_geometry_cache(shapefile_path, tolerance)
+        if cache_path is not None:
+            try:
+                with open(cache_path, "wb") as f:
+                    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except OSError as e:
+                print(f"Warning: Could not write geometry cache: {str(e)}")
+
+    counties = gpd.GeoDataFrame(
+        data["attributes"].copy(),
+        geometry=shapely.from_wkb(data["counties_wkb"]),
+        crs=data["crs"]
+    )
+    outline = gpd.GeoDataFrame(geometry=[shapely.from_wkb(data["outline_wkb"])], crs=data["crs"])
+
+    if timings is not None:
+        timings["cache_hit"] = cache_hit
+        timings["load_seconds"] = time.perf_counter() - start
+    return counties, outline
+
+
+def prepare_counties(counties):
+    """Add the display name, standardized county key and default color columns"""
+    counties = counties.copy()
+    counties.columns = counties.columns.str.strip()
+    counties["County"] = counties["NAME"].str.strip().str.lower()
+    counties["county_key"] = standardize_county_names(counties["County"])
+    counties["Color"] = "white"
+    return counties
+
+
+def county_paths(counties):
+    """
+    Matplotlib paths for every county polygon part.
+
+    Returns the paths and, for each path, the row index of the county it
+    belongs to, so per-county colors can be expanded to multipart counties.
+    """
+    from matplotlib.path import Path as MplPath
+
+    paths = []
+    owners = []
+    for i, geom in enumerate(counties.geometry.values):
+        parts = geom.geoms if geom.geom_type == "MultiPolygon" else [geom]
+        for part in parts:
+            rings = [part.exterior] + list(part.interiors)
+            paths.append(MplPath.make_compound_path(
+                *[MplPath(np.asarray(ring.coords)[:, :2], closed=True) for ring in rings]
+            ))
+            owners.append(i)
+    return paths, np.asarray(owners, dtype=int)
+
+
+# Legend row positions (bottom of each bar) for the standard period counts
+LEGEND_ROWS = {1: [0.35], 2: [0.5, 0.2], 3: [0.7, 0.4, 0.1]}
+
+
+def add_legend_axes(figure, rect):
+    """Boxed, axis-free legend area at rect (figure fraction)"""
+    from matplotlib.patches import Rectangle
+
+    legend_ax = figure.add_axes(rect)
+    legend_ax.axis('off')
+    legend_ax.add_patch(Rectangle((0, 0), 1, 1,
+                                  facecolor='white', edgecolor='black',
+                                  transform=legend_ax.transAxes))
+    legend_ax.set_xlim(0, 1)
+    legend_ax.set_ylim(0, 1)
+    return legend_ax
+
+
+def legend_positions(n_entries):
+    """
+    (x, y, width, height) of each legend bar in legend axes coordinates.
+
+    Up to three entries use the fixed LEGEND_ROWS; more are laid out top to
+    bottom in up to four columns, left to right.
+    """
+    if n_entries <= 3:
+        return [(0.2, y, 0.15, 0.1) for y in LEGEND_ROWS[n_entries]]
+    n_rows = max(3, math.ceil(n_entries / 4))
+    n_columns = math.ceil(n_entries / n_rows)
+    width = 0.9 / n_columns
+    spacing = 1.0 / n_rows
+    height = min(0.1, spacing / 2)
+    return [
+        (0.05 + (i // n_rows) * width, 1 - (i % n_rows + 0.5) * spacing - height / 2, width * 0.2, height)
+        for i in range(n_entries)
+    ]
+
+
+def add_legend_entries(legend_ax, entries, fontsize=10, animated=False):
+    """Draw (color, label) legend bars top to bottom; returns the new artists"""
+    from matplotlib.patches import Rectangle
+
+    artists = []
+    if len(entries) > 6:
+        fontsize *= 0.8  # Three or more columns
+    for (color, label), (x, y, bar_length, bar_height) in zip(entries, legend_positions(len(entries))):
+        artists.append(legend_ax.add_patch(
+            Rectangle((x, y), bar_length, bar_height,
+                      facecolor=color,
+                      alpha=0.6,
+                      edgecolor='black',
+                      animated=animated)
+        ))
+        artists.append(
+            legend_ax.text(x + bar_length * 4 / 3, y + bar_height / 2, label, fontsize=fontsize, va='center',
+                           animated=animated)
+        )
+    return artists
+
+
+class ClassedLegend:
+    """Classed colorbar of a choropleth: one color box per class, labeled with its value range"""
+
+    def __init__(self, colors, labels, caption):
+        self.colors = list(colors)
+        self.labels = list(labels)
+        self.caption = caption
+
+
+def add_classed_legend(legend_ax, legend, fontsize=10, animated=False):
+    """Draw a ClassedLegend as a row of adjoining color boxes; returns the new artists"""
+    from matplotlib.patches import Rectangle
+
+    artists = [legend_ax.text(0.5, 0.8, legend.caption, fontsize=fontsize, ha='center', va='center',
+                              animated=animated)]
+    if not legend.colors:
+        return artists
+    width = 0.8 / len(legend.colors)
+    for i, (color, label) in enumerate(zip(legend.colors, legend.labels)):
+        x = 0.1 + i * width
+        artists.append(legend_ax.add_patch(
+            Rectangle((x, 0.4), width, 0.25,
+                      facecolor=color,
+                      alpha=0.6,
+                      edgecolor='black',
+                      animated=animated)
+        ))
+        artists.append(
+            legend_ax.text(x + width / 2, 0.2, label, fontsize=fontsize * 0.9, ha='center', va='center',
+                           animated=animated)
+        )
+    return artists
+
+
+def draw_legend(legend_ax, legend, fontsize=10, animated=False):
+    """Draw period (color, label) entries or a ClassedLegend; returns the new artists"""
+    if isinstance(legend, ClassedLegend):
+        return add_classed_legend(legend_ax, legend, fontsize, animated)
+    return add_legend_entries(legend_ax, legend, fontsize, animated)
+
+
+class MapFigure:
+    """
+    County map layout drawn once and recolored for every render.
+
+    The county outlines and fill polygons are created when the view is built;
+    update() only swaps facecolors, the title text and the legend entries.
+
+    For on-screen previews, enable_blitting() keeps the static layers as
+    bitmaps at the canvas resolution: the background with the legend box, and
+    the county outlines, which are composited above the fills as in a full
+    draw. redraw() then only rasterizes the fills, title and legend. Exports
+    go through savefig(), which always draws every layer as vectors.
+    """
+
+    def __init__(self, figure, counties, title_pad=25, title_wrap=True):
+        from matplotlib.collections import PathCollection
+
+        self.figure = figure
+
+        # Create main map axis with sufficient space for title and legend
+        self.ax = figure.add_axes([0.1, 0.2, 0.8, 0.6])
+        counties.boundary.plot(ax=self.ax, linewidth=1, edgecolor="black")
+        self.outlines = self.ax.collections[-1]
+
+        paths, self._owners = county_paths(counties)
+        self.fills = PathCollection(paths, alpha=0.6)
+        self.fills.set_color("white")
+        self.ax.add_collection(self.fills)
+        self.ax.autoscale_view()
+        self.ax.set_aspect("equal")
+        self.ax.axis("off")
+
+        self.title = self.ax.set_title("", fontsize=15, pad=title_pad, wrap=title_wrap)
+
+        # Create a separate axis for the legend with a box around it
+        self.legend_ax = add_legend_axes(figure, [0.2, 0.02, 0.6, 0.12])
+        self._legend_artists = []
+
+        # Adjust main plot to make room for legend
+        figure.subplots_adjust(bottom=0.2, top=0.9)
+
+        # Cached static layers for blitted previews (see enable_blitting)
+        self.canvas = None
+        self._background = None
+        self._outline_layer = None
+        self._exporting = False
+
+    def _dynamic_artists(self):
+        """Artists that change between renders, drawn over the static layer"""
+        return [self.fills, self.title] + self._legend_artists
+
+    def _blitted_artists(self):
+        """Artists left out of full canvas draws while blitting"""
+        return [self.outlines] + self._dynamic_artists()
+
+    def enable_blitting(self, canvas):
+        """
+        Cache the static layer of canvas and blit later renders over it.
+
+        The cached bitmaps are captured on every full draw of the canvas (first
+        show, resize), so they always match the current display resolution.
+        canvas must be Agg based (FigureCanvasAgg, FigureCanvasTkAgg).
+        """
+        self.canvas = canvas
+        self._background = None
+        for artist in self._blitted_artists():
+            artist.set_animated(True)
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        if self._exporting:
+            return
+        renderer = self.canvas.get_renderer()
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+        # Rasterize the outlines alone on a transparent canvas (rows bottom-up for draw_image)
+        renderer.clear()
+        self.figure.draw_artist(self.outlines)
+        self._outline_layer = np.asarray(renderer.buffer_rgba())[::-1].copy()
+
+        self.canvas.restore_region(self._background)
+        self._draw_dynamic()
+
+    def _draw_dynamic(self):
+        self.figure.draw_artist(self.fills)
+        renderer = self.canvas.get_renderer()
+        gc = renderer.new_gc()
+        renderer.draw_image(gc, 0, 0, self._outline_layer)
+        gc.restore()
+        for artist in self._dynamic_artists()[1:]:
+            self.figure.draw_artist(artist)
+
+    def redraw(self):
+        """Show the latest update, blitting over the cached static layer when there is one"""
+        if self.canvas is None:
+            self.figure.canvas.draw_idle()
+        elif self._background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_dynamic()
+            self.canvas.blit(self.figure.bbox)
+
+    def savefig(self, *args, **kwargs):
+        """Save the complete map, including the layers that are blitted on screen"""
+        animated = [artist for artist in self._blitted_artists() if artist.get_animated()]
+        for artist in animated:
+            artist.set_animated(False)
+        self._exporting = True
+        try:
+            self.figure.savefig(*args, **kwargs)
+        finally:
+            self._exporting = False
+            for artist in animated:
+                artist.set_animated(True)
+            if self.canvas is not None:
+                # Saving may have drawn the canvas at the export resolution
+                self._background = None
+                self.canvas.draw_idle()
+
+    def set_county_colors(self, colors):
+        """Recolor the fill polygons; colors are aligned with the county rows"""
+        colors = np.asarray(list(colors), dtype=object)
+        self.fills.set_color(list(colors[self._owners]))
+
+    def set_legend(self, legend):
+        """Replace the legend with (color, label) entries, top to bottom, or a ClassedLegend"""
+        for artist in self._legend_artists:
+            artist.remove()
+        self._legend_artists = []
+
+        self._legend_artists = draw_legend(self.legend_ax, legend, animated=self.canvas is not None)
+
+    def update(self, colors, title, legend, title_fontsize=15):
+        """Apply one render: county colors, title text and legend"""
+        self.set_county_colors(colors)
+        self.title.set_text(title)
+        self.title.set_fontsize(title_fontsize)
+        self.set_legend(legend)
+
+
+class MapGrid:
+    """
+    Small multiples: one county map panel per taxon in a single figure.
+
+    The county paths and outline segments are built once from the projected
+    geometry and shared by every panel, so a render only sets each panel's
+    facecolors and label. One legend and title serve the whole grid.
+    """
+
+    # Panel size and the margins for the title and legend, in inches
+    PANEL_WIDTH = 3.0
+    PANEL_HEIGHT = 2.2
+    TOP_MARGIN = 0.9
+    BOTTOM_MARGIN = 1.4
+
+    def __init__(self, figure, counties, n_panels, ncols=None):
+        from matplotlib.collections import LineCollection, PathCollection
+
+        self.figure = figure
+        ncols = max(1, min(ncols or math.ceil(math.sqrt(n_panels)), n_panels))
+        nrows = math.ceil(n_panels / ncols)
+        height = nrows * self.PANEL_HEIGHT + self.TOP_MARGIN + self.BOTTOM_MARGIN
+        figure.set_size_inches(ncols * self.PANEL_WIDTH, height)
+
+        paths, self._owners = county_paths(counties)
+        segments = [ring for path in paths for ring in path.to_polygons(closed_only=False)]
+        xmin, ymin, xmax, ymax = counties.total_bounds
+
+        axes = figure.subplots(nrows, ncols, squeeze=False).ravel()
+        figure.subplots_adjust(left=0.02, right=0.98, wspace=0.05, hspace=0.3,
+                               top=1 - self.TOP_MARGIN / height, bottom=self.BOTTOM_MARGIN / height)
+
+        self.panels = []
+        for i, ax in enumerate(axes):
+            ax.axis("off")
+            if i >= n_panels:
+                continue
+            fills = PathCollection(paths, alpha=0.6)
+            fills.set_color("white")
+            ax.add_collection(fills)
+            ax.add_collection(LineCollection(segments, colors="black", linewidths=0.4))
+            ax.set_xlim(xmin, xmax)
+            ax.set_ylim(ymin, ymax)
+            ax.set_aspect("equal")
+            label = ax.set_title("", fontsize=9)
+            self.panels.append((fills, label))
+
+        self.title = figure.suptitle("", fontsize=15, y=1 - 0.25 / height)
+        legend_height = 1.0 / height
+        self.legend_ax = add_legend_axes(figure, [0.3, 0.2 / height, 0.4, legend_height])
+        self._legend_artists = []
+
+    def update(self, panel_colors, panel_labels, title, legend):
+        """Apply one render: per-panel county colors and labels, the title and legend"""
+        for (fills, label), colors, text in zip(self.panels, panel_colors, panel_labels):
+            colors = np.asarray(list(colors), dtype=object)
+            fills.set_color(list(colors[self._owners]))
+            label.set_text(text)
+        self.title.set_text(title)
+
+        for artist in self._legend_artists:
+            artist.remove()
+        self._legend_artists = draw_legend(self.legend_ax, legend)
+
+
+def panel_label(family, genus, species):
+    """Most specific selected rank, as shown above a grid panel"""
+    if species.lower() != ALL:
+        return species.lower()
+    if genus.lower() != ALL:
+        return genus.title()
+    return family.title()
+
+
+# Default period colors, highest priority period first
+DEFAULT_PERIOD_COLORS = {1: ["yellow"], 2: ["grey", "red"], 3: ["grey", "red", "yellow"]}
+
+# Colormap sampled for the default colors of more than three periods
+MANY_PERIODS_COLORMAP = "viridis"
+
+
+def default_period_colors(n_periods):
+    """Default colors for n periods: the fixed palettes, or an even sample of a colormap"""
+    if n_periods in DEFAULT_PERIOD_COLORS:
+        return list(DEFAULT_PERIOD_COLORS[n_periods])
+    from matplotlib import colormaps
+    from matplotlib.colors import to_hex
+    cmap = colormaps[MANY_PERIODS_COLORMAP]
+    return [to_hex(cmap(i / (n_periods - 1))) for i in range(n_periods)]
+
+
+def year_periods(split_years):
+    """
+    Periods and legend labels for any number of sorted split years.
+
+    No split year gives a single "All Records" period; one year splits the
+    records into ≤ year and > year, and every further year adds the period
+    since the previous one. Periods are ordered from highest to lowest
+    priority, which is also oldest to newest.
+    """
+    split_years = list(split_years)
+    if not split_years:
+        return [(None, None)], ["All Records"]
+    bounds = [None] + split_years + [None]
+    periods = list(zip(bounds[:-1], bounds[1:]))
+    labels = [f"Records ≤ {split_years[0]}"]
+    labels += [f"Records {lower+1} - {upper}" for lower, upper in periods[1:-1]]
+    labels.append(f"Records > {split_years[-1]}")
+    return periods, labels
+
+
+def decade_breaks(first_year, last_year):
+    """Split years ending each decade between first_year and last_year (1909, 1919, ...)"""
+    start = (first_year // 10) * 10 + 9
+    return list(range(start, last_year, 10))
+
+
+# Map modes: the period map and the quantitative choropleths with their captions
+PERIODS_MODE = "periods"
+CHOROPLETH_MODES = {
+    "records": "Records per County",
+    "richness": "Species Richness",
+    "years-since": "Years Since Last Record",
+}
+MAP_MODES = {PERIODS_MODE: "Record Periods", **CHOROPLETH_MODES}
+
+# Sequential colormap and number of quantile classes of each choropleth
+CHOROPLETH_COLORMAPS = {"records": "YlOrRd", "richness": "YlGnBu", "years-since": "PuRd"}
+CHOROPLETH_CLASSES = 5
+
+
+def choropleth_caption(mode, reference_year=None):
+    """Legend caption and second title line of a choropleth mode"""
+    caption = CHOROPLETH_MODES[mode]
+    if mode == "years-since" and reference_year is not None:
+        caption += f" (to {reference_year})"
+    return caption
+
+
+def class_breaks(values, n_classes=CHOROPLETH_CLASSES):
+    """
+    Upper bounds of up to n_classes quantile classes of the finite values.
+
+    The values are whole numbers, so the bounds are rounded up and equal
+    bounds merge; the last bound is the maximum value.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return []
+    quantiles = np.quantile(values, np.linspace(0, 1, n_classes + 1)[1:])
+    return sorted({int(bound) for bound in np.ceil(quantiles)})
+
+
+def class_labels(breaks, minimum):
+    """Value range label of each class, from the smallest value up"""
+    lowers = [int(minimum)] + [bound + 1 for bound in breaks[:-1]]
+    return [str(upper) if lower >= upper else f"{lower} - {upper}" for lower, upper in zip(lowers, breaks)]
+
+
+def class_colors(mode, n_classes):
+    """n_classes colors from the mode's colormap, skipping its near-white end"""
+    from matplotlib import colormaps
+    from matplotlib.colors import to_hex
+    cmap = colormaps[CHOROPLETH_COLORMAPS[mode]]
+    return [to_hex(cmap(0.25 + 0.75 * i / max(n_classes - 1, 1))) for i in range(n_classes)]
+
+
+def choropleth_classes(values, mode, reference_year=None, n_classes=CHOROPLETH_CLASSES):
+    """Quantile class breaks of values and the ClassedLegend that shows them"""
+    breaks = class_breaks(values, n_classes)
+    labels = class_labels(breaks, np.nanmin(values)) if breaks else []
+    return breaks, ClassedLegend(class_colors(mode, len(breaks)), labels, choropleth_caption(mode, reference_year))
+
+
+def classed_colors(values, breaks, colors, default_color="white"):
+    """Color each value by its class (value <= break); NaN values get default_color"""
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+    class_index = np.full(len(values), -1)
+    class_index[finite] = np.searchsorted(breaks, values[finite], side="left")
+    return _palette_colors(pd.Series(class_index), colors, default_color)
+
+
+def _year_caption(split_years):
+    """Second title line naming the split year(s), if any"""
+    split_years = list(split_years)
+    if len(split_years) == 1:
+        return f"\nYear: {split_years[0]}"
+    if len(split_years) == 2:
+        return f"\nYears: {split_years[0]} - {split_years[1]}"
+    if split_years:
+        return f"\nSplit Years: {', '.join(str(year) for year in split_years)}"
+    return ""
+
+
+def map_title(family, genus, species, split_years):
+    """Map title in the 'Family > Genus > species' form with the split year(s) below"""
+    return f"{family.title()} > {genus.title()} > {species.lower()}" + _year_caption(split_years)
+
+
+def grid_title(family, genus, split_years):
+    """Small-multiples title: the shared 'Family > Genus' with the split year(s) below"""
+    return f"{family.title()} > {genus.title()}" + _year_caption(split_years)
+
+
+def map_filename(family, genus, species, split_years, export_format, timestamp=None, mode=PERIODS_MODE):
+    """Export file name: Family-Genus-species[_years or _mode][_timestamp].ext"""
+    years = "-".join(str(year) for year in split_years)
+    year_info = f"_{years}" if years else ""
+    if mode != PERIODS_MODE:
+        year_info = f"_{mode}"
+    time_info = f"_{timestamp}" if timestamp else ""
+    filename = f"{family.title()}-{genus.title()}-{species.lower()}{year_info}{time_info}"
+    # Taxon names such as "centralis/flavifrons" must not create directories
+    filename = re.sub(r'[\\/:*?"<>|]', '_', filename)
+    return f"{filename}.{export_format}"
+
+
+def configure_export_fonts(export_format):
+    """Serif fonts for exported maps; SVG keeps text as editable elements"""
+    import matplotlib as mpl
+    mpl.rcParams['font.family'] = 'serif'
+    mpl.rcParams['font.serif'] = ['Times New Roman', 'Times', 'DejaVu Serif', 'serif']
+    if export_format == 'svg':
+        mpl.rcParams['svg.fonttype'] = 'none'
+
+
+class MapSpec:
+    """
+    Everything one map shows: the taxon selection, the map mode, and for
+    period maps the split years and period colors.
+
+    The analysis windows, the batch tool and the exports all describe a map
+    with a spec and draw it through render(), so title, legend, file name and
+    coloring rules stay identical everywhere. Choropleth modes (see
+    CHOROPLETH_MODES) ignore the split years and colors.
+    """
+
+    def __init__(self, family, genus, species, split_years=(), colors=None, mode=PERIODS_MODE,
+                 reference_year=None):
+        if mode not in MAP_MODES:
+            raise ValueError(f"Unknown map mode: {mode}")
+        self.family = family
+        self.genus = genus
+        self.species = species
+        self.mode = mode
+        self.reference_year = reference_year or datetime.date.today().year
+        self.split_years = list(split_years) if mode == PERIODS_MODE else []
+        self.periods, self.labels = year_periods(self.split_years)
+        self.colors = list(colors) if colors and mode == PERIODS_MODE else default_period_colors(len(self.periods))
+
+    @property
+    def caption(self):
+        """Choropleth legend caption (None for period maps)"""
+        if self.mode == PERIODS_MODE:
+            return None
+        return choropleth_caption(self.mode, self.reference_year)
+
+    @property
+    def title(self):
+        title = map_title(self.family, self.genus, self.species, self.split_years)
+        return title if self.caption is None else f"{title}\n{self.caption}"
+
+    @property
+    def legend_entries(self):
+        """(color, label) per period, highest priority first"""
+        return list(zip(self.colors, self.labels))
+
+    def filename(self, export_format, timestamp=None):
+        return map_filename(self.family, self.genus, self.species, self.split_years, export_format, timestamp,
+                            mode=self.mode)
+
+
+def render(counties, summary, spec, view=None, title_pad=25, title_wrap=True, title_fontsize=15):
+    """
+    Classify and draw the map described by a MapSpec without any GUI.
+
+    Counties are colored from the TaxonCountySummary: by period, or by the
+    quantile class of a choropleth value with a classed colorbar legend.
+    Pass the MapFigure from a previous call (or one embedded in a window) as
+    view to recolor it; otherwise a new pyplot-free figure is built. Returns
+    the MapFigure and the set of unmatched record counties.
+    """
+    if spec.mode == PERIODS_MODE:
+        fills, unmatched = summary.split_year_colors(spec.family, spec.genus, spec.species, counties["county_key"],
+                                                     spec.split_years, spec.colors)
+        legend = spec.legend_entries
+    else:
+        values, unmatched = summary.county_values(spec.family, spec.genus, spec.species, counties["county_key"],
+                                                  spec.mode, spec.reference_year)
+        breaks, legend = choropleth_classes(values, spec.mode, spec.reference_year)
+        fills = classed_colors(values, breaks, legend.colors)
+
+    if view is None:
+        from matplotlib.figure import Figure
+        view = MapFigure(Figure(figsize=(12, 11)), counties, title_pad=title_pad, title_wrap=title_wrap)
+    view.update(fills, spec.title, legend, title_fontsize=title_fontsize)
+    return view, unmatched
+
+
+def render_grid(counties, summary, taxa, split_years, colors=None, ncols=None, mode=PERIODS_MODE,
+                reference_year=None):
+    """
+    Draw one small-multiples figure with a panel per (family, genus, species).
+
+    Every panel uses the same periods and colors, or in a choropleth mode the
+    same classes, taken from the values of all panels together. Returns the
+    MapGrid and the set of unmatched record counties across all taxa.
+    """
+    from matplotlib.figure import Figure
+
+    family, genus, _ = taxa[0]
+    unmatched = set()
+    if mode == PERIODS_MODE:
+        periods, labels = year_periods(split_years)
+        colors = list(colors) if colors else default_period_colors(len(periods))
+        panel_colors = []
+        for taxon in taxa:
+            fills, taxon_unmatched = summary.split_year_colors(*taxon, counties["county_key"], split_years, colors)
+            panel_colors.append(fills)
+            unmatched |= taxon_unmatched
+        title = grid_title(family, genus, split_years)
+        legend = list(zip(colors, labels))
+    else:
+        reference_year = reference_year or datetime.date.today().year
+        panel_values = []
+        for taxon in taxa:
+            values, taxon_unmatched = summary.county_values(*taxon, counties["county_key"], mode, reference_year)
+            panel_values.append(values)
+            unmatched |= taxon_unmatched
+        breaks, legend = choropleth_classes(np.concatenate(panel_values), mode, reference_year)
+        panel_colors = [classed_colors(values, breaks, legend.colors) for values in panel_values]
+        title = f"{grid_title(family, genus, [])}\n{legend.caption}"
+
+    grid = MapGrid(Figure(), counties, len(taxa), ncols=ncols)
+    grid.update(panel_colors, [panel_label(*taxon) for taxon in taxa], title, legend)
+    return grid, unmatched
+
+
+def split_year_colors(first, last, year, colors, default_color="white"):
+    """
+    County colors for one split year from TaxonCountySummary.year_bounds().
+
+    colors holds the ≤ year and > year colors; the ≤ year period has priority,
+    as in year_periods().
+    """
+    before, after = colors
+    with np.errstate(invalid="ignore"):
+        return np.where(first <= year, before, np.where(last > year, after, default_color)).astype(object)
+
+
+SWEEP_FORMATS = ["gif", "mp4", "frames"]
+
+
+def export_year_sweep(counties, summary, family, genus, species, path, sweep_format="gif", years=None,
+                      colors=None, fps=2, dpi=100, progress=None, cancel=None):
+    """
+    Export one Single Year map per split year as an animation or frame sequence.
+
+    sweep_format is "gif", "mp4" (needs ffmpeg) or "frames", for which path is
+    the directory receiving one PNG per year. years defaults to every year
+    from the taxon's first to last record. The county first/last record years
+    are looked up once from the TaxonCountySummary; each frame only recolors
+    the counties and updates the title and legend.
+    Returns the number of frames and the set of unmatched record counties.
+    """
+    from matplotlib import animation
+    from matplotlib.figure import Figure
+
+    if sweep_format not in SWEEP_FORMATS:
+        raise ValueError(f"Unknown sweep format: {sweep_format}")
+    if sweep_format == "mp4" and not animation.FFMpegWriter.isAvailable():
+        raise RuntimeError("MP4 export needs ffmpeg on the PATH. Choose GIF or PNG frames instead.")
+
+    colors = list(colors) if colors else default_period_colors(2)
+    if years is None:
+        span = summary.year_range(family, genus, species)
+        years = range(span[0], span[1] + 1) if span else []
+    years = list(years)
+    if not years:
+        raise ValueError("The selected taxon has no dated records to sweep over.")
+    first, last, unmatched = summary.year_bounds(family, genus, species, counties["county_key"])
+
+    view = MapFigure(Figure(figsize=(12, 11)), counties)
+
+    def frames():
+        for i, year in enumerate(years):
+            _, labels = year_periods([year])
+            view.update(split_year_colors(first, last, year, colors),
+                        map_title(family, genus, species, [year]), list(zip(colors, labels)))
+            yield year
+            if progress:
+                progress(f"Rendered {i + 1} of {len(years)} frames ({year})", (i + 1) / len(years))
+            # Checked after a frame so a cancelled animation still has one to finish with
+            _check_cancelled(cancel)
+
+    _check_cancelled(cancel)
+
+    if sweep_format == "frames":
+        os.makedirs(path, exist_ok=True)
+        for year in frames():
+            filename = map_filename(family, genus, species, [year], "png")
+            view.figure.savefig(os.path.join(path, filename), format="png", dpi=dpi)
+        return len(years), unmatched
+
+    if sweep_format == "gif":
+        writer = animation.PillowWriter(fps=fps)
+    else:
+        writer = animation.FFMpegWriter(fps=fps)
+    try:
+        with writer.saving(view.figure, path, dpi):
+            for _ in frames():
+                writer.grab_frame()
+    except Exception:
+        # Do not leave a truncated animation behind
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return len(years), unmatched
+
+
+def process_rss_mb():
+    """Resident memory of this process in MB, or None when it cannot be determined"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if get_info(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize / (1024 * 1024)
+        except (AttributeError, OSError):
+            return None
+        return None
+
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import matplotlib
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+matplotlib.use("Agg")
+
+import map_engine  # noqa: E402
+
+SHAPEFILE_PATH = os.path.join(REPO_DIR, "MontanaCounties_shp", "County.shp")
+
+
+@pytest.fixture(scope="session")
+def counties():
+    """Prepared Montana county geometry from the bundled shapefile"""
+    counties, _ = map_engine.load_county_geometry(SHAPEFILE_PATH, use_cache=False)
+    return map_engine.prepare_counties(counties)
+
+
+@pytest.fixture(scope="session")
+def valid_counties(counties):
+    return set(counties["county_key"])
@@ -0,0 +1,247 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.colors import to_rgba
+
+import generate_occurrences
+import map_engine
+
+# Raw records as found in an export: messy spellings, date and "Pre YYYY"
+# years, a missing species, an undated record and an out-of-state county
+RAW_RECORDS = pd.DataFrame(
+    [
+        ("Gallatin", "Apidae", "Bombus", "huntii", 1940),
+        ("Gallatin", "Apidae", "Bombus", "mixtus", 2010),
+        ("Lewis & Clark", " APIDAE", "BOMBUS ", "Huntii", "2005-06-01"),
+        (" Missoula ", "Apidae", "Bombus", "huntii", "Pre 2016"),
+        ("Missoula", "Apidae", "Bombus", np.nan, 1951),
+        ("Park", "Halictidae", "Halictus", "ligatus", np.nan),
+        ("Park", "Apidae", "Bombus", "huntii", 1950),
+        ("Ada", "Apidae", "Bombus", "huntii", 2000),
+    ],
+    columns=map_engine.REQUIRED_COLUMNS,
+)
+
+EXPECTED_COUNTIES = ["gallatin", "gallatin", "lewis and clark", "missoula", "missoula", "park", "park"]
+EXPECTED_YEARS = [1940, 2010, 2005, 2016, 1951, None, 1950]
+
+
+@pytest.fixture(scope="module")
+def records(valid_counties):
+    return map_engine.normalize_records(RAW_RECORDS, valid_counties)
+
+
+@pytest.fixture(scope="module")
+def summary(records):
+    return map_engine.TaxonCountySummary(records)
+
+
+def _by_county(counties, values):
+    """Non-empty per-county values of a result aligned with the county rows"""
+    values = pd.Series(np.asarray(values), index=counties["county_key"].to_numpy())
+    return values[values.notna() & (values != -1)].sort_index().to_dict()
+
+
+@pytest.mark.parametrize("extension", [".xlsx", ".csv", ".parquet"])
+def test_load_records_normalizes_each_format(tmp_path, valid_counties, extension):
+    path = str(tmp_path / f"records{extension}")
+    generate_occurrences.write_records(RAW_RECORDS, path)
+
+    records = map_engine.load_records(path, valid_counties, use_cache=False)
+
+    assert records["county"].tolist() == EXPECTED_COUNTIES
+    assert records["year"].astype(object).where(records["year"].notna(), None).tolist() == EXPECTED_YEARS
+    assert set(records["family"]) == {"apidae", "halictidae"}
+    assert set(records["genus"]) == {"bombus", "halictus"}
+    assert records.loc[records["county"] == "lewis and clark", "species"].tolist() == ["huntii"]
+    assert all(isinstance(records[col].dtype, pd.CategoricalDtype) for col in ["county"] + map_engine.TAXON_COLUMNS)
+    assert records["year"].dtype == "Int16"
+
+
+def test_load_records_missing_columns(tmp_path, valid_counties):
+    path = str(tmp_path / "records.csv")
+    RAW_RECORDS.drop(columns=["species", "year"]).to_csv(path, index=False)
+
+    with pytest.raises(map_engine.MissingColumnsError) as error:
+        map_engine.load_records(path, valid_counties, use_cache=False)
+    assert error.value.missing == ["species", "year"]
+
+
+@pytest.mark.parametrize("extension", [".xlsx", ".csv"])
+def test_load_records_without_montana_rows(tmp_path, valid_counties, extension):
+    path = str(tmp_path / f"records{extension}")
+    generate_occurrences.write_records(RAW_RECORDS[RAW_RECORDS["county"] == "Ada"], path)
+
+    with pytest.raises(map_engine.NoMontanaRecordsError):
+        map_engine.load_records(path, valid_counties, use_cache=False)
+
+
+def test_records_cache_index_drops_stale_entries(tmp_path, monkeypatch, valid_counties):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    paths = {name: str(tmp_path / f"{name}.csv") for name in ["moved", "pruned", "kept", "new"]}
+    for i, path in enumerate(paths.values()):
+        RAW_RECORDS.iloc[:i + 1].to_csv(path, index=False)
+        map_engine.load_records(path, valid_counties)
+
+    os.remove(paths["moved"])
+    pruned_hash = map_engine.file_hash(paths["pruned"])[:16]
+    for cached in (tmp_path / "cache").rglob(f"records_{pruned_hash}_*.pkl"):
+        cached.unlink()
+    RAW_RECORDS.to_csv(paths["new"], index=False)
+    map_engine.load_records(paths["new"], valid_counties)
+
+    index_path = next((tmp_path / "cache").rglob("records_index.json"))
+    with open(index_path) as f:
+        assert sorted(json.load(f)) == sorted([paths["kept"], paths["new"]])
+
+
+@pytest.mark.parametrize("selection, expected", [
+    # "all" means any non-empty name, so the record without a species only matches "not specified"
+    (("all", "all", "all"), 6),
+    (("all", "Bombus", "all"), 5),
+    (("all", "bombus", "not specified"), 1),
+    (("Apidae", "bombus", "HUNTII"), 4),
+    (("halictidae", "all", "all"), 1),
+    (("apidae", "halictus", "all"), 0),
+])
+def test_filter_taxon(records, selection, expected):
+    assert len(map_engine.filter_taxon(records, *selection)) == expected
+
+
+def test_taxonomy_index(records):
+    index = map_engine.TaxonomyIndex(records)
+
+    assert index.families == ["apidae", "halictidae"]
+    assert index.genera("all") == ["bombus", "halictus"]
+    assert index.genera(" Apidae ") == ["bombus"]
+    assert index.genera("megachilidae") == []
+    assert index.species("apidae", "bombus") == ["huntii", "mixtus"]
+    assert index.species("all", "all") == ["huntii", "ligatus", "mixtus"]
+    assert index.species("Halictidae", "all") == ["ligatus"]
+
+
+def test_taxonomy_index_with_blank_names(tmp_path, valid_counties):
+    path = str(tmp_path / "records.csv")
+    pd.DataFrame(
+        [
+            ("Gallatin", "", "Bombus", "huntii", 2000),
+            ("Park", "Apidae", "", "mixtus", 2001),
+            ("Park", "Apidae", "Bombus", "fervidus", 2002),
+        ],
+        columns=map_engine.REQUIRED_COLUMNS,
+    ).to_csv(path, index=False)
+    records = map_engine.load_records(path, valid_counties, use_cache=False)
+
+    index = map_engine.TaxonomyIndex(records)
+
+    assert index.families == ["apidae"]
+    assert index.genera("all") == ["bombus"]
+    assert index.genera("apidae") == ["bombus"]
+    assert index.species("all", "all") == ["fervidus"]
+    assert index.species("all", "bombus") == ["fervidus"]
+    assert index.species("apidae", "all") == ["fervidus"]
+    assert len(map_engine.filter_taxon(records, "not specified", "bombus", "all")) == 1
+    assert len(map_engine.filter_taxon(records, "apidae", "not specified", "all")) == 1
+
+
+@pytest.mark.parametrize("selection, split_years, expected", [
+    # A county takes the earliest period it has records in; split years belong to the period they end
+    (("all", "all", "all"), [1950], {"gallatin": 0, "lewis and clark": 1, "missoula": 1, "park": 0}),
+    (("all", "all", "all"), [1940, 2005], {"gallatin": 0, "lewis and clark": 1, "missoula": 2, "park": 1}),
+    (("all", "all", "all"), [1939, 2005, 2010],
+     {"gallatin": 1, "lewis and clark": 1, "missoula": 3, "park": 1}),
+    (("all", "bombus", "all"), [2006, 2015], {"gallatin": 0, "lewis and clark": 0, "missoula": 2, "park": 0}),
+    (("all", "all", "huntii"), [1945, 2010], {"gallatin": 0, "lewis and clark": 1, "missoula": 2, "park": 1}),
+    # Undated records only count when there are no split years
+    (("halictidae", "all", "all"), [1950], {}),
+    (("halictidae", "all", "all"), [], {"park": 0}),
+])
+def test_classify_split_years(counties, summary, selection, split_years, expected):
+    period_index, unmatched = summary.classify_split_years(*selection, counties["county_key"], split_years)
+
+    assert _by_county(counties, period_index) == expected
+    assert unmatched == set()
+
+
+@pytest.mark.parametrize("split_years", [[], [1950], [1950, 2005], [1920, 1960, 1990, 2010]])
+def test_classify_split_years_matches_period_rules(counties, valid_counties, split_years):
+    raw = generate_occurrences.generate_records(5000, generate_occurrences.shapefile_county_names(), seed=3)
+    records = map_engine.normalize_records(raw, valid_counties)
+    summary = map_engine.TaxonCountySummary(records)
+    periods, _ = map_engine.year_periods(split_years)
+
+    for selection in [("all", "all", "all"), ("apidae", "bombus", "all"), ("all", "all", "huntii")]:
+        expected, expected_unmatched = map_engine.classify_counties(
+            map_engine.filter_taxon(records, *selection), counties["county_key"], periods
+        )
+        period_index, unmatched = summary.classify_split_years(*selection, counties["county_key"], split_years)
+        pd.testing.assert_series_equal(period_index, expected)
+        assert unmatched == expected_unmatched
+
+
+def test_classify_split_years_unmatched_counties(counties, summary):
+    county_keys = counties["county_key"][counties["county_key"] != "gallatin"]
+
+    period_index, unmatched = summary.classify_split_years("all", "all", "all", county_keys, [1950])
+
+    assert period_index.index.equals(county_keys.index)
+    assert unmatched == {"gallatin"}
+
+
+@pytest.mark.parametrize("selection, mode, expected", [
+    (("all", "all", "all"), "records", {"gallatin": 2, "lewis and clark": 1, "missoula": 1, "park": 2}),
+    (("all", "all", "not specified"), "records", {"missoula": 1}),
+    (("all", "bombus", "huntii"), "records", {"gallatin": 1, "lewis and clark": 1, "missoula": 1, "park": 1}),
+    (("all", "all", "all"), "richness", {"gallatin": 2, "lewis and clark": 1, "missoula": 1, "park": 2}),
+    (("all", "all", "all"), "years-since", {"gallatin": 10, "lewis and clark": 15, "missoula": 4, "park": 70}),
+    # Counties with only undated records have no value
+    (("halictidae", "all", "all"), "years-since", {}),
+])
+def test_county_values(counties, summary, selection, mode, expected):
+    values, unmatched = summary.county_values(*selection, counties["county_key"], mode, reference_year=2020)
+
+    assert _by_county(counties, values) == expected
+    assert unmatched == set()
+
+
+def test_county_values_unknown_mode(counties, summary):
+    with pytest.raises(ValueError):
+        summary.county_values("all", "all", "all", counties["county_key"], "density")
+
+
+def _fill_color(view, counties, county_key):
+    """Facecolor of the first fill polygon of a county"""
+    row = np.flatnonzero(counties["county_key"].to_numpy() == county_key)[0]
+    return tuple(view.fills.get_facecolor()[np.flatnonzero(view._owners == row)[0]])
+
+
+def test_render_period_map(counties, summary):
+    spec = map_engine.MapSpec("all", "bombus", "all", [1950], colors=["grey", "red"])
+
+    view, unmatched = map_engine.render(counties, summary, spec)
+
+    assert unmatched == set()
+    assert view.title.get_text() == spec.title
+    assert _fill_color(view, counties, "gallatin") == to_rgba("grey", 0.6)
+    assert _fill_color(view, counties, "missoula") == to_rgba("red", 0.6)
+    assert _fill_color(view, counties, "yellowstone") == to_rgba("white", 0.6)
+
+    buffer = io.BytesIO()
+    view.savefig(buffer, format="png", dpi=50)
+    assert buffer.getvalue().startswith(b"\x89PNG")
+
+
+def test_render_recolors_the_given_view(counties, summary):
+    view, _ = map_engine.render(counties, summary, map_engine.MapSpec("all", "all", "all", [1950]))
+    spec = map_engine.MapSpec("all", "all", "all", mode="records")
+
+    recolored, _ = map_engine.render(counties, summary, spec, view=view)
+
+    assert recolored is view
+    assert view.title.get_text() == spec.title
+    assert _fill_color(view, counties, "yellowstone") == to_rgba("white", 0.6)
+    assert _fill_color(view, counties, "gallatin") != to_rgba("white", 0.6)